@@ -0,0 +1 @@
+# this module intentionally left blank
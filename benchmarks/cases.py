@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Benchmark cases for the core calculation and sizing paths.
+
+Each case is a function that takes a list of designs and returns a function
+to time, which processes all of the designs once. If that function has a
+close attribute, it is called when the timing is done. Designs are drawn from
+reproducible distributions covering thin and thick walls, and internal and
+external pressure.
+"""
+import io
+import os
+import random
+import tempfile
+from pressurevessels.PressureVessels import Vessel, np
+from pressurevessels import sizing
+from pressurevessels.resultdb import ResultDatabase
+
+# (name, wall ratio OD/ID range, pExt range, pInt range)
+DISTRIBUTIONS = (('thin-internal', (1.02, 1.1), (0, 100), (500, 3000)),
+                 ('thin-external', (1.02, 1.1), (500, 3000), (0, 100)),
+                 ('thick-internal', (1.5, 3.0), (0, 100), (5000, 15000)),
+                 ('thick-external', (1.5, 3.0), (5000, 15000), (0, 100)))
+
+CASES = {}
+
+
+def designs(distribution, count, seed=0):
+    ''' Return a list of design tuples from one of the DISTRIBUTIONS.'''
+    name, ratio, pExt, pInt = distribution
+    rng = random.Random(f'{name}-{seed}')
+    rows = []
+    for _ in range(count):
+        ID = rng.uniform(0.5, 20)
+        rows.append((rng.uniform(*pExt), rng.uniform(*pInt),
+                     ID * rng.uniform(*ratio), ID,
+                     rng.uniform(60000, 150000)))
+    return rows
+
+
+def case(name, count, needs_numpy=False, distributions=True):
+    ''' Register a benchmark case, which is timed over count designs.
+
+    The case function is called with the designs of each distribution, or
+    with just the count, once, if distributions is False.'''
+    def register(function):
+        function.count = count
+        function.needs_numpy = needs_numpy
+        function.distributions = distributions
+        CASES[name] = function
+        return function
+    return register
+
+
+@case('vessel_calculate', 2000)
+def vessel_calculate(rows):
+    def run():
+        for row in rows:
+            Vessel(*row).calculate()
+    return run
+
+
+@case('modify_parameters', 2000)
+def modify_parameters(rows):
+    vessel = Vessel(*rows[0])
+
+    def run():
+        for row in rows:
+            vessel.modify_parameters(pExt=row[0], pInt=row[1], OD=row[2],
+                                     ID=row[3], allowable_stress=row[4])
+            vessel.SF
+    return run
+
+
+@case('minimize_OD', 200)
+def minimize_OD(rows):
+    def run():
+        for row in rows:
+            Vessel(*row).minimize_OD()
+    return run
+
+
+@case('minimize_ID', 200)
+def minimize_ID(rows):
+    def run():
+        for row in rows:
+            Vessel(*row).minimize_ID()
+    return run
+
+
+@case('minimize_OD_db', 200)
+def minimize_OD_db(rows):
+    # Every design was sized before, so each one is a lookup
+    directory = tempfile.TemporaryDirectory()
+    database = ResultDatabase(os.path.join(directory.name, 'results.db'))
+
+    def run():
+        for row in rows:
+            Vessel(*row, cache=database).minimize_OD()
+
+    def close():
+        database.close()
+        directory.cleanup()
+
+    try:
+        run()
+    except BaseException:
+        close()
+        raise
+    run.close = close
+    return run
+
+
+@case('change_units', 2000)
+def change_units(rows):
+    def run():
+        for row in rows:
+            vessel = Vessel(*row)
+            vessel.change_units('SI')
+            vessel.change_units('US')
+    return run
+
+
+@case('vessel_batch', 100000, needs_numpy=True)
+def vessel_batch(rows):
+    from pressurevessels.PressureVessels import VesselBatch
+    columns = [np.array(column) for column in zip(*rows)]
+
+    def run():
+        VesselBatch(*columns)
+    return run
+
+
+@case('vessel_batch_float32', 100000, needs_numpy=True)
+def vessel_batch_float32(rows):
+    from pressurevessels.PressureVessels import VesselBatch
+    columns = [np.array(column, dtype=np.float32) for column in zip(*rows)]
+
+    def run():
+        VesselBatch(*columns, precision='float32')
+    return run
+
+
+@case('vessel_batch_auto', 100000, needs_numpy=True)
+def vessel_batch_auto(rows):
+    from pressurevessels.PressureVessels import VesselBatch
+    columns = [np.array(column) for column in zip(*rows)]
+
+    def run():
+        VesselBatch(*columns, precision='auto')
+    return run
+
+
+@case('material_batch', 100000, needs_numpy=True)
+def material_batch(rows):
+    from pressurevessels.materials import MaterialDatabase
+    rng = random.Random(len(rows))
+    # 200 materials, with allowables falling over 1 to 20 temperatures
+    tables = {}
+    for material in range(200):
+        temperatures = sorted(rng.sample(range(-20, 1200, 10),
+                                         rng.randint(1, 20)))
+        tables[material] = [(t, 60000 - 20 * t) for t in temperatures]
+    database = MaterialDatabase(tables)
+    columns = [np.array(column) for column in zip(*rows)][:4]
+    codes = np.array([rng.randrange(200) for _ in rows])
+    temperatures = np.array([rng.uniform(0, 1000) for _ in rows])
+
+    def run():
+        database.batch(codes, temperatures, *columns)
+    return run
+
+
+@case('size_OD_batch', 20000, needs_numpy=True)
+def size_OD_batch(rows):
+    pExt, pInt, OD, ID, allowable_stress = [np.array(column)
+                                            for column in zip(*rows)]
+
+    def run():
+        sizing.size_OD_batch(pExt, pInt, ID, allowable_stress)
+    return run
+
+
+@case('size_ID_batch', 20000, needs_numpy=True)
+def size_ID_batch(rows):
+    pExt, pInt, OD, ID, allowable_stress = [np.array(column)
+                                            for column in zip(*rows)]
+
+    def run():
+        sizing.size_ID_batch(pExt, pInt, OD, allowable_stress)
+    return run
+
+
+@case('fatigue_history', 1000000, needs_numpy=True, distributions=False)
+def fatigue_history(count):
+    from pressurevessels import fatigue
+    # A noisy pressure history of count samples, streamed in chunks for two
+    # geometries
+    noise = np.random.default_rng(count)
+    pInt = (1500 + 1000 * np.sin(np.arange(count) / 3000)
+            + noise.normal(0, 50, count))
+    pExt = 14.7 + noise.normal(0, 5, count)
+    data = np.column_stack((pExt, pInt)).astype('<f8').tobytes()
+    curve = fatigue.SNCurve(3, 1e13, endurance=100)
+
+    def run():
+        counters = [fatigue.FatigueCounter(3, 2.5, curve),
+                    fatigue.FatigueCounter(2, 1.5, curve)]
+        fatigue.evaluate_history(io.BytesIO(data), counters, fmt='binary')
+    return run
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Load test for the evaluation service (python -m pressurevessels serve).
+
+    python -m benchmarks.loadtest --clients 64 --requests 200 --op size
+
+Many clients send requests at the same time, each one waiting for its answer
+before sending the next. The same load is sent to a service which batches
+requests, and to one which builds a Vessel for each request (each started in
+its own process), and the throughput and latency of both are reported. With
+--port or --unix, the load is sent to a running service instead.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from .cases import DISTRIBUTIONS, designs
+
+
+def make_requests(op, count):
+    keys = ('pExt', 'pInt', 'OD', 'ID', 'allowable_stress')
+    requests = []
+    for number, row in enumerate(designs(DISTRIBUTIONS[0], count)):
+        request = {'id': number, 'op': op, 'design': dict(zip(keys, row))}
+        if op == 'size':
+            request['size'] = 'OD'
+            request['target_SF'] = 1.5
+        requests.append(json.dumps(request).encode() + b'\n')
+    return requests
+
+
+async def client(connect, requests, latencies):
+    reader, writer = await connect()
+    try:
+        for request in requests:
+            start = time.perf_counter()
+            writer.write(request)
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if 'error' in response:
+                raise RuntimeError(response['error'])
+    finally:
+        writer.close()
+
+
+async def load(connect, op, clients, count):
+    ''' Return (requests per second, sorted latencies) for the given load.'''
+    requests = make_requests(op, count)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(connect, requests, latencies)
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return clients * count / elapsed, sorted(latencies)
+
+
+async def metrics(connect):
+    reader, writer = await connect()
+    writer.write(b'{"op": "metrics"}\n')
+    response = json.loads(await reader.readline())
+    writer.close()
+    return response['result']
+
+
+def start_service(options):
+    ''' Start a service on a free port, and return (process, port).'''
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'pressurevessels', 'serve', '--port', '0']
+        + options, stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if not line.startswith('listening on '):
+        process.kill()
+        raise RuntimeError(f'the service did not start: {line}')
+    return process, int(line.rsplit(':', 1)[1])
+
+
+def report(name, rate, latencies, summary=None):
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    line = f'{name:12s} {rate:10.0f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms'
+    if summary is not None:
+        line += f'  mean batch {summary["mean_batch"]:.1f}'
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.loadtest',
+        description='Send concurrent requests to the evaluation service, with '
+                    'and without batching, and report the throughput.')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per client (default: %(default)s)')
+    parser.add_argument('--op', choices=('evaluate', 'size'),
+                        default='evaluate')
+    parser.add_argument('--window', default='2.0',
+                        help='batching window in milliseconds '
+                             '(default: %(default)s)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int,
+                        help='send the load to a running service on this port')
+    parser.add_argument('--unix', metavar='PATH',
+                        help='send the load to a running service on this '
+                             'Unix socket')
+    args = parser.parse_args(argv)
+
+    if args.port or args.unix:
+        if args.unix:
+            def connect():
+                return asyncio.open_unix_connection(args.unix)
+        else:
+            def connect():
+                return asyncio.open_connection(args.host, args.port)
+        rate, latencies = asyncio.run(load(connect, args.op, args.clients,
+                                           args.requests))
+        report('service', rate, latencies)
+        return 0
+
+    rates = {}
+    for name, options in (('per-request', ['--no-batching']),
+                          ('batched', ['--window', args.window])):
+        process, port = start_service(options)
+
+        def connect():
+            return asyncio.open_connection('127.0.0.1', port)
+        try:
+            rate, latencies = asyncio.run(load(connect, args.op, args.clients,
+                                               args.requests))
+            summary = asyncio.run(metrics(connect))
+        finally:
+            process.terminate()
+            process.wait()
+        rates[name] = rate
+        report(name, rate, latencies, summary)
+    print(f'speedup {rates["batched"] / rates["per-request"]:.2f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
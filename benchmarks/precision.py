@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Validate the float32 and 'auto' precisions of VesselBatch against Vessel.
+
+    python -m benchmarks.precision --count 2000 --band 0.05
+
+Designs are drawn from adversarial groups: thin walls, where OD**2 - ID**2
+cancels, and nearly equal pressures, as well as typical and thick walls. For
+each group and precision, the safety factors are compared to the scalar
+Vessel and to an exact reference (rational arithmetic, rounded once), and the
+designs where the SF >= 1 decision differs from Vessel are counted. The exit
+status is 1 if the 'auto' precision changes any decision.
+"""
+import argparse
+import math
+import random
+import sys
+from fractions import Fraction
+from pressurevessels.PressureVessels import (Vessel, VesselBatch, np,
+                                             _require_numpy)
+
+
+def thin(rng):
+    ID = rng.uniform(0.5, 20)
+    return (rng.uniform(0, 100), rng.uniform(0, 3000),
+            ID * (1 + 10**rng.uniform(-6, -2)), ID,
+            rng.uniform(20000, 150000))
+
+
+def balanced(rng):
+    ID = rng.uniform(0.5, 20)
+    pInt = rng.uniform(100, 15000)
+    pExt = pInt * (1 + rng.choice((-1, 1)) * 10**rng.uniform(-9, -3))
+    return (pExt, pInt, ID * rng.uniform(1.01, 3), ID,
+            rng.uniform(20000, 150000))
+
+
+def typical(rng):
+    ID = rng.uniform(0.5, 20)
+    return (rng.uniform(0, 3000), rng.uniform(0, 3000),
+            ID * rng.uniform(1.02, 1.5), ID, rng.uniform(20000, 150000))
+
+
+def thick(rng):
+    ID = rng.uniform(0.5, 20)
+    return (rng.uniform(0, 15000), rng.uniform(0, 15000),
+            ID * rng.uniform(1.5, 5), ID, rng.uniform(20000, 150000))
+
+
+GROUPS = {'thin': thin, 'balanced': balanced, 'typical': typical,
+          'thick': thick}
+
+
+def exact_SF(pExt, pInt, OD, ID, allowable_stress):
+    ''' The safety factor from exact rational arithmetic, with the square
+    roots and the final result rounded once each.'''
+    pExt, pInt, OD, ID, allow = map(Fraction, (pExt, pInt, OD, ID,
+                                               allowable_stress))
+    area = OD**2 - ID**2
+    axial = (pInt*ID**2 - pExt*OD**2) / area
+    hoop_inner = (pInt*(OD**2 + ID**2) - 2*pExt*OD**2) / area
+    hoop_outer = (2*pInt*ID**2 - pExt*(OD**2 + ID**2)) / area
+
+    def vonmises(s1, s2, s3):
+        return math.sqrt((s1 - s2)**2 / 2 + (s2 - s3)**2 / 2
+                         + (s3 - s1)**2 / 2)
+    vmInt = vonmises(hoop_inner, axial, -pInt)
+    vmExt = vonmises(hoop_outer, axial, -pExt)
+    maxstress = max(vmInt, vmExt)
+    averagestress = (vmInt + vmExt) / 2
+    factor = 0.80 if pExt > pInt else 0.666666
+    return float(min(allow / Fraction(maxstress),
+                     Fraction(factor) * allow / Fraction(averagestress)))
+
+
+def relative_errors(values, reference):
+    return np.abs(values / reference - 1)
+
+
+def validate(count=2000, seed=0, band=0.05):
+    ''' Return a list of report rows: (group, precision, median and maximum
+    relative error against Vessel and the exact reference, and the number of
+    SF >= 1 decisions which differ from Vessel).'''
+    _require_numpy()
+    report = []
+    for name, group in GROUPS.items():
+        rng = random.Random(f'{name}-{seed}')
+        rows = [group(rng) for _ in range(count)]
+        columns = [np.array(column) for column in zip(*rows)]
+        scalar = np.array([Vessel(*row).SF for row in rows])
+        exact = np.array([exact_SF(*row) for row in rows])
+        report.append((name, 'Vessel', 0.0, 0.0,
+                       float(np.median(relative_errors(scalar, exact))),
+                       float(np.max(relative_errors(scalar, exact))), 0))
+        for precision in ('float64', 'float32', 'auto'):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                SF = VesselBatch(*columns, precision=precision,
+                                 band=band).SF.astype(np.float64)
+            to_scalar = relative_errors(SF, scalar)
+            to_exact = relative_errors(SF, exact)
+            decisions = int(np.count_nonzero((SF >= 1) != (scalar >= 1)))
+            report.append((name, precision, float(np.median(to_scalar)),
+                           float(np.max(to_scalar)),
+                           float(np.median(to_exact)),
+                           float(np.max(to_exact)), decisions))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.precision',
+        description='Compare the float32 and auto precisions of VesselBatch '
+                    'to Vessel, over adversarial designs.')
+    parser.add_argument('--count', type=int, default=2000,
+                        help='designs per group (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--band', type=float, default=0.05,
+                        help="band around SF = 1 recalculated by the 'auto' "
+                             "precision (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = validate(args.count, args.seed, args.band)
+    print(f'{"group":9s} {"precision":9s} {"vs Vessel":>21s} '
+          f'{"vs exact":>21s} {"decisions":>9s}')
+    print(f'{"":19s} {"median":>10s} {"max":>10s} {"median":>10s} '
+          f'{"max":>10s}')
+    changed = 0
+    for name, precision, *errors, decisions in report:
+        print(f'{name:9s} {precision:9s} '
+              + ' '.join(f'{error:10.2e}' for error in errors)
+              + f' {decisions:9d}')
+        if precision == 'auto':
+            changed += decisions
+    return 1 if changed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
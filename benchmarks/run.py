@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Run the benchmarks, and compare them to a stored baseline.
+
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --baseline baseline.json --threshold 0.25
+
+Each case is timed for each input distribution (or once, for a case which
+does not use the designs), and the best of several repeats is reported as the
+time per design. With a baseline, the exit status
+is 1 if any result is slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pressurevessels.PressureVessels import np
+from .cases import CASES, DISTRIBUTIONS, designs
+
+
+def time_case(run, count, repeat):
+    ''' Return the best time per design over repeat runs of count designs.'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best / count
+
+
+def _time_and_close(run, count, repeat):
+    ''' Time a case, and then release anything it holds open.'''
+    try:
+        return time_case(run, count, repeat)
+    finally:
+        close = getattr(run, 'close', None)
+        if close is not None:
+            close()
+
+
+def run_benchmarks(names=None, repeat=5, scale=1.0):
+    ''' Return a dictionary of {case/distribution: seconds per design}, or
+    {case: seconds per design} for the cases which do not use the
+    distributions.'''
+    results = {}
+    for name, function in CASES.items():
+        if names and name not in names:
+            continue
+        if function.needs_numpy and np is None:
+            continue
+        count = max(1, int(function.count * scale))
+        if not function.distributions:
+            results[name] = _time_and_close(function(count), count, repeat)
+            continue
+        for distribution in DISTRIBUTIONS:
+            rows = designs(distribution, count)
+            key = f'{name}/{distribution[0]}'
+            results[key] = _time_and_close(function(rows), count, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    ''' Return a list of (key, result, baseline, ratio) for the results that
+    are slower than the baseline by more than the threshold.'''
+    regressions = []
+    for key, seconds in results.items():
+        if key in baseline and seconds > baseline[key] * (1 + threshold):
+            regressions.append((key, seconds, baseline[key],
+                                seconds / baseline[key]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+                                     description=__doc__.split('\n\n')[1])
+    parser.add_argument('cases', nargs='*', metavar='case',
+                        help=f'cases to run (default: all of '
+                             f'{", ".join(CASES)})')
+    parser.add_argument('--baseline', help='baseline JSON file to compare to')
+    parser.add_argument('--save', help='save the results as a baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown relative to the baseline '
+                             '(default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of repeats (default: %(default)s)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='scale the number of designs per case')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.repeat, args.scale)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print(f'{"case":40s} {"us/design":>10s} {"baseline":>10s} {"ratio":>6s}')
+    for key, seconds in results.items():
+        line = f'{key:40s} {seconds * 1e6:10.3f}'
+        if key in baseline:
+            line += (f' {baseline[key] * 1e6:10.3f}'
+                     f' {seconds / baseline[key]:6.2f}')
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'results': results}, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, seconds, reference, ratio in regressions:
+        print(f'REGRESSION {key}: {ratio:.2f}x slower than the baseline',
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,153 +5,306 @@ MIT License
 Copyright (c) 2020 tamalone1
 """
 import math
-# from .conversions import VesselParameter
+from collections import namedtuple
+from . import conversions
+from .conversions import VesselParameter
+try:
+    import numpy as np
+except ImportError:
+    # numpy is only needed for the batch calculations
+    np = None
+else:
+    _SQRT3_FLOAT32 = np.float32(math.sqrt(3))
+
+
+def _require_numpy():
+    ''' Raise an informative error if numpy is not installed.'''
+    if np is None:
+        raise ImportError('numpy is required for batch calculations; '
+                          'install it with "pip install numpy"')
+
+
+VesselSpec = namedtuple('VesselSpec',
+                        ('pExt', 'pInt', 'OD', 'ID', 'allowable_stress'))
+VesselSpec.__doc__ = ''' The design parameters of one vessel.
+
+An immutable, hashable tuple with no per-instance dictionary, which is
+cheap to keep in memory for many designs.'''
+
+class VesselResult(namedtuple('VesselResult',
+                              ('external',
+                               'maxstress',
+                               'averagestress',
+                               'SF_external',
+                               'SF_internal',
+                               'maxExternal',
+                               'maxInternal'))):
+    ''' The stresses, safety factors, and pressure ratings of one vessel, as
+    calculated by evaluate().
+
+    Like VesselSpec, this is an immutable, hashable tuple. The safety factor
+    for the actual pressures is selected from the external and internal
+    safety factors when it is accessed, rather than stored.'''
+    __slots__ = ()
+
+    @property
+    def SF(self):
+        return self.SF_external if self.external else self.SF_internal
+
+
+def _principalstressINT(OD, ID, pInt, pExt):
+    """ Calculate the principal stresses on the internal surface."""
+    # Squared as x*x, as numpy squares, so VesselBatch rounds the same way
+    OD2 = OD*OD
+    ID2 = ID*ID
+    hoop = pInt*(OD2+ID2)/(OD2-ID2) - 2*pExt*OD2/(OD2-ID2)
+    axial = pInt*ID2/(OD2-ID2) - pExt*OD2/(OD2-ID2)
+    radial = -pInt
+    return hoop, axial, radial
+
+
+def _principalstressEXT(OD, ID, pInt, pExt):
+    """ Calculate the principal stresses on the external surface."""
+    OD2 = OD*OD
+    ID2 = ID*ID
+    hoop = 2*pInt*ID2/(OD2-ID2) - pExt*(OD2+ID2)/(OD2-ID2)
+    axial = pInt*ID2/(OD2-ID2) - pExt*OD2/(OD2-ID2)
+    radial = -pExt
+    return hoop, axial, radial
+
+
+def _vonmises(s1, s2, s3):
+    """ Calculate von Mises stress given 3 principal stresses."""
+    d12, d23, d31 = s1 - s2, s2 - s3, s3 - s1
+    vm = math.sqrt(0.5 * (d12*d12 + d23*d23 + d31*d31))
+    return vm
+
+
+def _safetyfactor(value, allowable):
+    """ Calculate the safety factor, compared to the allowable value."""
+    return allowable / value
+
+
+def _stresses(pExt, pInt, OD, ID):
+    ''' Return the maximum and average of the von Mises stresses on the outer
+    and inner surfaces.'''
+    vmExt = _vonmises(*_principalstressEXT(OD, ID, pInt, pExt))
+    vmInt = _vonmises(*_principalstressINT(OD, ID, pInt, pExt))
+    return max(vmExt, vmInt), (vmExt + vmInt) / 2
+
+
+def _max_averagestresses(allowable_stress):
+    ''' Return the allowable average stress for external and internal
+    pressure, which is 4/5 or 2/3 of the allowable stress.'''
+    return allowable_stress * 0.80, allowable_stress * 0.666666
+
+
+def _safetyfactors(external, maxstress, averagestress, allowable_stress):
+    '''Calculate the minimum safety factors for internal and external pressure
+    Compare average stress to adjusted allowable_ stress, where the adjustment
+    factor is 2/3 for internal pressure or 4/5 for external pressure
+
+    Return the safety factors for external pressure, internal pressure, and
+    the actual pressures.'''
+    (max_averagestress_external,
+     max_averagestress_internal) = _max_averagestresses(allowable_stress)
+
+    SF_max = _safetyfactor(maxstress, allowable_stress)
+    SF_external = min(SF_max, _safetyfactor(averagestress,
+                                            max_averagestress_external))
+    SF_internal = min(SF_max, _safetyfactor(averagestress,
+                                            max_averagestress_internal))
+    SF = SF_external if external else SF_internal
+    return SF_external, SF_internal, SF
+
+
+def _maxpressures(pExt, pInt, SF_external, SF_internal):
+    '''Calculate the maximum pressures (external, internal).
+
+    Multiply the differential pressure by the minimum safety factor (for
+    external and internal), and add the result external pressure (internal
+    case) and subtract from the internal pressure (external case).'''
+    differentialpressure = abs(pExt - pInt)
+    return SF_external * differentialpressure, SF_internal * differentialpressure
+
+
+def evaluate(spec):
+    ''' Calculate the stresses, safety factors, and pressure ratings of a
+    design, given as a VesselSpec (or any sequence of the five parameters).
+
+    This is a pure function, and returns a VesselResult.'''
+    pExt, pInt, OD, ID, allowable_stress = spec
+    # Set a flag if the net pressure is external
+    external = (pExt > pInt)
+    maxstress, averagestress = _stresses(pExt, pInt, OD, ID)
+    SF_external, SF_internal, SF = _safetyfactors(external, maxstress,
+                                                  averagestress,
+                                                  allowable_stress)
+    maxExternal, maxInternal = _maxpressures(pExt, pInt, SF_external,
+                                             SF_internal)
+    return VesselResult(external, maxstress, averagestress, SF_external,
+                        SF_internal, maxExternal, maxInternal)
+
+
+class _Result:
+    ''' A calculated property of a Vessel, read from its VesselResult.'''
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # Accessed from the class, not an instance
+            return self
+        return getattr(obj.result, self.name)
+
 
 class Vessel():
     '''A cylindrical vessel subjected to internal and external pressure
+
+    A mutable wrapper around a VesselSpec. The stresses, safety factors and
+    pressure ratings are evaluated when they are first accessed, and kept
+    until one of the parameters is changed.
     '''
-    # pExt = VesselParameter('pressure')
-    # pInt = VesselParameter('pressure')
-    # OD = VesselParameter('length')
-    # ID = VesselParameter('length')
-    # allowable_stress = VesselParameter('pressure')
-
-    def __init__(self, pExt, pInt, OD, ID, allowable_stress):
-        ''' Set the vessel's design parameters, and calculate the stresses,
-        safety factors, and pressure ratings'''
+    pExt = VesselParameter('pressure')
+    pInt = VesselParameter('pressure')
+    OD = VesselParameter('length')
+    ID = VesselParameter('length')
+    allowable_stress = VesselParameter('pressure')
+
+    external = _Result()
+    maxstress = _Result()
+    averagestress = _Result()
+    SF_external = _Result()
+    SF_internal = _Result()
+    SF = _Result()
+    maxExternal = _Result()
+    maxInternal = _Result()
+
+    _inputs = VesselSpec._fields
+
+    def __init__(self, pExt, pInt, OD, ID, allowable_stress, *, units='US',
+                 cache=None):
+        ''' Set the vessel's design parameters. The stresses, safety factors,
+        and pressure ratings are calculated when they are needed.
+
+        units is the unit system of the parameters (and the results), 'US' or
+        'SI'. If an EvaluationCache is given, it is used for the calculations.'''
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        self._result = None
+        self.cache = cache
         self.pExt = pExt
         self.pInt = pInt
         self.OD = OD
         self.ID = ID
         self.allowable_stress = allowable_stress
 
-        self.units = 'US'
+        self.units = units
 
-        self._inputs = ('pExt',
-                        'pInt',
-                        'OD',
-                        'ID',
-                        'allowable_stress')
-
-        # Call all of the calculation methods
-        self.calculate()
+        # Wall ratio OD/ID from the last sizing, used as a warm start
+        self._wall_ratio = None
 
     def __repr__(self):
         r = [f'{parameter}: {getattr(self, parameter)}' for parameter in self._inputs]
         return '\n'.join(r)
 
-    @staticmethod
-    def _principalstressINT(OD, ID, pInt, pExt):
-        """ Calculate the principal stresses on the internal surface."""
-        hoop = pInt*(OD**2+ID**2)/(OD**2-ID**2) - 2*pExt*(OD**2)/(OD**2-ID**2)
-        axial = pInt*(ID**2)/(OD**2-ID**2) - pExt*(OD**2)/(OD**2-ID**2)
-        radial = -pInt
-        return hoop, axial, radial
+    _principalstressINT = staticmethod(_principalstressINT)
+    _principalstressEXT = staticmethod(_principalstressEXT)
+    _vonmises = staticmethod(_vonmises)
+    _safetyfactor = staticmethod(_safetyfactor)
 
-    @staticmethod
-    def _principalstressEXT(OD, ID, pInt, pExt):
-        """ Calculate the principal stresses on the external surface."""
-        hoop = 2*pInt*(ID**2)/(OD**2-ID**2) - pExt*(OD**2+ID**2)/(OD**2-ID**2)
-        axial = pInt*(ID**2)/(OD**2-ID**2) - pExt*(OD**2)/(OD**2-ID**2)
-        radial = -pExt
-        return hoop, axial, radial
+    @property
+    def spec(self):
+        ''' The current design parameters, as a VesselSpec.'''
+        return VesselSpec(self.pExt, self.pInt, self.OD, self.ID,
+                          self.allowable_stress)
 
-    @staticmethod
-    def _vonmises(s1, s2, s3):
-        """ Calculate von Mises stress given 3 principal stresses."""
-        vm = math.sqrt(0.5 * ((s1 - s2)**2 + (s2 - s3)**2 + (s3 - s1)**2))
-        return vm
+    @property
+    def max_averagestress_external(self):
+        ''' The allowable average stress for external pressure.'''
+        return _max_averagestresses(self.allowable_stress)[0]
 
-    @staticmethod
-    def _safetyfactor(value, allowable):
-        """ Calculate the safety factor, compared to the allowable value."""
-        return allowable / value
+    @property
+    def max_averagestress_internal(self):
+        ''' The allowable average stress for internal pressure.'''
+        return _max_averagestresses(self.allowable_stress)[1]
 
-    def calculate(self):
-        ''' Update the stresses, safety factors, and pressure ratings.'''
-        # Set a flag if the net pressure is external
-        self.external = (self.pExt > self.pInt)
-        self.get_stresses()
-        self.get_safetyfactors()
-        self.get_maxpressures()
+    @property
+    def result(self):
+        ''' The stresses, safety factors, and pressure ratings of the current
+        design, as a VesselResult.'''
+        if self._result is None:
+            self.calculate()
+        return self._result
 
-    def get_stresses(self):
-        # Calculate the von Mises stress on the outer and inner surfaces
+    def _invalidate(self):
+        ''' Discard the calculated results, after a parameter is changed.'''
+        self._result = None
 
-        vmExt = self._vonmises(*self._principalstressEXT(self.OD,
-                                                         self.ID,
-                                                         self.pInt,
-                                                         self.pExt))
+    def calculate(self):
+        ''' Update the stresses, safety factors, and pressure ratings.
 
-        vmInt = self._vonmises(*self._principalstressINT(self.OD,
-                                                         self.ID,
-                                                         self.pInt,
-                                                         self.pExt))
-        maxstress = max(vmExt, vmInt)
-        averagestress = (vmExt + vmInt) / 2
+        This is not needed to get up-to-date results, which are calculated
+        automatically, but forces them to be calculated now.'''
+        if self.cache is None:
+            self._result = evaluate(self.spec)
+        else:
+            self._result = self.cache.evaluate(self.spec)
+        return self._result
 
-        # Store the relevant results for later
-        self.maxstress = maxstress
-        self.averagestress = averagestress
+    # The calculation stages of earlier versions, kept for existing callers.
+    # Each makes sure the results are calculated, and returns its values.
 
-    def get_safetyfactors(self):
-        '''Calculate the minimum safety factors for internal and external pressure
-        Compare average stress to adjusted allowable_ stress, where the adjustment
-        factor is 2/3 for internal pressure or 4/5 for external pressure'''
-        # if self.external:
-        #     self.k = 0.80
-        # else:
-        #     self.k = 0.666666
-            
-        maxstress = self.maxstress
-        averagestress = self.averagestress
-        allowable_stress = self.allowable_stress
+    def get_external(self):
+        ''' Return True if the net pressure is external.'''
+        return self.result.external
 
-        self.max_averagestress_external = self.allowable_stress * 0.80
-        self.max_averagestress_internal = self.allowable_stress * 0.666666
+    def get_stresses(self):
+        ''' Return the maximum and average von Mises stress.'''
+        return self.result.maxstress, self.result.averagestress
 
-        self.SF_external = min(self._safetyfactor(maxstress, allowable_stress),
-                               self._safetyfactor(averagestress, self.max_averagestress_external))
-        self.SF_internal = min(self._safetyfactor(maxstress, allowable_stress),
-                               self._safetyfactor(averagestress, self.max_averagestress_internal))
-        
-        if self.external:
-            self.SF = self.SF_external
-        else:
-            self.SF = self.SF_internal
+    def get_safetyfactors(self):
+        ''' Return the safety factors for external and internal pressure.'''
+        return self.result.SF_external, self.result.SF_internal
 
     def get_maxpressures(self):
-        '''Calculate the maximum pressures.
-
-        Multiply the differential pressure by the minimum safety factor (for
-        external and internal), and add the result external pressure (internal
-        case) and subtract from the internal pressure (external case).'''
-        differentialpressure = abs(self.pExt - self.pInt)
-        self.maxExternal = self.SF_external * differentialpressure
-        self.maxInternal = self.SF_internal * differentialpressure
+        ''' Return the external and internal pressure ratings.'''
+        return self.result.maxExternal, self.result.maxInternal
 
     def modify_parameters(self, *, pExt=None, pInt=None, OD=None, ID=None,
                           allowable_stress=None):
-        '''Change any of the parameters, and recalculate everything'''
+        '''Change any of the parameters. The results will be recalculated
+        when they are next accessed.'''
         # For each keyword argument, if a new value is passed, update the 
         # associated parameter
-        if pExt:
+        if pExt is not None:
             self.pExt = pExt
-        if pInt:
+        if pInt is not None:
             self.pInt = pInt
-        if OD:
+        if OD is not None:
             self.OD = OD
-        if ID:
+        if ID is not None:
             self.ID = ID
-        if allowable_stress:
+        if allowable_stress is not None:
             self.allowable_stress = allowable_stress
 
-        # Call all of the calculation methods
-        self.calculate()
-
     def change_units(self, system):
-        ''' Convert the vessel parameters to another unit system.'''
-        self.units = system
+        ''' Convert the vessel parameters to another unit system.
+
+        The vessel's state is replaced with a converted copy, rather than
+        modified in place, and the results are recalculated when they are
+        next accessed (the safety factors do not change).'''
+        if system not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {system}')
+        state = dict(self.__dict__)
+        for name in self._inputs:
+            unit_type = getattr(type(self), name).unit_type
+            state[name] = conversions.convert(state[name], unit_type,
+                                              self.units, system)
+        state['units'] = system
+        state['_result'] = None
+        self.__dict__ = state
 
     def _change_with_SF(self, **kwargs):
         ''' Change parameter(s) and return min safety factor. '''
@@ -174,81 +327,280 @@ class Vessel():
     def minimize_OD(self):
         ''' Return the smallest OD with safety factor >= 1, all else equal.
         
-        The vessel will be updated with this new value automatically.'''
-        # Starting value of safety factor
-        SF = self.SF
-        # if the current SF is greater than 1.0, use the current diameters as 
-        # brackets for bisection method
-        a = self.ID + 0.001
-        if SF > 1.0:
-            # Use current diameters as the starting range
-            b = self.OD
-        else:
-            # Use Barlow's method to adjust the thickness
-            # Estimate the upper bound on the wall thickness using Barlow's formula
-            diff_pressure = abs(self.pExt - self.pInt)
-            allowable_stress = self.allowable_stress
-            new_thickness = self._barlow_thickness(diff_pressure, 
-                                                   self.ID, 
-                                                   allowable_stress)
-            new_OD = self.ID + 2*new_thickness                                 
-            # Check if Barlow's method gives SF < 1
-            new_SF = self._change_with_SF(OD=new_OD)
-            if  new_SF > 1.0:
-                b = new_OD
-            else:
-                b = new_OD + 2*new_thickness/new_SF
-
-        # Bisection method: find the optimum point inside a bracketed range
-        while abs(b - a) >= 0.00001:
-            # Get SF for each value of OD and subtract 1.00
-            SF_a = self._change_with_SF(OD=a) - 1.0
-            SF_b = self._change_with_SF(OD=b) - 1.0
-            midpoint = (a+b)/2
-            SF_mid = self._change_with_SF(OD=midpoint) - 1.0
-            if SF_a * SF_mid < 0:
-                # Change range to these points
-                b = midpoint
-            else:
-                a = midpoint 
+        The vessel will be updated with this new value automatically. The
+        return value is a sizing.SizingResult, which also reports the number
+        of solver iterations and safety factor evaluations.'''
+        from .sizing import size_OD
+        result = size_OD(self.pExt, self.pInt, self.ID, self.allowable_stress,
+                         wall_ratio=self._wall_ratio, cache=self.cache)
+        if self.ID > 0:
+            self._wall_ratio = result.value / self.ID
+        self.modify_parameters(OD=result.value)
+        return result
 
     def minimize_ID(self):
         ''' Return the largest ID with safety factor >=1, all else equal.
 
-        The vessel will be updated with this new value automatically.'''
-        # Starting value of safety factor
-        SF = self.SF
-        # if the current SF is greater than 1.0, use the current diameters as 
-        # brackets for bisection method
-        a = self.OD - 0.001
-        if SF > 1.0:
-            # Use current diameters as the starting range
-            b = self.ID
-        else:
-            # Use Barlow's method to adjust the thickness
-            # Estimate the upper bound on the wall thickness using Barlow's formula
-            diff_pressure = abs(self.pExt - self.pInt)
-            allowable_stress = self.allowable_stress
-            new_thickness = self._barlow_thickness(diff_pressure, 
-                                                   self.OD, 
-                                                   allowable_stress)
-            new_ID = max(0, self.OD - 2*new_thickness)                                 
-            # Check if Barlow's method gives SF < 1
-            new_SF = self._change_with_SF(ID=new_ID)
-            if  new_SF > 1.0:
-                b = new_ID
-            else:
-                b = new_ID + 2*new_thickness/new_SF
-
-        # Bisection method: find the optimum point inside a bracketed range
-        while abs(b - a) >= 0.0001:
-            # Get SF for each value of OD and subtract 1.00
-            SF_a = self._change_with_SF(ID=a) - 1.0
-            SF_b = self._change_with_SF(ID=b) - 1.0
-            midpoint = (a+b)/2
-            SF_mid = self._change_with_SF(ID=midpoint) - 1.0
-            if SF_a * SF_mid < 0:
-                # Change range to these points
-                b = midpoint
-            else:
-                a = midpoint 
+        The vessel will be updated with this new value automatically. The
+        return value is a sizing.SizingResult, which also reports the number
+        of solver iterations and safety factor evaluations.'''
+        from .sizing import size_ID
+        result = size_ID(self.pExt, self.pInt, self.OD, self.allowable_stress,
+                         wall_ratio=self._wall_ratio, cache=self.cache)
+        if result.value > 0:
+            self._wall_ratio = self.OD / result.value
+        self.modify_parameters(ID=result.value)
+        return result
+
+    def sensitivity(self):
+        ''' Return the stresses and safety factor, with their analytic
+        derivatives with respect to each parameter, as a
+        sensitivity.Sensitivity.'''
+        from .sensitivity import sensitivity
+        return sensitivity(self.spec)
+
+    def stress_profile(self, stations=11):
+        ''' Return the stresses at radial stations through the wall, as a
+        profiles.Profile (requires numpy).'''
+        from .profiles import stress_profile
+        return stress_profile(self.pExt, self.pInt, self.OD, self.ID,
+                              stations)
+
+    def linearize(self, **kwargs):
+        ''' Return the membrane and bending stresses through the wall, as a
+        profiles.Linearization (requires numpy).'''
+        from .profiles import linearize
+        return linearize(self.pExt, self.pInt, self.OD, self.ID, **kwargs)
+
+    def minimize_wall(self, **kwargs):
+        ''' Set the OD and ID with the smallest wall area and safety factor
+        >= 1, within optional bounds.
+
+        The keyword arguments are passed to sizing.minimize_wall, such as
+        OD_bounds, ID_bounds and min_wall, and the return value is a
+        sizing.WallResult.'''
+        from .sizing import minimize_wall
+        kwargs.setdefault('cache', self.cache)
+        result = minimize_wall(self.pExt, self.pInt, self.allowable_stress,
+                               **kwargs)
+        self._wall_ratio = result.OD / result.ID
+        self.modify_parameters(OD=result.OD, ID=result.ID)
+        return result
+
+# Precisions for VesselBatch, and the default band around SF = 1 which is
+# recalculated in float64 by the 'auto' precision
+PRECISIONS = ('float64', 'float32', 'auto')
+SCREEN_BAND = 0.05
+
+
+class VesselBatch():
+    '''Many cylindrical vessels, evaluated together as columns of values.
+
+    Each input may be a sequence, a numpy array or an array.array, and
+    scalars are broadcast against the other columns. The calculated
+    properties have the same names as the ones on Vessel, but are numpy
+    arrays with one value per design. The stress formulas are shared with
+    Vessel, so the results match the scalar class exactly.
+    '''
+    _inputs = ('pExt',
+               'pInt',
+               'OD',
+               'ID',
+               'allowable_stress')
+
+    # The unit type of each parameter and result which has units
+    _unit_types = {'pExt': 'pressure',
+                   'pInt': 'pressure',
+                   'OD': 'length',
+                   'ID': 'length',
+                   'allowable_stress': 'pressure',
+                   'maxstress': 'pressure',
+                   'averagestress': 'pressure',
+                   'max_averagestress_external': 'pressure',
+                   'max_averagestress_internal': 'pressure',
+                   'maxExternal': 'pressure',
+                   'maxInternal': 'pressure'}
+
+    # The calculated columns
+    _results = ('external',
+                'maxstress',
+                'averagestress',
+                'max_averagestress_external',
+                'max_averagestress_internal',
+                'SF_external',
+                'SF_internal',
+                'SF',
+                'maxExternal',
+                'maxInternal')
+
+    def __init__(self, pExt, pInt, OD, ID, allowable_stress, *, units='US',
+                 precision='float64', band=SCREEN_BAND):
+        ''' Set the design parameter columns, and calculate the stresses,
+        safety factors, and pressure ratings
+
+        precision is 'float64', 'float32' (half of the memory, for screening
+        designs), or 'auto': screen every design in float32, and recalculate
+        the designs with a safety factor within band of 1 in float64. In
+        'auto', the results are float32, and confirmed flags the designs
+        which were recalculated.'''
+        _require_numpy()
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        if precision not in PRECISIONS:
+            raise ValueError(f'unknown precision: {precision}')
+        dtype = np.float32 if precision == 'float32' else np.float64
+        columns = np.broadcast_arrays(*(np.asarray(value, dtype=dtype)
+                                        for value in (pExt, pInt, OD, ID,
+                                                      allowable_stress)))
+        (self.pExt,
+         self.pInt,
+         self.OD,
+         self.ID,
+         self.allowable_stress) = columns
+
+        self.units = units
+        self.precision = precision
+        self.band = band
+
+        # Call all of the calculation methods
+        self.calculate()
+
+    def __len__(self):
+        return self.pExt.size
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} designs)'
+
+    @staticmethod
+    def _vonmises(s1, s2, s3):
+        """ Calculate von Mises stress given 3 columns of principal stresses."""
+        d12, d23, d31 = s1 - s2, s2 - s3, s3 - s1
+        return np.sqrt(0.5 * (d12*d12 + d23*d23 + d31*d31))
+
+    def calculate(self):
+        ''' Update the stresses, safety factors, and pressure ratings.'''
+        if self.precision == 'auto':
+            self._screen()
+            return
+        # Flag the designs where the net pressure is external
+        self.external = (self.pExt > self.pInt)
+        self.get_stresses()
+        self.get_safetyfactors()
+        self.get_maxpressures()
+
+    def _screen(self):
+        ''' Calculate every design in float32, and then recalculate the
+        designs near SF = 1 (or without a finite SF) in float64. The results
+        are kept in float32, but the SF >= 1 decisions are the float64
+        ones.'''
+        inputs = [getattr(self, name) for name in self._inputs]
+        # Pressures which differ by less than the float32 precision may
+        # round to equal values, and those designs are recalculated anyway
+        with np.errstate(divide='ignore', invalid='ignore'):
+            screen = VesselBatch(*inputs, units=self.units,
+                                 precision='float32')
+            # Rounding the inputs to float32 changes the safety factor by up
+            # to about eps * (OD/(OD - ID) + p/|pInt - pExt|) relative, so
+            # the band is widened by twice that, for thin walls and nearly
+            # equal pressures
+            error = np.asarray(screen.OD - screen.ID)
+            np.divide(screen.OD, error, out=error)
+            pressure = np.asarray(np.maximum(np.abs(screen.pInt),
+                                             np.abs(screen.pExt)))
+            pressure /= np.abs(screen.pInt - screen.pExt)
+            error += pressure
+            error *= 2 * np.finfo(np.float32).eps
+            SF = screen.SF
+            error *= SF
+            error += self.band
+            confirmed = np.abs(SF - 1) <= error
+            confirmed |= ~np.isfinite(SF)
+        self.confirmed = confirmed
+        for name in self._results:
+            setattr(self, name, np.asarray(getattr(screen, name)))
+        rows = np.flatnonzero(confirmed)
+        if rows.size:
+            check = VesselBatch(*(column.reshape(-1)[rows]
+                                  for column in inputs),
+                                units=self.units)
+            for name in self._results:
+                getattr(self, name).reshape(-1)[rows] = getattr(check, name)
+            # A float64 SF just below 1 may round up to 1 in float32
+            below = np.nextafter(np.float32(1), np.float32(0))
+            SF = self.SF.reshape(-1)
+            SF[rows] = np.where(check.SF < 1, np.minimum(SF[rows], below),
+                                SF[rows])
+
+    def get_stresses(self):
+        if self.pExt.dtype == np.float32:
+            self._get_stresses_float32()
+            return
+        # Calculate the von Mises stress on the outer and inner surfaces.
+        # These are the same formulas as Vessel._principalstressINT and
+        # Vessel._principalstressEXT, evaluated in the same order so the
+        # results are identical, but the squared diameters are computed once
+        pInt, pExt = self.pInt, self.pExt
+        OD2 = self.OD*self.OD
+        ID2 = self.ID*self.ID
+        area = OD2 - ID2
+        axial = pInt*ID2/area - pExt*OD2/area
+
+        vmExt = self._vonmises(2*pInt*ID2/area - pExt*(OD2 + ID2)/area,
+                               axial,
+                               -pExt)
+        vmInt = self._vonmises(pInt*(OD2 + ID2)/area - 2*pExt*OD2/area,
+                               axial,
+                               -pInt)
+        self.maxstress = np.maximum(vmExt, vmInt)
+        self.averagestress = (vmExt + vmInt) / 2
+
+    def _get_stresses_float32(self):
+        # The formulas above lose most of the float32 precision to
+        # cancellation for thin walls (OD**2 - ID**2) and nearly equal
+        # pressures. Rearranged, the von Mises stresses are sqrt(3)*(1 + u)*dp
+        # inside and sqrt(3)*u*dp outside, with u = ID**2/(OD**2 - ID**2) and
+        # dp = |pInt - pExt|, which only round the two differences.
+        dp = np.abs(self.pInt - self.pExt)
+        u = self.ID**2 / ((self.OD - self.ID) * (self.OD + self.ID))
+        vmInt = _SQRT3_FLOAT32 * (1 + u) * dp
+        vmExt = _SQRT3_FLOAT32 * u * dp
+        self.maxstress = np.maximum(vmExt, vmInt)
+        self.averagestress = (vmExt + vmInt) / 2
+
+    def get_safetyfactors(self):
+        '''Calculate the minimum safety factors for internal and external
+        pressure, with the same allowable stress adjustments as Vessel.'''
+        SF_max = Vessel._safetyfactor(self.maxstress, self.allowable_stress)
+
+        self.max_averagestress_external = self.allowable_stress * 0.80
+        self.max_averagestress_internal = self.allowable_stress * 0.666666
+
+        self.SF_external = np.minimum(
+            SF_max,
+            Vessel._safetyfactor(self.averagestress,
+                                 self.max_averagestress_external))
+        self.SF_internal = np.minimum(
+            SF_max,
+            Vessel._safetyfactor(self.averagestress,
+                                 self.max_averagestress_internal))
+
+        self.SF = np.where(self.external, self.SF_external, self.SF_internal)
+
+    def get_maxpressures(self):
+        '''Calculate the maximum pressures for each design.'''
+        differentialpressure = np.abs(self.pExt - self.pInt)
+        self.maxExternal = self.SF_external * differentialpressure
+        self.maxInternal = self.SF_internal * differentialpressure
+
+    def change_units(self, system):
+        ''' Convert the parameters and results to another unit system.
+
+        Each column is converted with one vectorized multiplication, and
+        nothing is recalculated.'''
+        if system not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {system}')
+        for name, unit_type in self._unit_types.items():
+            setattr(self, name, conversions.convert(getattr(self, name),
+                                                    unit_type, self.units,
+                                                    system))
+        self.units = system
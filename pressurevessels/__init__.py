@@ -1,2 +1,6 @@
+__version__ = '0.1'
+
 # make the module importable
-from .PressureVessels import Vessel
\ No newline at end of file
+from .PressureVessels import (Vessel, VesselBatch, VesselSpec, VesselResult,
+                              evaluate)
+from .cache import EvaluationCache
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Assemblies of cylindrical segments under the same pressures, such as a
+housing made of sections with different diameters or materials.
+
+As for the tube catalog, the safety factors of a segment depend only on its
+wall ratio, its allowable stress, and the pressure difference, and they are
+inversely proportional to |pInt - pExt|. So each segment has a fixed
+capacity for external and internal pressure (its safety factor at a unit
+pressure difference, which is also its pressure rating). Changing the
+pressures only rescales the safety factors, and never changes which segment
+governs, so nothing is recalculated. Changing a segment recalculates only
+that segment, and the governing segment for each direction is kept at the top
+of a heap keyed on capacity, with outdated entries discarded lazily.
+"""
+import heapq
+import math
+from collections import namedtuple
+from .PressureVessels import Vessel, VesselBatch, VesselSpec, evaluate, np
+from . import conversions, sizing
+
+Segment = namedtuple('Segment', ('OD', 'ID', 'allowable_stress', 'name'),
+                     defaults=('',))
+Segment.__doc__ = ''' The diameters and allowable stress of one segment of an
+assembly, with an optional name.'''
+
+
+class VesselAssembly():
+    ''' Cylindrical segments under the same internal and external pressure.
+
+    segments are Segment tuples, or sequences of (OD, ID, allowable_stress)
+    and an optional name. The segments are numbered in order, and units is
+    the unit system of the pressures and segments. If an EvaluationCache is
+    given, it is used for the calculations.
+    '''
+
+    def __init__(self, pExt, pInt, segments, *, units='US', cache=None):
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        self.units = units
+        self.cache = cache
+        self.pExt = pExt
+        self.pInt = pInt
+        self.segments = [_segment(segment) for segment in segments]
+        if not self.segments:
+            raise ValueError('an assembly needs at least one segment')
+        # The number of segment evaluations, which shows what was recalculated
+        self.evaluations = 0
+        self._rebuild()
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __getitem__(self, index):
+        return self.segments[index]
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {len(self)} segments, {self.units}>'
+
+    def _capacities(self, segment):
+        ''' Evaluate a segment at a unit pressure difference, and return its
+        external and internal capacities.'''
+        spec = VesselSpec(0.0, 1.0, *segment[:3])
+        result = evaluate(spec) if self.cache is None else \
+            self.cache.evaluate(spec)
+        self.evaluations += 1
+        return result.SF_external, result.SF_internal
+
+    def _rebuild(self):
+        ''' Recalculate every segment, and rebuild the heaps.'''
+        if np is not None and self.cache is None:
+            columns = list(zip(*(segment[:3] for segment in self.segments)))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                batch = VesselBatch(0.0, 1.0, *columns)
+            self.evaluations += len(self.segments)
+            capacities = list(zip(batch.SF_external.tolist(),
+                                  batch.SF_internal.tolist()))
+        else:
+            capacities = [self._capacities(segment)
+                          for segment in self.segments]
+        self._external, self._internal = (list(column)
+                                          for column in zip(*capacities))
+        # Each heap entry is (capacity, index, version), and an entry is out
+        # of date if its version is not the segment's current version
+        self._versions = [0] * len(self.segments)
+        self._result = None
+        self._heaps = {}
+        for name, column in (('external', self._external),
+                             ('internal', self._internal)):
+            heap = [(capacity, index, 0)
+                    for index, capacity in enumerate(column)]
+            heapq.heapify(heap)
+            self._heaps[name] = heap
+
+    def _top(self, name):
+        ''' Return the index of the segment with the lowest capacity.'''
+        heap = self._heaps[name]
+        while True:
+            capacity, index, version = heap[0]
+            if version == self._versions[index]:
+                return index
+            heapq.heappop(heap)
+
+    def _update(self, index):
+        ''' Recalculate one segment, and push its new capacities.'''
+        external, internal = self._capacities(self.segments[index])
+        self._external[index] = external
+        self._internal[index] = internal
+        self._versions[index] += 1
+        version = self._versions[index]
+        heapq.heappush(self._heaps['external'], (external, index, version))
+        heapq.heappush(self._heaps['internal'], (internal, index, version))
+        # Compact the heaps if most of their entries are out of date
+        if len(self._heaps['external']) > 4 * len(self.segments):
+            for name, column in (('external', self._external),
+                                 ('internal', self._internal)):
+                heap = [(column[i], i, self._versions[i])
+                        for i in range(len(self.segments))]
+                heapq.heapify(heap)
+                self._heaps[name] = heap
+
+    def modify_pressures(self, *, pExt=None, pInt=None):
+        ''' Change the pressures. No segment is recalculated.'''
+        if pExt is not None:
+            self.pExt = pExt
+        if pInt is not None:
+            self.pInt = pInt
+
+    def modify_segment(self, index, *, OD=None, ID=None,
+                       allowable_stress=None):
+        ''' Change any of the parameters of one segment, and recalculate it.'''
+        segment = self.segments[index]
+        changes = {name: value for name, value in (
+            ('OD', OD), ('ID', ID), ('allowable_stress', allowable_stress))
+            if value is not None}
+        self.segments[index] = _segment(segment._replace(**changes))
+        self._update(index)
+
+    def append(self, segment):
+        ''' Add a segment to the end of the assembly.'''
+        self.segments.append(_segment(segment))
+        self._external.append(math.nan)
+        self._internal.append(math.nan)
+        self._versions.append(-1)
+        self._update(len(self.segments) - 1)
+
+    @property
+    def external(self):
+        ''' True if the net pressure is external.'''
+        return self.pExt > self.pInt
+
+    @property
+    def governing(self):
+        ''' The index of the segment with the lowest safety factor.'''
+        return self._top('external' if self.external else 'internal')
+
+    @property
+    def maxExternal(self):
+        ''' The external pressure rating of the assembly: the lowest of the
+        segments' ratings.'''
+        return self._external[self._top('external')]
+
+    @property
+    def maxInternal(self):
+        ''' The internal pressure rating of the assembly: the lowest of the
+        segments' ratings.'''
+        return self._internal[self._top('internal')]
+
+    @property
+    def SF_external(self):
+        return self.maxExternal / abs(self.pExt - self.pInt)
+
+    @property
+    def SF_internal(self):
+        return self.maxInternal / abs(self.pExt - self.pInt)
+
+    @property
+    def SF(self):
+        ''' The minimum safety factor of the segments, for the actual
+        pressures.'''
+        return self.SF_external if self.external else self.SF_internal
+
+    def spec(self, index):
+        ''' The design parameters of one segment, as a VesselSpec.'''
+        return VesselSpec(self.pExt, self.pInt, *self.segments[index][:3])
+
+    def result(self, index=None):
+        ''' Return the VesselResult of one segment (by default the governing
+        segment) at the actual pressures.'''
+        if index is None:
+            index = self.governing
+        # The last result is kept until its segment or the pressures change
+        key = (index, self._versions[index], self.pExt, self.pInt)
+        if self._result is None or self._result[0] != key:
+            spec = self.spec(index)
+            result = evaluate(spec) if self.cache is None else \
+                self.cache.evaluate(spec)
+            self._result = (key, result)
+        return self._result[1]
+
+    def vessel(self, index):
+        ''' Return a Vessel for one segment at the actual pressures.'''
+        return Vessel(*self.spec(index), units=self.units, cache=self.cache)
+
+    def size(self, diameter='OD', *, target_SF=1.0):
+        ''' Size one diameter of every segment to reach target_SF, keeping the
+        other diameter, and recalculate the assembly.
+
+        The segments are sized together with numpy, or one at a time without
+        it. Return a sizing.BatchSizingResult (of lists without numpy). The
+        segments which cannot reach target_SF are not changed.'''
+        if diameter not in ('OD', 'ID'):
+            raise ValueError(f'diameter must be OD or ID, not {diameter}')
+        fixed = 'ID' if diameter == 'OD' else 'OD'
+        values = [getattr(segment, fixed) for segment in self.segments]
+        allowables = [segment.allowable_stress for segment in self.segments]
+        if np is not None:
+            function = (sizing.size_OD_batch if diameter == 'OD'
+                        else sizing.size_ID_batch)
+            result = function(self.pExt, self.pInt, values, allowables,
+                              target_SF=target_SF)
+            sized = result.value.tolist()
+            converged = result.converged.tolist()
+        else:
+            function = sizing.size_OD if diameter == 'OD' else sizing.size_ID
+            sized, SFs, converged, iterations = [], [], [], 0
+            for value, allowable_stress in zip(values, allowables):
+                try:
+                    one = function(self.pExt, self.pInt, value,
+                                   allowable_stress, target_SF=target_SF,
+                                   cache=self.cache)
+                except (ValueError, ZeroDivisionError):
+                    one = sizing.SizingResult(math.nan, math.nan, 0, 0)
+                sized.append(one.value)
+                SFs.append(one.SF)
+                converged.append(not math.isnan(one.value))
+                iterations = max(iterations, one.iterations)
+            result = sizing.BatchSizingResult(sized, SFs, converged,
+                                              iterations)
+        for index, (value, ok) in enumerate(zip(sized, converged)):
+            if ok:
+                self.segments[index] = self.segments[index]._replace(
+                    **{diameter: value})
+        self._rebuild()
+        return result
+
+
+def _segment(segment):
+    segment = Segment(*segment)
+    if not 0 <= segment.ID < segment.OD:
+        raise ValueError(f'invalid diameters: OD={segment.OD}, '
+                         f'ID={segment.ID}')
+    return segment
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Streaming evaluation of designs read from CSV or JSON lines.
+
+Designs are read, evaluated and written one chunk at a time, so the memory
+used does not depend on the size of the input. Each chunk is evaluated with
+VesselBatch when numpy is installed, or one design at a time otherwise.
+"""
+import csv
+import itertools
+import json
+import math
+from .PressureVessels import (VesselSpec, VesselBatch, VesselResult, evaluate,
+                              np)
+from . import conversions, sizing
+
+FORMATS = ('csv', 'jsonl')
+# Output formats, including a columnar result store (see the store module)
+OUTPUT_FORMATS = FORMATS + ('columns',)
+
+RESULT_FIELDS = ('external',
+                 'maxstress',
+                 'averagestress',
+                 'SF_external',
+                 'SF_internal',
+                 'SF',
+                 'maxExternal',
+                 'maxInternal')
+
+
+def guess_format(filename, default='csv'):
+    ''' Return the format of a file, from its extension.'''
+    if filename.endswith(('.jsonl', '.json', '.ndjson')):
+        return 'jsonl'
+    if filename.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_chunks(stream, fmt, chunksize):
+    ''' Read designs from a text stream, and yield lists of up to chunksize
+    designs. Each design is a dictionary of its fields.'''
+    if fmt == 'csv':
+        rows = csv.DictReader(stream)
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+    while True:
+        chunk = list(itertools.islice(rows, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _column(rows, name):
+    try:
+        return [float(row[name]) for row in rows]
+    except KeyError:
+        raise ValueError(f'missing field: {name}') from None
+
+
+UNIT_TYPES = {'pExt': 'pressure',
+              'pInt': 'pressure',
+              'OD': 'length',
+              'ID': 'length',
+              'allowable_stress': 'pressure'}
+
+
+def evaluate_rows(rows, *, size=None, target_SF=1.0, units='US',
+                  output_units=None, materials=None, database=None):
+    ''' Evaluate a list of designs, and add the results to each one.
+
+    If size is 'OD' or 'ID', that diameter is sized first to give the target
+    safety factor, and a 'converged' field is added to each design. The
+    designs are in the given unit system, and if output_units is another
+    system, each column is converted to it before evaluating, so the designs
+    and results are written in the output units. With a
+    materials.MaterialDatabase, designs may give a material and temperature
+    instead of the allowable stress. With a resultdb.ResultDatabase, the
+    sizing results are looked up in it, and the new ones are stored.'''
+    if materials is not None:
+        _derate(rows, materials, units)
+    names = [name for name in VesselSpec._fields if name != size]
+    columns = {name: _column(rows, name) for name in names}
+    if output_units is not None and output_units != units:
+        if np is not None:
+            columns = {name: np.array(column) for name, column in columns.items()}
+        columns = {name: conversions.convert(column, UNIT_TYPES[name], units,
+                                             output_units)
+                   for name, column in columns.items()}
+        if np is not None:
+            columns = {name: column.tolist() for name, column in columns.items()}
+    for name in names:
+        for row, value in zip(rows, columns[name]):
+            row[name] = value
+
+    if size is not None:
+        fixed = 'ID' if size == 'OD' else 'OD'
+        values, converged = _size_columns(size, columns['pExt'],
+                                          columns['pInt'], columns[fixed],
+                                          columns['allowable_stress'],
+                                          target_SF, database)
+        columns[size] = values
+        for row, value, ok in zip(rows, values, converged):
+            row[size] = value
+            row['converged'] = ok
+
+    specs = [columns[name] for name in VesselSpec._fields]
+    if np is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            batch = VesselBatch(*specs)
+        # As _evaluate_or_nan, the designs which divide by zero (no wall, or
+        # no stress from no net pressure) have nan results
+        OD, ID = batch.OD, batch.ID
+        nothing = (OD*OD == ID*ID) | (batch.maxstress == 0)
+        results = zip(*(getattr(batch, field).tolist() if field == 'external'
+                        else np.where(nothing, np.nan,
+                                      getattr(batch, field)).tolist()
+                        for field in RESULT_FIELDS))
+    else:
+        results = ((getattr(result, field) for field in RESULT_FIELDS)
+                   for result in map(_evaluate_or_nan, zip(*specs)))
+
+    for row, values in zip(rows, results):
+        row.update(zip(RESULT_FIELDS, values))
+    return rows
+
+
+def _derate(rows, materials, units):
+    ''' Set the allowable stress of the designs which give a material and
+    temperature instead, from the database (nan above its temperatures).'''
+    rows = [row for row in rows if row.get('allowable_stress') in (None, '')]
+    if not rows:
+        return
+    try:
+        names = [row['material'] for row in rows]
+    except KeyError:
+        raise ValueError('missing field: allowable_stress') from None
+    temperatures = _column(rows, 'temperature')
+    if np is not None:
+        allowables = materials.allowable_batch(names, temperatures)
+    else:
+        allowables = []
+        for name, temperature in zip(names, temperatures):
+            # Check the name first, so an unknown material is still an error
+            materials.code(name)
+            try:
+                allowables.append(materials.allowable(name, temperature))
+            except ValueError:
+                allowables.append(math.nan)
+    allowables = conversions.convert(allowables, 'pressure', materials.units,
+                                     units)
+    for row, value in zip(rows, list(allowables)):
+        row['allowable_stress'] = float(value)
+
+
+def _evaluate_or_nan(spec):
+    try:
+        return evaluate(spec)
+    except ZeroDivisionError:
+        # Designs with no net pressure (or no wall) have no safety factor,
+        # and evaluating them again would divide by zero again
+        return VesselResult(spec[0] > spec[1], *[math.nan] * 6)
+
+
+def _size_columns(size, pExt, pInt, diameter, allowable_stress, target_SF,
+                  database=None):
+    ''' Size one diameter for columns of designs, returning the sized values
+    and whether each one converged.'''
+    if np is not None:
+        if database is not None:
+            result = database.size_batch(size, pExt, pInt, diameter,
+                                         allowable_stress, target_SF=target_SF)
+        else:
+            batch_function = (sizing.size_OD_batch if size == 'OD'
+                              else sizing.size_ID_batch)
+            result = batch_function(pExt, pInt, diameter, allowable_stress,
+                                    target_SF=target_SF)
+        return result.value.tolist(), result.converged.tolist()
+
+    scalar_function = sizing.size_OD if size == 'OD' else sizing.size_ID
+    values, converged = [], []
+    for row in zip(pExt, pInt, diameter, allowable_stress):
+        try:
+            values.append(scalar_function(*row, target_SF=target_SF,
+                                          cache=database).value)
+            converged.append(True)
+        except (ValueError, ZeroDivisionError):
+            values.append(math.nan)
+            converged.append(False)
+    return values, converged
+
+
+def _json_values(value):
+    ''' Return value with nan and infinite numbers replaced by None, since
+    JSON has no such numbers.'''
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_values(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_values(item) for item in value]
+    return value
+
+
+class _Writer():
+    ''' Write chunks of designs to a text stream, as CSV or JSON lines, or
+    to a store.ResultWriter for the columns format.'''
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+
+    def write(self, rows):
+        if self.fmt == 'columns':
+            self.stream.append({name: [row[name] for row in rows]
+                                for name in self.stream.fields})
+            return
+        if self.fmt == 'jsonl':
+            for row in rows:
+                self.stream.write(json.dumps(_json_values(row)) + '\n')
+            return
+        if self._csv is None:
+            # The fields of the first design are used for the header
+            self._csv = csv.DictWriter(self.stream, fieldnames=list(rows[0]),
+                                       extrasaction='ignore',
+                                       lineterminator='\n')
+            self._csv.writeheader()
+        self._csv.writerows(rows)
+
+
+def run_batch(instream, outstream, *, input_format='csv', output_format=None,
+              chunksize=10000, size=None, target_SF=1.0, units='US',
+              output_units=None, materials=None, database=None):
+    ''' Evaluate every design from instream, and write them with their
+    results to outstream (a text stream, or a store.ResultWriter for the
+    columns output format). Return the number of designs evaluated.'''
+    writer = _Writer(outstream, output_format or input_format)
+    count = 0
+    for chunk in read_chunks(instream, input_format, chunksize):
+        writer.write(evaluate_rows(chunk, size=size, target_SF=target_SF,
+                                   units=units, output_units=output_units,
+                                   materials=materials, database=database))
+        count += len(chunk)
+    return count
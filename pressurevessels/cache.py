@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+A memoizing cache for design evaluations, which can be shared between
+Vessel instances, the sizing routines and the GUI.
+"""
+import math
+import threading
+from collections import OrderedDict, namedtuple
+from .PressureVessels import VesselSpec, evaluate
+
+CacheInfo = namedtuple('CacheInfo',
+                       ('hits', 'misses', 'evictions', 'maxsize', 'currsize'))
+
+
+class EvaluationCache():
+    ''' A bounded cache of VesselResults, keyed on the five design parameters.
+
+    When the cache holds maxsize results, the least recently used one is
+    evicted to make room for a new one. If a tolerance is given, designs
+    whose parameters differ by less than about that fraction of their value
+    share the result of whichever was evaluated first. tolerance is one
+    relative tolerance for every parameter, or a mapping of parameter names
+    to relative tolerances (the other parameters must match exactly).
+
+    The sizing functions do not evaluate their trial designs with a cache
+    which has a tolerance, since a shared result could make them accept a
+    design whose own safety factor is below the target.
+    '''
+
+    def __init__(self, maxsize=1024, tolerance=None):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self._steps = _steps(tolerance)
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def __repr__(self):
+        return (f'{type(self).__name__}(maxsize={self.maxsize}, '
+                f'tolerance={self.tolerance})')
+
+    def _key(self, spec):
+        if self._steps is None:
+            return tuple(spec)
+        return tuple(_bucket(value, step)
+                     for value, step in zip(spec, self._steps))
+
+    def evaluate(self, spec):
+        ''' Return the VesselResult for a design, evaluating it if needed.
+
+        spec is a VesselSpec, or any sequence of the five parameters.'''
+        key = self._key(spec)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self.hits += 1
+                self._results.move_to_end(key)
+                return result
+            self.misses += 1
+
+        result = evaluate(spec)
+
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def safety_factor(self, pExt, pInt, OD, ID, allowable_stress):
+        ''' Return the safety factor of a design, using the cache.'''
+        return self.evaluate(VesselSpec(pExt, pInt, OD, ID,
+                                        allowable_stress)).SF
+
+    @property
+    def hit_rate(self):
+        ''' The fraction of evaluations that were found in the cache.'''
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def info(self):
+        ''' Return the cache statistics, as a CacheInfo.'''
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions,
+                             self.maxsize, len(self._results))
+
+    def clear(self):
+        ''' Remove all of the results and reset the statistics.'''
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def _steps(tolerance):
+    ''' Return the step in log(value) of the key buckets for each parameter
+    (None to match exactly), or None if every parameter matches exactly.'''
+    if tolerance is None:
+        return None
+    if not isinstance(tolerance, dict):
+        tolerance = dict.fromkeys(VesselSpec._fields, tolerance)
+    unknown = set(tolerance) - set(VesselSpec._fields)
+    if unknown:
+        raise ValueError(f'unknown parameters: {", ".join(sorted(unknown))}')
+    steps = []
+    for name in VesselSpec._fields:
+        value = tolerance.get(name)
+        if value is not None and not 0 <= value < 1:
+            raise ValueError(f'the tolerance of {name} must be a fraction')
+        steps.append(math.log1p(value) if value else None)
+    return steps
+
+
+def _bucket(value, step):
+    ''' Return the key of a value, rounded to a relative step.'''
+    if step is None or value == 0 or not math.isfinite(value):
+        return value
+    return (value > 0, round(math.log(abs(value)) / step))
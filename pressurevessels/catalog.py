@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+A catalog of standard tube sizes, indexed for "lightest passing size" queries.
+
+The von Mises stresses of a thick-walled cylinder depend only on the wall
+ratio OD/ID and the pressure difference |pInt - pExt|. So each size in the
+catalog can hold a fixed differential pressure, its capacity, for internal and
+external pressure. The index sorts the sizes by capacity, and keeps the
+lightest size among those with at least each capacity, so a query is one
+binary search instead of a scan of the catalog.
+"""
+import bisect
+import csv
+import math
+from collections import namedtuple
+from .PressureVessels import VesselSpec, evaluate, np, _require_numpy
+from . import conversions
+
+
+class CatalogEntry(namedtuple('CatalogEntry', ('size', 'OD', 'ID',
+                                               'allowable_stress', 'density'))):
+    ''' One tube size: its nominal size, diameters, the allowable stress of
+    its material, and the density used for its mass.'''
+    __slots__ = ()
+
+    @property
+    def wall(self):
+        return (self.OD - self.ID) / 2
+
+    @property
+    def wall_ratio(self):
+        return self.OD / self.ID
+
+    @property
+    def mass(self):
+        ''' The mass per unit length (the wall area if density is 1).'''
+        return self.density * math.pi / 4 * (self.OD**2 - self.ID**2)
+
+
+class _CapacityIndex():
+    ''' The catalog sorted by capacity, with the lightest entry among those
+    at or above each position.'''
+
+    def __init__(self, capacities, masses):
+        order = sorted(range(len(capacities)), key=capacities.__getitem__)
+        self.capacities = [capacities[i] for i in order]
+        self.lightest = [0] * len(order)
+        best = None
+        for position in reversed(range(len(order))):
+            index = order[position]
+            if best is None or masses[index] < masses[best]:
+                best = index
+            self.lightest[position] = best
+
+    def find(self, required):
+        position = bisect.bisect_left(self.capacities, required)
+        if position == len(self.capacities):
+            return None
+        return self.lightest[position]
+
+
+class TubeCatalog():
+    ''' A catalog of tube sizes, for finding the lightest size which meets a
+    target safety factor.
+
+    entries are CatalogEntry tuples, or mappings with the fields size, OD,
+    allowable_stress, either ID or wall, and optionally density (default 1,
+    so the mass is the wall area per unit length). units is the unit system
+    of the catalog, and of the pressures in queries.
+    '''
+
+    def __init__(self, entries, *, units='US'):
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        self.units = units
+        self.entries = tuple(_entry(entry) for entry in entries)
+        external, internal = [], []
+        for entry in self.entries:
+            # Evaluate at a unit pressure difference: the safety factors are
+            # then the differential pressures at SF = 1
+            result = evaluate(VesselSpec(0.0, 1.0, entry.OD, entry.ID,
+                                         entry.allowable_stress))
+            external.append(result.SF_external)
+            internal.append(result.SF_internal)
+        masses = [entry.mass for entry in self.entries]
+        self._external = _CapacityIndex(external, masses)
+        self._internal = _CapacityIndex(internal, masses)
+        # Column arrays for bulk queries
+        self._columns = None
+
+    @classmethod
+    def from_csv(cls, stream, *, units='US'):
+        ''' Read a catalog from a CSV text stream, or a file name.'''
+        if isinstance(stream, str):
+            with open(stream, newline='') as file:
+                return cls.from_csv(file, units=units)
+        return cls(csv.DictReader(stream), units=units)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {len(self)} sizes, {self.units}>'
+
+    def _index(self, pExt, pInt):
+        return self._external if pExt > pInt else self._internal
+
+    def lightest_index(self, pExt, pInt, target_SF=1.0):
+        ''' Return the index of the lightest entry which reaches target_SF
+        for the given pressures, or None if no entry does.'''
+        if target_SF <= 0:
+            raise ValueError('target_SF must be positive')
+        required = target_SF * abs(pExt - pInt)
+        return self._index(pExt, pInt).find(required)
+
+    def lightest(self, pExt, pInt, target_SF=1.0):
+        ''' Return the lightest CatalogEntry which reaches target_SF for the
+        given pressures, or None if no entry does.'''
+        index = self.lightest_index(pExt, pInt, target_SF)
+        return None if index is None else self.entries[index]
+
+    def lightest_batch(self, pExt, pInt, target_SF=1.0):
+        ''' Find the lightest entry for many pairs of pressures, with numpy.
+
+        The arguments are broadcast against each other. Return an array of
+        entry indices, with -1 where no entry reaches target_SF.'''
+        _require_numpy()
+        if self._columns is None:
+            self._columns = {
+                name: (np.asarray(index.capacities, dtype=np.float64),
+                       np.asarray(index.lightest + [-1], dtype=np.intp))
+                for name, index in (('external', self._external),
+                                    ('internal', self._internal))}
+        pExt, pInt, target_SF = np.broadcast_arrays(
+            *(np.asarray(value, dtype=np.float64)
+              for value in (pExt, pInt, target_SF)))
+        if np.any(target_SF <= 0):
+            raise ValueError('target_SF must be positive')
+        required = target_SF * np.abs(pExt - pInt)
+        indices = {}
+        for name, (capacities, lightest) in self._columns.items():
+            indices[name] = lightest[
+                np.searchsorted(capacities, required, side='left')]
+        return np.where(pExt > pInt, indices['external'], indices['internal'])
+
+
+def _entry(entry):
+    if isinstance(entry, CatalogEntry):
+        return entry
+    try:
+        OD = float(entry['OD'])
+        if entry.get('ID') not in (None, ''):
+            ID = float(entry['ID'])
+        else:
+            ID = OD - 2 * float(entry['wall'])
+        allowable_stress = float(entry['allowable_stress'])
+    except KeyError as error:
+        raise ValueError(f'missing field: {error.args[0]}') from None
+    density = entry.get('density')
+    density = 1.0 if density in (None, '') else float(density)
+    if not 0 < ID < OD:
+        raise ValueError(f'invalid diameters: OD={OD}, ID={ID}')
+    return CatalogEntry(entry.get('size', ''), OD, ID, allowable_stress,
+                        density)
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Command line interface, used by "python -m pressurevessels".
+
+With no command, the GUI is started. tkinter is only imported in that case,
+so the other commands work on machines without a display.
+"""
+import argparse
+import json
+import sys
+from . import batchio, conversions
+
+
+def run_gui(args=None):
+    ''' Start the Tk GUI.'''
+    import tkinter as tk
+    from .gui import PV_GUI
+
+    if args is not None and args.stats:
+        from . import instrumentation
+        instrumentation.enable()
+
+    root = tk.Tk()
+    root.title('Pressure Vessels')
+    PV_GUI(root).grid(row=0, column=0, padx=2, pady=2)
+    root.mainloop()
+
+
+def _open(filename, mode):
+    # '-' is stdin or stdout
+    if filename == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(filename, mode, newline='')
+
+
+def run_batch(args):
+    ''' Evaluate the designs from a file (or stdin) and stream the results.'''
+    input_format = args.format or batchio.guess_format(args.input)
+    output_format = args.output_format or batchio.guess_format(args.output,
+                                                               input_format)
+    if output_format == 'columns' and args.output == '-':
+        raise ValueError('the columns format needs an output directory')
+    materials = None
+    if args.materials:
+        from .materials import MaterialDatabase
+        materials = MaterialDatabase.from_csv(args.materials,
+                                              units=args.units)
+    database = None
+    if args.db:
+        from .resultdb import ResultDatabase
+        # The designs are sized in the output units
+        database = ResultDatabase(args.db,
+                                  units=args.output_units or args.units)
+    instream = _open(args.input, 'r')
+    if output_format == 'columns':
+        from .store import ResultWriter
+        outstream = ResultWriter(args.output,
+                                 units=args.output_units or args.units)
+    else:
+        outstream = _open(args.output, 'w')
+    try:
+        count = batchio.run_batch(instream, outstream,
+                                  input_format=input_format,
+                                  output_format=output_format,
+                                  chunksize=args.chunksize, size=args.size,
+                                  target_SF=args.target_sf, units=args.units,
+                                  output_units=args.output_units,
+                                  materials=materials, database=database)
+    finally:
+        for stream in (instream, outstream):
+            if stream is not sys.stdin and stream is not sys.stdout:
+                stream.close()
+        if database is not None:
+            database.close()
+    if args.verbose:
+        print(f'{count} designs evaluated', file=sys.stderr)
+        if database is not None:
+            print(f'result database: {database.hits} hits, '
+                  f'{database.misses} misses '
+                  f'({database.hit_rate:.1%} hit rate)', file=sys.stderr)
+    return 0
+
+
+def run_db(args):
+    ''' Report on a result database, and optionally remove entries.'''
+    from .resultdb import ResultDatabase
+    with ResultDatabase(args.database) as database:
+        removed = 0
+        if args.invalidate or args.clear:
+            removed = database.invalidate(everything=args.clear)
+        if args.vacuum:
+            database.vacuum()
+        info = database.info()
+    summary = {'version': database.version,
+               'evaluations': info.evaluations,
+               'sizings': info.sizings,
+               'stale': info.stale,
+               'removed': removed}
+    outstream = _open(args.output, 'w')
+    try:
+        json.dump(summary, outstream, indent=2)
+        outstream.write('\n')
+    finally:
+        if outstream is not sys.stdout:
+            outstream.close()
+    return 0
+
+
+def run_sweep(args):
+    ''' Sweep a grid of designs, and write a JSON summary of the results.'''
+    from . import sweep
+
+    grid = [sweep.grid_values(text) for text in
+            (args.pExt, args.pInt, args.OD, args.ID, args.allowable_stress)]
+    options = dict(target_SF=args.target_sf, chunksize=args.chunksize,
+                   bins=args.bins)
+    if args.scaling:
+        report = sweep.scaling_report(*grid, max_workers=args.scaling,
+                                      **options)
+        print('workers  seconds  designs/s  speedup')
+        for workers, seconds, rate, speedup in report:
+            print(f'{workers:7d} {seconds:8.3f} {rate:10.4g} {speedup:8.2f}')
+        return 0
+
+    if args.store:
+        from .store import ResultWriter
+        with ResultWriter(args.store) as store:
+            result = sweep.sweep(*grid, workers=args.workers, store=store,
+                                 **options)
+    else:
+        result = sweep.sweep(*grid, workers=args.workers, **options)
+    summary = {
+        'designs': result.total,
+        'valid': result.valid,
+        'feasible': result.feasible,
+        'target_SF': result.target_SF,
+        'histogram': {'bin_edges': result.bin_edges.tolist(),
+                      'counts': result.histogram.tolist()},
+        'min_wall': [dict(pExt=pExt, pInt=pInt,
+                          design=design._asdict() if design else None)
+                     for pExt, pInt, design in result.min_wall_designs()],
+    }
+    outstream = _open(args.output, 'w')
+    try:
+        json.dump(summary, outstream, indent=2)
+        outstream.write('\n')
+    finally:
+        if outstream is not sys.stdout:
+            outstream.close()
+    return 0
+
+
+def run_serve(args):
+    ''' Run the evaluation service until interrupted.'''
+    import asyncio
+    from . import service
+
+    evaluation_service = service.EvaluationService(
+        units=args.units, window=args.window / 1000, max_batch=args.max_batch,
+        batching=not args.no_batching)
+
+    def ready(server):
+        # The port may have been chosen by the system, for --port 0
+        where = args.unix or '%s:%d' % server.sockets[0].getsockname()[:2]
+        print(f'listening on {where}', file=sys.stderr, flush=True)
+
+    try:
+        asyncio.run(service.serve(evaluation_service, args.host, args.port,
+                                  args.unix, ready=ready))
+    except KeyboardInterrupt:
+        pass
+    if args.verbose:
+        json.dump(evaluation_service.metrics.snapshot(), sys.stderr, indent=2)
+        print(file=sys.stderr)
+    return 0
+
+
+def run_fatigue(args):
+    ''' Count the stress cycles of a pressure history for each geometry, and
+    write a JSON summary of the fatigue damage.'''
+    from . import fatigue
+
+    sn_curve = fatigue.SNCurve(*args.sn, endurance=args.endurance)
+    bins = None
+    if args.bins:
+        start, stop, number = args.bins
+        bins = [start + (stop - start) * i / number
+                for i in range(number + 1)]
+    counters = [fatigue.FatigueCounter(OD, ID, sn_curve, stress=args.stress,
+                                       surface=args.surface, bins=bins)
+                for OD, ID in args.geometry]
+    fmt = args.format or fatigue.guess_format(args.input)
+    if args.input == '-':
+        source = sys.stdin.buffer if fmt == 'binary' else sys.stdin
+    else:
+        source = args.input
+    report = fatigue.evaluate_history(source, counters, fmt=fmt,
+                                      chunksize=args.chunksize)
+    summary = {
+        'samples': report.samples,
+        'seconds': report.seconds,
+        'samples_per_second': report.samples_per_second,
+        'geometries': [
+            dict(OD=counter.OD, ID=counter.ID, reversals=result.reversals,
+                 cycles=result.cycles, max_range=result.max_range,
+                 damage=result.damage, repeats=result.repeats,
+                 **({} if bins is None else
+                    {'histogram': {'bin_edges': bins,
+                                   'counts': result.histogram.tolist()}}))
+            for counter, result in zip(counters, report.results)],
+    }
+    outstream = _open(args.output, 'w')
+    try:
+        json.dump(summary, outstream, indent=2)
+        outstream.write('\n')
+    finally:
+        if outstream is not sys.stdout:
+            outstream.close()
+    if args.verbose:
+        print(f'{report.samples} samples, '
+              f'{report.samples_per_second:.4g} samples/s', file=sys.stderr)
+    return 0
+
+
+def _pair(text):
+    first, second = text.split(',')
+    return float(first), float(second)
+
+
+def _bins(text):
+    start, stop, number = text.split(':')
+    return float(start), float(stop), int(number)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m pressurevessels',
+        description='Calculate the stresses in cylindrical pressure vessels. '
+                    'With no command, the GUI is started.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    gui = commands.add_parser('gui', help='start the GUI (default)')
+    gui.add_argument('--stats', action='store_true',
+                     help='show call counters and timers for the calculations')
+    gui.set_defaults(func=run_gui)
+
+    batch = commands.add_parser(
+        'batch', help='evaluate designs from CSV or JSON lines',
+        description='Evaluate designs with the fields pExt, pInt, OD, ID and '
+                    'allowable_stress, read from CSV or JSON lines, and write '
+                    'them with their results. Any other fields are passed '
+                    'through.')
+    batch.add_argument('input', nargs='?', default='-',
+                       help='input file (default: stdin)')
+    batch.add_argument('-o', '--output', default='-',
+                       help='output file (default: stdout)')
+    batch.add_argument('-f', '--format', choices=batchio.FORMATS,
+                       help='input format (default: from the file extension, '
+                            'or csv)')
+    batch.add_argument('--output-format', choices=batchio.OUTPUT_FORMATS,
+                       help='output format (default: from the file '
+                            'extension, or the input format); columns writes '
+                            'a columnar result store directory')
+    batch.add_argument('--chunksize', type=int, default=10000,
+                       help='number of designs evaluated at a time '
+                            '(default: %(default)s)')
+    batch.add_argument('--size', choices=('OD', 'ID'),
+                       help='size this diameter to reach the target safety '
+                            'factor before evaluating')
+    batch.add_argument('--target-sf', type=float, default=1.0,
+                       help='target safety factor for sizing '
+                            '(default: %(default)s)')
+    batch.add_argument('--units', choices=tuple(conversions.SYSTEMS),
+                       default='US',
+                       help='unit system of the input (default: %(default)s)')
+    batch.add_argument('--output-units', choices=tuple(conversions.SYSTEMS),
+                       help='unit system of the output (default: the input '
+                            'units)')
+    batch.add_argument('--materials', metavar='FILE',
+                       help='CSV of allowable stresses by material and '
+                            'temperature, for designs with the fields '
+                            'material and temperature instead of '
+                            'allowable_stress')
+    batch.add_argument('--db', metavar='FILE',
+                       help='SQLite result database for the sizing results: '
+                            'known designs are looked up instead of sized, '
+                            'and new ones are stored')
+    batch.add_argument('-v', '--verbose', action='store_true',
+                       help='report the number of designs (and the result '
+                            'database hits) on stderr')
+    batch.set_defaults(func=run_batch)
+
+    sweep = commands.add_parser(
+        'sweep', help='evaluate a full-factorial grid of designs',
+        description='Evaluate every combination of the parameter values, in '
+                    'parallel, and write a JSON summary: the number of '
+                    'feasible designs, a histogram of the safety factors, and '
+                    'the design with the thinnest feasible wall for each pair '
+                    'of pressures. Each parameter is given as start:stop:num '
+                    '(evenly spaced, including both ends) or a comma '
+                    'separated list of values.')
+    for name in ('pExt', 'pInt', 'OD', 'ID', 'allowable_stress'):
+        sweep.add_argument(f'--{name}', required=True, metavar='VALUES')
+    sweep.add_argument('-o', '--output', default='-',
+                       help='output file (default: stdout)')
+    sweep.add_argument('--workers', type=int,
+                       help='number of worker processes (default: one per '
+                            'CPU)')
+    sweep.add_argument('--chunksize', type=int, default=100000,
+                       help='number of designs evaluated at a time '
+                            '(default: %(default)s)')
+    sweep.add_argument('--target-sf', type=float, default=1.0,
+                       help='safety factor for a feasible design '
+                            '(default: %(default)s)')
+    sweep.add_argument('--bins', type=_bins, default='0:5:50',
+                       help='safety factor histogram bins, as start:stop:num '
+                            '(default: %(default)s)')
+    sweep.add_argument('--store', metavar='DIRECTORY',
+                       help='also write every valid design to a columnar '
+                            'result store')
+    sweep.add_argument('--scaling', type=int, metavar='N',
+                       help='instead of the summary, report the run time with '
+                            '1 to N worker processes')
+    sweep.set_defaults(func=run_sweep)
+
+    fatigue = commands.add_parser(
+        'fatigue', help='count the stress cycles of a pressure history',
+        description='Read a pressure history with the fields pExt and pInt, '
+                    'from CSV or a binary file of interleaved little-endian '
+                    'float64 pExt, pInt pairs, count the stress cycles of '
+                    'each geometry with rainflow counting, and write a JSON '
+                    'summary of the fatigue damage.')
+    fatigue.add_argument('input', nargs='?', default='-',
+                         help='input file (default: stdin)')
+    fatigue.add_argument('-o', '--output', default='-',
+                         help='output file (default: stdout)')
+    fatigue.add_argument('-f', '--format', choices=('csv', 'binary'),
+                         help='input format (default: from the file '
+                              'extension, or csv)')
+    fatigue.add_argument('--geometry', type=_pair, action='append',
+                         required=True, metavar='OD,ID',
+                         help='diameters of a geometry (repeat for more)')
+    fatigue.add_argument('--sn', type=_pair, required=True, metavar='m,C',
+                         help='S-N curve N = C / S**m, for a stress range S')
+    fatigue.add_argument('--endurance', type=float, default=0.0,
+                         help='stress range with no damage '
+                              '(default: %(default)s)')
+    fatigue.add_argument('--stress', choices=('vonmises', 'hoop'),
+                         default='vonmises',
+                         help='signed von Mises or hoop stress '
+                              '(default: %(default)s)')
+    fatigue.add_argument('--surface', choices=('inner', 'outer'),
+                         default='inner',
+                         help='surface of the stress (default: %(default)s)')
+    fatigue.add_argument('--chunksize', type=int, default=100000,
+                         help='number of samples read at a time '
+                              '(default: %(default)s)')
+    fatigue.add_argument('--bins', type=_bins,
+                         help='stress range histogram bins, as '
+                              'start:stop:num')
+    fatigue.add_argument('-v', '--verbose', action='store_true',
+                         help='report the throughput on stderr')
+    fatigue.set_defaults(func=run_fatigue)
+
+    serve = commands.add_parser(
+        'serve', help='evaluate and size designs for local clients',
+        description='Answer JSON requests, one per line, over TCP on '
+                    'localhost or a Unix socket. Requests which arrive '
+                    'together are evaluated as one batch. See the service '
+                    'module for the requests.')
+    serve.add_argument('--host', default='127.0.0.1',
+                       help='address to listen on (default: %(default)s)')
+    serve.add_argument('--port', type=int, default=8765,
+                       help='TCP port (default: %(default)s)')
+    serve.add_argument('--unix', metavar='PATH',
+                       help='listen on this Unix socket instead of TCP')
+    serve.add_argument('--window', type=float, default=2.0,
+                       help='milliseconds to wait for more requests before '
+                            'evaluating a batch (default: %(default)s)')
+    serve.add_argument('--max-batch', type=int, default=1000,
+                       help='largest batch of requests (default: %(default)s)')
+    serve.add_argument('--no-batching', action='store_true',
+                       help='evaluate each request with its own Vessel')
+    serve.add_argument('--units', choices=tuple(conversions.SYSTEMS),
+                       default='US',
+                       help='unit system of the designs and results '
+                            '(default: %(default)s)')
+    serve.add_argument('-v', '--verbose', action='store_true',
+                       help='report the metrics on stderr when stopped')
+    serve.set_defaults(func=run_serve)
+
+    db = commands.add_parser(
+        'db', help='maintain a result database',
+        description='Write a JSON summary of a SQLite result database (the '
+                    'entries for this version, and the stale entries from '
+                    'other versions), after optionally removing entries and '
+                    'compacting the file.')
+    db.add_argument('database', help='result database file')
+    db.add_argument('-o', '--output', default='-',
+                    help='output file (default: stdout)')
+    db.add_argument('--invalidate', action='store_true',
+                    help='remove the entries from other versions')
+    db.add_argument('--clear', action='store_true',
+                    help='remove every entry')
+    db.add_argument('--vacuum', action='store_true',
+                    help='compact the file after removing entries')
+    db.set_defaults(func=run_db)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        return run_gui()
+    try:
+        return args.func(args)
+    except ValueError as error:
+        parser.exit(1, f'{parser.prog}: error: {error}\n')
@@ -4,27 +4,83 @@ MIT License
 
 Copyright (c) 2020 tamalone1
 
-A collection of conversion factors for the units supported in the Vessel class.
+Unit conversions for the units supported in the Vessel class.
+
+Every unit is defined by its size in one canonical system (SI base units),
+and the factors for every pair of units are computed from those once, when
+the module is imported.
 
 """
-US = {'pressure': {'name': 'psi',
-                   'factor': 0.006895},
-      'length': {'name': 'in',
-                 'factor': 25.4}}
+import array
+import itertools
+from fractions import Fraction
+
+# Size of each unit in the canonical (SI base) unit of its type: pascals for
+# pressure, and metres for length. These are exact decimal values (by
+# definition, except for psi), so the factors are computed exactly and then
+# rounded, e.g. exactly 12 inches per foot.
+UNITS = {'pressure': {'Pa': '1',
+                      'kPa': '1e3',
+                      'MPa': '1e6',
+                      'bar': '1e5',
+                      'psi': '6894.757293168361',
+                      'ksi': '6894757.293168361'},
+         'length': {'m': '1',
+                    'mm': '1e-3',
+                    'in': '0.0254',
+                    'ft': '0.3048'}}
+
+# The units used for each type by each unit system
+SYSTEMS = {'US': {'pressure': 'psi', 'length': 'in'},
+           'SI': {'pressure': 'MPa', 'length': 'mm'}}
+
+# Precomputed factors for every conversion, keyed by (unit_type, from, to)
+FACTORS = {(unit_type, a, b): float(Fraction(sizes[a]) / Fraction(sizes[b]))
+           for unit_type, sizes in UNITS.items()
+           for a, b in itertools.product(sizes, repeat=2)}
+
+
+def _unit(unit_type, unit):
+    # A unit system name stands for the unit it uses for this type
+    if unit in SYSTEMS:
+        return SYSTEMS[unit][unit_type]
+    return unit
 
-SI = {'pressure': {'name': 'MPa',
-                   'factor': 1/25.4},
-      'length': {'name': 'mm',
-                 'factor': 1/0.006895}}
 
-other = {'inch': ('mm', 25.4), 'psi': ('MPa', 0.006895)}
+def factor(unit_type, from_unit, to_unit):
+    ''' Return the factor to multiply a value by to convert its units.
+
+    The units may be unit names (e.g. 'psi', 'mm') or unit systems ('US' or
+    'SI'), which stand for the unit the system uses for that type.'''
+    key = (unit_type, _unit(unit_type, from_unit), _unit(unit_type, to_unit))
+    try:
+        return FACTORS[key]
+    except KeyError:
+        raise ValueError(f'cannot convert {unit_type} from {from_unit} to '
+                         f'{to_unit}') from None
+
+
+def convert(values, unit_type, from_unit, to_unit):
+    ''' Convert a value, or a whole column of values, to other units.
+
+    numpy arrays are converted in one vectorized operation, and array.array
+    columns keep their typecode. Other sequences are returned as lists.'''
+    k = factor(unit_type, from_unit, to_unit)
+    if isinstance(values, (int, float)):
+        return values * k
+    if isinstance(values, array.array):
+        return array.array(values.typecode, [value * k for value in values])
+    if hasattr(values, '__array__'):
+        return values * k
+    return [value * k for value in values]
 
-otherSI = {'mm': ('inch', 1/25.4),
-      'MPa': ('psi', 1/0.0068947)}
 
 # Data descriptor object
 class VesselParameter:
     ''' A physical parameter with units describing a pressure vessel.
+
+    Setting the parameter marks the owner's calculated results as out of date,
+    by calling its _invalidate method (if it has one).
     '''
 
     def __init__(self, unit_type):
@@ -35,10 +91,17 @@ class VesselParameter:
         # i.e. attribute from obj.attribute
         self.name = name
 
-    def __get__(self, obj, objtype):
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # Accessed from the class, not an instance
+            return self
         # Gets the value from the owner's dictionary directly
         return obj.__dict__.get(self.name)
 
     def __set__(self, obj, value):
         # Sets the value in the owner's dictionary directly
         obj.__dict__[self.name] = value
+        # Any results calculated from the old value are now out of date
+        invalidate = getattr(obj, '_invalidate', None)
+        if invalidate is not None:
+            invalidate()
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Fatigue damage from long pressure histories, evaluated as a stream.
+
+A history of (pExt, pInt) samples is read one chunk at a time, from CSV or
+from a binary file of interleaved float64 pairs. Each chunk is mapped to a
+surface stress with the influence coefficients of each geometry (a few
+multiply-adds per sample), and reduced to its turning points with numpy.
+The turning points go through rainflow cycle counting (ASTM E1049, the
+three-point method), which keeps only the residue of unclosed reversals, and
+the counted cycles are scored against an S-N curve. So the memory used does
+not depend on the length of the history.
+
+The stress is the von Mises stress on a surface, with the sign of the sum of
+the principal stresses (so that tension and compression are different
+points), or the hoop stress on a surface. The inner surface always has the
+highest von Mises stress.
+"""
+import copy
+import csv
+import io
+import itertools
+import math
+import time
+from collections import namedtuple
+from .PressureVessels import VesselBatch, np, _require_numpy
+from .influence import InfluenceCoefficients
+
+FORMATS = ('csv', 'binary')
+STRESSES = ('vonmises', 'hoop')
+SURFACES = ('inner', 'outer')
+
+FatigueResult = namedtuple('FatigueResult',
+                           ('samples', 'reversals', 'cycles', 'max_range',
+                            'damage', 'repeats', 'bin_edges', 'histogram'))
+FatigueResult.__doc__ = ''' The fatigue damage of one geometry from a
+pressure history.
+
+cycles counts the rainflow cycles, with the unclosed reversals at the end
+counted as half cycles, and max_range is the largest stress range. damage is
+the Palmgren-Miner sum, and repeats is the number of times the history could
+be repeated before failure (1/damage). histogram is the number of cycles in
+each range bin, if bins were given.'''
+
+HistoryReport = namedtuple('HistoryReport',
+                           ('samples', 'seconds', 'samples_per_second',
+                            'results'))
+HistoryReport.__doc__ = ''' The results of evaluate_history: the number of
+samples, the run time, and a FatigueResult for each counter.'''
+
+
+class SNCurve():
+    ''' A Basquin S-N curve: a stress range S is allowed N = C / S**m
+    cycles. Ranges at or below the endurance limit (also a range) cause no
+    damage.'''
+
+    def __init__(self, m, C, endurance=0.0):
+        if m <= 0 or C <= 0:
+            raise ValueError('m and C must be positive')
+        self.m = m
+        self.C = C
+        self.endurance = endurance
+
+    @classmethod
+    def from_points(cls, S1, N1, S2, N2, endurance=0.0):
+        ''' Return the S-N curve through two (stress range, cycles)
+        points.'''
+        m = math.log(N2 / N1) / math.log(S1 / S2)
+        return cls(m, N1 * S1**m, endurance)
+
+    def __repr__(self):
+        return (f'{type(self).__name__}(m={self.m!r}, C={self.C!r}, '
+                f'endurance={self.endurance!r})')
+
+    def cycles(self, ranges):
+        ''' Return the allowed cycles for an array of stress ranges.'''
+        ranges = np.asarray(ranges, dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            cycles = self.C / ranges**self.m
+        return np.where(ranges > self.endurance, cycles, np.inf)
+
+    def damage(self, ranges, counts):
+        ''' Return the damage sum of counts cycles at each stress range.'''
+        return float(np.sum(np.asarray(counts) / self.cycles(ranges)))
+
+
+class FatigueCounter():
+    ''' Online rainflow counting and damage for one geometry.
+
+    Feed the pressure history in order, in chunks of any size, with update.
+    stress is 'vonmises' (signed) or 'hoop', and surface is 'inner' or
+    'outer'. bins are optional stress range bin edges for a histogram of the
+    cycles.
+    '''
+
+    def __init__(self, OD, ID, sn_curve, *, stress='vonmises',
+                 surface='inner', bins=None):
+        _require_numpy()
+        if stress not in STRESSES:
+            raise ValueError(f'unknown stress: {stress}')
+        if surface not in SURFACES:
+            raise ValueError(f'unknown surface: {surface}')
+        if not 0 <= ID < OD:
+            raise ValueError(f'invalid diameters: OD={OD}, ID={ID}')
+        self.OD = OD
+        self.ID = ID
+        self.sn_curve = sn_curve
+        self.stress = stress
+        self.surface = surface
+        self.coefficients = InfluenceCoefficients(OD, ID)
+        self.bin_edges = None if bins is None else np.asarray(bins, dtype=float)
+        self.histogram = (None if bins is None
+                          else np.zeros(len(self.bin_edges) - 1))
+        self.samples = 0
+        self.reversals = 0
+        # Full cycles counted so far, with their damage and largest range
+        self.cycles = 0.0
+        self.damage = 0.0
+        self.max_range = 0.0
+        # The unclosed reversals, and the end of the current monotone run
+        self._residue = []
+        self._last = None
+        self._direction = 0
+
+    def __repr__(self):
+        return (f'{type(self).__name__}(OD={self.OD!r}, ID={self.ID!r}, '
+                f'{self.samples} samples)')
+
+    def stresses(self, pExt, pInt):
+        ''' Return the stress for arrays of pressures.'''
+        inner, outer = self.coefficients.principal_stresses(
+            np.asarray(pExt, dtype=np.float64),
+            np.asarray(pInt, dtype=np.float64))
+        hoop, axial, radial = inner if self.surface == 'inner' else outer
+        if self.stress == 'hoop':
+            return np.asarray(hoop, dtype=np.float64)
+        vonmises = VesselBatch._vonmises(hoop, axial, radial)
+        return np.where(hoop + axial + radial < 0, -vonmises, vonmises)
+
+    def update(self, pExt, pInt):
+        ''' Count the cycles in the next chunk of the pressure history.'''
+        stress = np.ravel(self.stresses(pExt, pInt))
+        if not stress.size:
+            return
+        self.samples += stress.size
+        if self._last is None:
+            # The first sample is a reversal
+            self.reversals += 1
+            self._push([float(stress[0])])
+            self._last = stress[0]
+        points = np.concatenate(([self._last], stress))
+        # Drop repeated values, which are not reversals
+        points = points[np.concatenate(([True], np.diff(points) != 0))]
+        if points.size < 2:
+            return
+        # directions[k] is the direction of the run ending at points[k], and
+        # points[k] is a reversal if the next run goes the other way
+        directions = np.concatenate(([self._direction],
+                                     np.sign(np.diff(points))))
+        turning = (directions[:-1] != 0) & (directions[:-1] != directions[1:])
+        self._push(self._extract(points[:-1][turning]).tolist())
+        self._last = points[-1]
+        self._direction = directions[-1]
+
+    def _extract(self, reversals):
+        ''' Count the cycles which close inside a run of reversals, with
+        numpy, and return the remaining reversals.
+
+        The pair of reversals i, i + 1 closes a full cycle if its range is
+        smaller than the range before it, and no larger than the range after
+        it. The three-point method counts every such pair when it reaches
+        reversal i + 2, whatever comes before reversal i - 1, and removing
+        the pairs only makes the neighbouring ranges larger. So they can all
+        be removed at once, and the remaining reversals give the same counts
+        as the whole run.'''
+        self.reversals += reversals.size
+        while reversals.size >= 4:
+            ranges = np.abs(np.diff(reversals))
+            closed = np.zeros(ranges.size, dtype=bool)
+            closed[1:-1] = ((ranges[1:-1] < ranges[:-2])
+                            & (ranges[1:-1] <= ranges[2:]))
+            pairs = np.flatnonzero(closed)
+            if not pairs.size:
+                break
+            self._count(ranges[pairs], np.ones(pairs.size))
+            keep = np.ones(reversals.size, dtype=bool)
+            keep[pairs] = False
+            keep[pairs + 1] = False
+            reversals = reversals[keep]
+        return reversals
+
+    def _push(self, reversals):
+        ''' Add reversals to the residue, and count the cycles they close.'''
+        residue = self._residue
+        ranges, counts = [], []
+        for point in reversals:
+            # Compare the new range X with the previous range Y, before
+            # adding the point to the residue
+            while len(residue) >= 2:
+                previous = residue[-1]
+                X = abs(point - previous)
+                Y = abs(previous - residue[-2])
+                if X < Y:
+                    break
+                ranges.append(Y)
+                if len(residue) == 2:
+                    # Y contains the starting point: a half cycle
+                    counts.append(0.5)
+                    del residue[0]
+                else:
+                    counts.append(1.0)
+                    del residue[-2:]
+            residue.append(point)
+        self._count(ranges, counts)
+
+    def _count(self, ranges, counts):
+        if not len(ranges):
+            return
+        ranges = np.asarray(ranges)
+        counts = np.asarray(counts)
+        self.cycles += float(counts.sum())
+        self.damage += self.sn_curve.damage(ranges, counts)
+        self.max_range = max(self.max_range, float(ranges.max()))
+        if self.histogram is not None:
+            self.histogram += np.histogram(ranges, self.bin_edges,
+                                           weights=counts)[0]
+
+    def result(self):
+        ''' Return the FatigueResult so far. The end of the current run is
+        added as the last reversal, and the residue left after it is counted
+        as half cycles, on a copy of the state, so more of the history can
+        still be added.'''
+        final = copy.copy(self)
+        final._residue = list(self._residue)
+        if self.histogram is not None:
+            final.histogram = self.histogram.copy()
+        reversals = self.reversals
+        if self._last is not None and self._direction != 0:
+            # The last reversal may still close cycles
+            final._push([float(self._last)])
+            reversals += 1
+        residue = final._residue
+        ranges = np.abs(np.diff(residue)) if len(residue) > 1 else np.empty(0)
+        final._count(ranges, np.full(ranges.size, 0.5))
+        damage = final.damage
+        repeats = 1 / damage if damage > 0 else math.inf
+        return FatigueResult(self.samples, reversals, final.cycles,
+                             final.max_range, damage, repeats, self.bin_edges,
+                             final.histogram)
+
+
+def guess_format(filename, default='csv'):
+    ''' Return the format of a pressure history file, from its extension.'''
+    if filename.endswith(('.bin', '.f64', '.dat')):
+        return 'binary'
+    if filename.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_history(stream, fmt='csv', chunksize=100000):
+    ''' Read a pressure history from a stream, and yield (pExt, pInt) arrays
+    of up to chunksize samples.
+
+    A CSV stream (text) has a header with the fields pExt and pInt, and any
+    others are ignored. A binary stream has interleaved little-endian float64
+    pExt, pInt pairs.'''
+    _require_numpy()
+    if fmt not in FORMATS:
+        raise ValueError(f'unknown format: {fmt}')
+    if fmt == 'binary':
+        size = 2 * np.dtype('<f8').itemsize
+        while True:
+            data = stream.read(chunksize * size)
+            if not data:
+                return
+            if len(data) % size:
+                raise ValueError('the binary history ends with a partial '
+                                 'sample')
+            pairs = np.frombuffer(data, dtype='<f8').reshape(-1, 2)
+            yield pairs[:, 0], pairs[:, 1]
+    header = next(csv.reader([stream.readline()]), [])
+    try:
+        columns = [header.index('pExt'), header.index('pInt')]
+    except ValueError:
+        raise ValueError('missing field: pExt or pInt') from None
+    while True:
+        lines = list(itertools.islice(stream, chunksize))
+        if not lines:
+            return
+        values = np.loadtxt(lines, delimiter=',', usecols=columns, ndmin=2)
+        yield values[:, 0], values[:, 1]
+
+
+def evaluate_history(source, counters, *, fmt=None, chunksize=100000):
+    ''' Feed a pressure history to one or more FatigueCounters (such as one
+    for each housing), reading it once, and return a HistoryReport.
+
+    source is a file name, or a stream (binary for the binary format). The
+    format is guessed from the file name if not given.'''
+    if isinstance(source, str):
+        fmt = fmt or guess_format(source)
+        mode = 'rb' if fmt == 'binary' else 'r'
+        with open(source, mode, newline=None if fmt == 'binary' else '') \
+                as stream:
+            return evaluate_history(stream, counters, fmt=fmt,
+                                    chunksize=chunksize)
+    fmt = fmt or 'csv'
+    if fmt == 'csv' and isinstance(source, io.BufferedIOBase):
+        source = io.TextIOWrapper(source, newline='')
+    start = time.perf_counter()
+    samples = 0
+    for pExt, pInt in read_history(source, fmt, chunksize):
+        for counter in counters:
+            counter.update(pExt, pInt)
+        samples += pExt.size
+    seconds = time.perf_counter() - start
+    rate = samples / seconds if seconds > 0 else math.inf
+    return HistoryReport(samples, seconds, rate,
+                         [counter.result() for counter in counters])
@@ -4,8 +4,12 @@ MIT License
 
 Copyright (c) 2020 tamalone1
 """
+import concurrent.futures
+import functools
 import tkinter as tk
 from .PressureVessels import Vessel
+from .cache import EvaluationCache
+from . import instrumentation, sizing
 
 # GUI class to create and manage the GUI
 class PV_GUI(tk.Frame):
@@ -24,13 +28,28 @@ class PV_GUI(tk.Frame):
                     
     defaultvalues = (15, 0, 1.695, 1.460, 120)
 
-    def __init__(self, parent, *args, **kwargs):
+    # Delay after the last keystroke before recalculating (ms)
+    debounce_delay = 300
+    # Interval for checking whether a background calculation is done (ms)
+    poll_interval = 20
+
+    def __init__(self, parent, *args, cache=None, **kwargs):
         tk.Frame.__init__(self, parent, *args, **kwargs)
         self.parent = parent
         # self.configure(background='gainsboro')
 
-        # Create a vessel instance for the calculations
-        self.vessel = Vessel(*self.defaultvalues)
+        # Create a vessel instance for the calculations. Calculations run on
+        # a worker thread, and their results are shared with the vessel
+        # through the cache, so reading them on the main thread is quick.
+        if cache is None:
+            cache = EvaluationCache(maxsize=256)
+        self.cache = cache
+        self.vessel = Vessel(*self.defaultvalues, cache=cache)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # The running background job, as (future, callback)
+        self._job = None
+        # The pending live recalculation, from after()
+        self._live_update = None
 
         # Create the input entry fields
         inputframe = tk.Frame(self, background=self['background'])
@@ -57,10 +76,34 @@ class PV_GUI(tk.Frame):
         maximizeID_button = tk.Button(buttonrowframe, text='Maximum ID',
                                       width=20, command=self.maximize_ID)
         maximizeID_button.pack(side=tk.LEFT, padx=10)
+        # Insert button to cancel a running calculation
+        self.cancel_button = tk.Button(buttonrowframe, text='Cancel', width=10,
+                                       state=tk.DISABLED, command=self.cancel)
+        self.cancel_button.pack(side=tk.LEFT, padx=10)
         # Grid the buttons
         buttonrowframe.grid(row=1, column=0, columnspan=2, padx=10, pady=10,
                             sticky='nsew')
 
+        # Status line, for background calculations and errors
+        self.statuslabel = tk.Label(self, text='', anchor='w',
+                                    font=('Arial 10'),
+                                    background=self['background'])
+        self.statuslabel.grid(row=3, column=0, columnspan=2, padx=10,
+                              sticky='nsew')
+
+        # Show the call counters and timers, if they are enabled
+        if instrumentation.enabled():
+            self.statslabel = tk.Label(self, text='', anchor='w',
+                                       justify=tk.LEFT, font=('Courier 9'),
+                                       background=self['background'])
+            self.statslabel.grid(row=4, column=0, columnspan=2, padx=10,
+                                 pady=(0, 10), sticky='nsew')
+        else:
+            self.statslabel = None
+
+        # Stop the worker thread with the window
+        self.bind('<Destroy>', self.shutdown)
+
         # Set the focus to the first entry box
         self.ent['External pressure'].focus_set()
 
@@ -87,6 +130,7 @@ class PV_GUI(tk.Frame):
             ent.insert(0, self.defaultvalues[i])
             ent.bind('<Enter>', self.entryhighlight)
             ent.bind('<Leave>', self.entryrevert)
+            ent.bind('<KeyRelease>', self.schedule_live_update)
             ent.grid(row=i, column=1, padx=2, pady=2)
 
             entries[field] = ent
@@ -143,6 +187,24 @@ class PV_GUI(tk.Frame):
         # sub-dictionary containing the label objects for each column
         return outputs
 
+    def read_entryvalues(self):
+        # Get values from the entry boxes and return a dictionary of floats,
+        # or None if any of them are not numbers (e.g. while typing)
+        try:
+            return {fieldname: float(entrybox.get())
+                    for fieldname, entrybox in self.ent.items()}
+        except ValueError:
+            return None
+
+    def set_vesselvalues(self, values):
+        # Assign the values to instance attributes, the vessel will
+        # recalculate its results when they are next accessed
+        self.vessel.modify_parameters(pExt=values['External pressure'],
+                                      pInt=values['Internal pressure'],
+                                      OD=values['Outer diameter'],
+                                      ID=values['Inner diameter'],
+                                      allowable_stress=values['Allowable stress'])
+
     def get_entryvalues(self):
         # Get values from the entry boxes and return a dictionary of floats
         values = {}
@@ -156,17 +218,9 @@ class PV_GUI(tk.Frame):
                 entrybox.delete(0, tk.END)
                 entrybox.insert(0, '0')
 
-        # Assign the values to instance attributes
-        self.vessel.pExt = values['External pressure']
-        self.vessel.pInt = values['Internal pressure']
-        self.vessel.OD = values['Outer diameter']
-        self.vessel.ID = values['Inner diameter']
-        self.vessel.allowable_stress = values['Allowable stress']
+        self.set_vesselvalues(values)
 
     def update_results(self):
-        # self.get_entryvalues()
-        # self.vessel.calculate()
-
         # Check the safety factors, and select the display color
         if self.vessel.SF < 1.00:
             SF_color = '#ff8888'
@@ -201,51 +255,114 @@ class PV_GUI(tk.Frame):
         self.outputs['External Pressure for Collapse']['allowable'].configure(
                 text='{:,.3f}'.format(self.vessel.maxExternal))
 
+        if self.statslabel is not None:
+            self.statslabel.configure(text=instrumentation.format_stats(
+                instrumentation.snapshot()))
+
+    def submit(self, function, *args, callback):
+        ''' Run function(*args) on the worker thread, and then call
+        callback(result) on the main thread. Any running job is cancelled.'''
+        self.cancel(quiet=True)
+        self._job = (self.executor.submit(function, *args), callback)
+        self.statuslabel.configure(text='Calculating...')
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.after(self.poll_interval, self.poll)
+
+    def poll(self):
+        ''' Check the running job, and deliver its result when it is done.'''
+        if self._job is None:
+            return
+        future, callback = self._job
+        if not future.done():
+            self.after(self.poll_interval, self.poll)
+            return
+        self._job = None
+        self.cancel_button.configure(state=tk.DISABLED)
+        try:
+            result = future.result()
+        except (ValueError, ArithmeticError) as error:
+            self.statuslabel.configure(text=f'Error: {error}')
+            return
+        self.statuslabel.configure(text='')
+        callback(result)
+
+    def cancel(self, quiet=False):
+        ''' Cancel the running job. A calculation which has already started
+        finishes on the worker thread, but its result is discarded.'''
+        if self._job is None:
+            return
+        self._job[0].cancel()
+        self._job = None
+        self.cancel_button.configure(state=tk.DISABLED)
+        if not quiet:
+            self.statuslabel.configure(text='Cancelled')
+
+    def shutdown(self, event=None):
+        if event is None or event.widget is self:
+            self.cancel(quiet=True)
+            self.executor.shutdown(wait=False)
+
+    def schedule_live_update(self, event=None):
+        ''' Recalculate after typing stops, so that a burst of keystrokes
+        only calculates once.'''
+        if self._live_update is not None:
+            self.after_cancel(self._live_update)
+        self._live_update = self.after(self.debounce_delay, self.live_update)
+
+    def live_update(self):
+        self._live_update = None
+        values = self.read_entryvalues()
+        if values is None:
+            # Wait for the user to finish typing a number
+            return
+        self.set_vesselvalues(values)
+        self.calculate()
+
+    def calculate(self):
+        ''' Evaluate the vessel on the worker thread, and then update the
+        output table (which reads the result from the shared cache).'''
+        self.submit(self.cache.evaluate, self.vessel.spec,
+                    callback=lambda result: self.update_results())
+
     def calculate_button_command(self):
         ''' Get the current inputs, calculate, and update the output table.'''
         self.get_entryvalues()
-        self.vessel.calculate()
-        self.update_results()
+        self.calculate()
 
     def minimize_OD(self):
         ''' Find the minimum OD with safety factor >= 1. 
         
-        Uses the corresponding vessel method.'''
-        # Get the inputs from the entry boxes and calculate
+        The sizing runs on the worker thread, with the sizing module.'''
+        # Get the inputs from the entry boxes
         self.get_entryvalues()
-        self.vessel.calculate()
-        # Call the vessel method
-        self.vessel.minimize_OD()
-        # Change the OD entrybox to show the new OD
-        new_OD = self.vessel.OD
+        spec = self.vessel.spec
+        self.submit(functools.partial(sizing.size_OD, cache=self.cache),
+                    spec.pExt, spec.pInt, spec.ID,
+                    spec.allowable_stress, callback=self.set_OD)
+
+    def set_OD(self, result):
+        # Change the vessel and the OD entrybox to show the new OD
+        self.vessel.modify_parameters(OD=result.value)
         self.ent['Outer diameter'].delete(0, tk.END)
-        self.ent['Outer diameter'].insert(0, f'{new_OD:.3f}')
+        self.ent['Outer diameter'].insert(0, f'{result.value:.3f}')
         # Update the results table with the calculated values
         self.update_results()
 
     def maximize_ID(self):
         ''' Find the maximum ID with safety factor >= 1. 
         
-        Uses the corresponding vessel method.'''
-        # Get the inputs from the entry boxes and calculate
+        The sizing runs on the worker thread, with the sizing module.'''
+        # Get the inputs from the entry boxes
         self.get_entryvalues()
-        self.vessel.calculate()
-        # Call the vessel method
-        self.vessel.minimize_ID()
-        # Change the OD entrybox to show the new OD
-        new_ID = self.vessel.ID
+        spec = self.vessel.spec
+        self.submit(functools.partial(sizing.size_ID, cache=self.cache),
+                    spec.pExt, spec.pInt, spec.OD,
+                    spec.allowable_stress, callback=self.set_ID)
+
+    def set_ID(self, result):
+        # Change the vessel and the ID entrybox to show the new ID
+        self.vessel.modify_parameters(ID=result.value)
         self.ent['Inner diameter'].delete(0, tk.END)
-        self.ent['Inner diameter'].insert(0, f'{new_ID:.3f}')
+        self.ent['Inner diameter'].insert(0, f'{result.value:.3f}')
         # Update the results table with the calculated values
         self.update_results()
-
-def check_diameters(vessel, new_ID, new_OD):
-    """ Change the vessel's ID and OD and return the resulting safety factor.
-    """
-    if new_OD <= new_ID:
-        # OD must be larger than ID by any finite amount
-        # Otherwise, don't try calculating, may cause error
-        return 0
-    else:
-        vessel.modify_parameters(ID=new_ID, OD=new_OD)
-        return vessel.SF
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Pressure-superposition influence coefficients for fixed geometries.
+
+For a given OD and ID, every principal stress is linear in the internal and
+external pressure, so it can be written as a*pInt + b*pExt. The coefficients
+a and b are computed once per geometry, and then each load case costs only a
+few multiply-adds, instead of recomputing the squared diameters each time.
+"""
+from collections import namedtuple
+from .PressureVessels import (VesselBatch, VesselResult, np, _require_numpy,
+                              _max_averagestresses, _maxpressures,
+                              _safetyfactors, _vonmises)
+
+# Stresses per unit pressure: (hoop, axial, radial) on the inner and outer
+# surfaces, for internal and external pressure
+Coefficients = namedtuple('Coefficients',
+                          ('hoop_inner', 'axial', 'radial_inner',
+                           'hoop_outer', 'radial_outer'))
+
+RatingResult = namedtuple('RatingResult',
+                          ('external', 'maxstress', 'averagestress',
+                           'SF_external', 'SF_internal', 'SF', 'maxExternal',
+                           'maxInternal'))
+RatingResult.__doc__ = \
+    ''' The results of rating load cases against geometries, as arrays.'''
+
+
+class InfluenceCoefficients():
+    ''' The principal stresses per unit internal and external pressure for
+    one geometry, or for arrays of geometries.
+
+    internal and external are Coefficients, for pressure on the inside or
+    the outside. The axial stress is the same on both surfaces.
+    '''
+
+    def __init__(self, OD, ID):
+        if not np or (np.ndim(OD) == 0 and np.ndim(ID) == 0):
+            self.OD, self.ID = OD, ID
+        else:
+            self.OD, self.ID = np.broadcast_arrays(
+                np.asarray(OD, dtype=np.float64),
+                np.asarray(ID, dtype=np.float64))
+        OD2 = self.OD**2
+        ID2 = self.ID**2
+        area = OD2 - ID2
+        self.internal = Coefficients(hoop_inner=(OD2 + ID2) / area,
+                                     axial=ID2 / area,
+                                     radial_inner=-1.0,
+                                     hoop_outer=2 * ID2 / area,
+                                     radial_outer=0.0)
+        self.external = Coefficients(hoop_inner=-2 * OD2 / area,
+                                     axial=-OD2 / area,
+                                     radial_inner=0.0,
+                                     hoop_outer=-(OD2 + ID2) / area,
+                                     radial_outer=-1.0)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(OD={self.OD!r}, ID={self.ID!r})'
+
+    def principal_stresses(self, pExt, pInt):
+        ''' Return the (hoop, axial, radial) stresses on the inner and outer
+        surfaces, for the given pressures.'''
+        i, e = self.internal, self.external
+        axial = i.axial*pInt + e.axial*pExt
+        inner = (i.hoop_inner*pInt + e.hoop_inner*pExt, axial, -pInt)
+        outer = (i.hoop_outer*pInt + e.hoop_outer*pExt, axial, -pExt)
+        return inner, outer
+
+    def evaluate(self, pExt, pInt, allowable_stress):
+        ''' Evaluate one load case against one geometry, as a VesselResult.'''
+        inner, outer = self.principal_stresses(pExt, pInt)
+        vmInt = _vonmises(*inner)
+        vmExt = _vonmises(*outer)
+        maxstress = max(vmExt, vmInt)
+        averagestress = (vmExt + vmInt) / 2
+        external = pExt > pInt
+        SF_external, SF_internal, _ = _safetyfactors(external, maxstress,
+                                                     averagestress,
+                                                     allowable_stress)
+        return VesselResult(external, maxstress, averagestress, SF_external,
+                            SF_internal,
+                            *_maxpressures(pExt, pInt, SF_external,
+                                           SF_internal))
+
+    def rate(self, pExt, pInt, allowable_stress):
+        ''' Evaluate many load cases against the geometries, with numpy.
+
+        The pressures and allowable stress are broadcast against each other.
+        If the coefficients are for an array of geometries, the results have
+        the shape of the geometries followed by the shape of the load cases,
+        e.g. a row for each geometry and a column for each load case. Return
+        a RatingResult of arrays.'''
+        _require_numpy()
+        pExt, pInt, allowable_stress = np.broadcast_arrays(
+            *(np.asarray(value, dtype=np.float64)
+              for value in (pExt, pInt, allowable_stress)))
+        if np.ndim(self.OD):
+            # Geometries along the first axes, load cases along the others
+            cases = (1,) * pExt.ndim
+            coefficients = InfluenceCoefficients.__new__(InfluenceCoefficients)
+            coefficients.internal = Coefficients(
+                *(_expand(c, cases) for c in self.internal))
+            coefficients.external = Coefficients(
+                *(_expand(c, cases) for c in self.external))
+        else:
+            coefficients = self
+        inner, outer = coefficients.principal_stresses(pExt, pInt)
+        vmInt = VesselBatch._vonmises(*inner)
+        vmExt = VesselBatch._vonmises(*outer)
+        maxstress = np.maximum(vmExt, vmInt)
+        averagestress = (vmExt + vmInt) / 2
+
+        # _safetyfactors takes scalars, so only its limits are shared here
+        external_limit, internal_limit = _max_averagestresses(allowable_stress)
+        SF_max = allowable_stress / maxstress
+        SF_external = np.minimum(SF_max, external_limit / averagestress)
+        SF_internal = np.minimum(SF_max, internal_limit / averagestress)
+        external = np.broadcast_to(pExt > pInt, SF_max.shape)
+        return RatingResult(external, maxstress, averagestress, SF_external,
+                            SF_internal,
+                            np.where(external, SF_external, SF_internal),
+                            *_maxpressures(pExt, pInt, SF_external,
+                                           SF_internal))
+
+
+def _expand(coefficient, cases):
+    ''' Add axes for the load cases after the axes of the geometries.'''
+    if not np.ndim(coefficient):
+        return coefficient
+    return np.reshape(coefficient, np.shape(coefficient) + cases)
+
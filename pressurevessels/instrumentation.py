@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Opt-in call counters and timers for the calculation stages and solvers.
+
+When enabled, the stage functions (evaluate, stresses, safety factors and
+maximum pressures), Vessel.calculate and the sizing functions are replaced
+by wrappers that count and time each call, and also record the solver
+iterations and evaluations. When disabled, the original functions are
+restored, so there is no overhead at all.
+
+    from pressurevessels import instrumentation
+    with instrumentation.measure() as measurement:
+        vessel.minimize_OD()
+    measurement.stats['size_OD']
+"""
+import contextlib
+import functools
+import importlib
+import sys
+import threading
+import time
+
+# (module, attribute, stage name) for every function that is counted, where
+# it is defined. The other modules of the package which import the same
+# function are found when the instrumentation is enabled, and their bindings
+# are replaced too.
+_STAGES = (('PressureVessels', 'evaluate', 'evaluate'),
+           ('PressureVessels', '_stresses', 'stresses'),
+           ('PressureVessels', '_safetyfactors', 'safetyfactors'),
+           ('PressureVessels', '_maxpressures', 'maxpressures'),
+           ('PressureVessels', 'Vessel.calculate', 'Vessel.calculate'),
+           ('PressureVessels', 'VesselBatch.calculate',
+            'VesselBatch.calculate'),
+           ('sizing', 'size_OD', 'size_OD'),
+           ('sizing', 'size_ID', 'size_ID'),
+           ('sizing', 'size_OD_batch', 'size_OD_batch'),
+           ('sizing', 'size_ID_batch', 'size_ID_batch'))
+
+_lock = threading.Lock()
+_stats = {}
+_originals = {}
+
+
+def _record(name, seconds, result):
+    with _lock:
+        stats = _stats.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        # Sizing results also report the work done by the solver
+        for counter in ('iterations', 'evaluations'):
+            value = getattr(result, counter, None)
+            if isinstance(value, int):
+                stats[counter] = stats.get(counter, 0) + value
+
+
+def _wrap(function, name):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        _record(name, time.perf_counter() - start, result)
+        return result
+    wrapper.__wrapped_stage__ = name
+    return wrapper
+
+
+def _resolve(module_name, attribute):
+    ''' Return the object that owns the attribute, and its final name.'''
+    owner = importlib.import_module(f'{__package__}.{module_name}')
+    *path, name = attribute.split('.')
+    for part in path:
+        owner = getattr(owner, part)
+    return owner, name
+
+
+def _modules():
+    ''' Return the modules of the package which have been imported.'''
+    return [module for name, module in list(sys.modules.items())
+            if module is not None and name.startswith(f'{__package__}.')]
+
+
+def enabled():
+    ''' Return True if the instrumentation is enabled.'''
+    return bool(_originals)
+
+
+def enable():
+    ''' Start counting and timing calls.'''
+    with _lock:
+        if _originals:
+            return
+        wrappers = {}
+        for module_name, attribute, name in _STAGES:
+            owner, final = _resolve(module_name, attribute)
+            original = owner.__dict__[final]
+            wrapper = _wrap(original, name)
+            _originals[(owner, final)] = original
+            setattr(owner, final, wrapper)
+            wrappers[id(original)] = (original, wrapper)
+        # Replace every other binding of the same functions
+        for module in _modules():
+            for attribute, value in list(vars(module).items()):
+                original, wrapper = wrappers.get(id(value), (None, None))
+                if value is original:
+                    _originals[(module, attribute)] = original
+                    setattr(module, attribute, wrapper)
+
+
+def disable():
+    ''' Stop counting and timing calls, and restore the original functions.
+    The statistics are kept until they are reset.'''
+    with _lock:
+        for (owner, attribute), original in _originals.items():
+            setattr(owner, attribute, original)
+        _originals.clear()
+        # Modules imported while enabled bound the wrappers themselves
+        for module in _modules():
+            for attribute, value in list(vars(module).items()):
+                if hasattr(value, '__wrapped_stage__'):
+                    setattr(module, attribute, value.__wrapped__)
+
+
+def snapshot():
+    ''' Return a copy of the statistics, as {stage: {counter: value}}.
+
+    Every stage has 'calls' and 'seconds' counters, and the solvers also
+    have 'iterations' and 'evaluations' if they report them.'''
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def reset():
+    ''' Clear all of the statistics.'''
+    with _lock:
+        _stats.clear()
+
+
+def _difference(after, before):
+    stats = {}
+    for name, counters in after.items():
+        previous = before.get(name, {})
+        difference = {counter: value - previous.get(counter, 0)
+                      for counter, value in counters.items()}
+        if difference['calls']:
+            stats[name] = difference
+    return stats
+
+
+class Measurement():
+    ''' The statistics for a block of code, available after the block ends.'''
+
+    def __init__(self):
+        self.stats = {}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.stats})'
+
+
+@contextlib.contextmanager
+def measure():
+    ''' Enable the instrumentation for a block of code, and collect the
+    statistics for that block only in the yielded Measurement.'''
+    was_enabled = enabled()
+    enable()
+    measurement = Measurement()
+    before = snapshot()
+    try:
+        yield measurement
+    finally:
+        measurement.stats = _difference(snapshot(), before)
+        if not was_enabled:
+            disable()
+
+
+def format_stats(stats):
+    ''' Return a short, human-readable summary of the statistics.'''
+    lines = []
+    for name, counters in sorted(stats.items()):
+        line = (f'{name}: {counters["calls"]} calls, '
+                f'{counters["seconds"] * 1000:.2f} ms')
+        # Only the scalar solvers report their evaluations
+        for counter in ('iterations', 'evaluations'):
+            if counter in counters:
+                line += f', {counters[counter]} {counter}'
+        lines.append(line)
+    return '\n'.join(lines)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+A database of allowable stress vs temperature tables, for derating the
+allowable stress of each material at its service temperature.
+
+Between the tabulated temperatures, the allowable stress is interpolated
+linearly (as the design codes permit), which keeps the interpolant monotone
+where the table is. Below the lowest tabulated temperature the first value is
+used, and above the highest there is no allowable stress: a ValueError for a
+single lookup, or nan for a vectorized one (so those designs have a nan SF).
+
+For vectorized lookups, the tables of all of the materials are merged into
+one index, with the segment slopes precomputed. Each material's temperature
+range is also divided into uniform buckets, no wider than its closest pair of
+temperatures, and each bucket holds the segment at its lower edge. Then a
+lookup finds the segment of every (material, temperature) pair with a few
+array operations, instead of a binary search, regardless of the number of
+materials.
+"""
+import bisect
+import csv
+import math
+from collections import namedtuple
+from .PressureVessels import Vessel, VesselBatch, np, _require_numpy
+from . import conversions
+
+# The most buckets per tabulated temperature, for tables with very uneven
+# temperature steps. A bucket may then contain more than one temperature,
+# which costs another pass in the lookup.
+BUCKETS_PER_KNOT = 64
+
+MaterialTable = namedtuple('MaterialTable', ('name', 'temperatures',
+                                             'allowables'))
+MaterialTable.__doc__ = ''' The allowable stress of one material at
+increasing temperatures.'''
+
+
+class MaterialDatabase():
+    ''' Allowable stress vs temperature tables for many materials.
+
+    tables is a mapping of material names to sequences of (temperature,
+    allowable_stress) pairs, or a sequence of MaterialTable tuples. The
+    allowable stresses are in the pressure unit of the units system, and the
+    temperatures in whichever unit the tables use.
+    '''
+
+    def __init__(self, tables, *, units='US'):
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        self.units = units
+        if hasattr(tables, 'items'):
+            tables = [_table(name, pairs) for name, pairs in tables.items()]
+        self.tables = tuple(tables)
+        self.codes = {}
+        for code, table in enumerate(self.tables):
+            if table.name in self.codes:
+                raise ValueError(f'duplicate material: {table.name}')
+            self.codes[table.name] = code
+        # Arrays for vectorized lookups, built on first use
+        self._index = None
+
+    @classmethod
+    def from_csv(cls, stream, *, units='US'):
+        ''' Read a database from a CSV text stream, or a file name, with the
+        fields material, temperature and allowable_stress, one row per
+        tabulated temperature.'''
+        if isinstance(stream, str):
+            with open(stream, newline='') as file:
+                return cls.from_csv(file, units=units)
+        tables = {}
+        try:
+            for row in csv.DictReader(stream):
+                tables.setdefault(row['material'], []).append(
+                    (float(row['temperature']),
+                     float(row['allowable_stress'])))
+        except KeyError as error:
+            raise ValueError(f'missing field: {error.args[0]}') from None
+        return cls(tables, units=units)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __iter__(self):
+        return iter(self.tables)
+
+    def __getitem__(self, name):
+        return self.tables[self.codes[name]]
+
+    def __contains__(self, name):
+        return name in self.codes
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {len(self)} materials, {self.units}>'
+
+    def code(self, materials):
+        ''' Return the integer code of a material name, or an array of codes
+        for a sequence of names. Codes make repeated vectorized lookups
+        faster than names.'''
+        if isinstance(materials, str):
+            return self._code(materials)
+        _require_numpy()
+        names, inverse = np.unique(np.asarray(materials, dtype=str),
+                                   return_inverse=True)
+        codes = np.array([self._code(name) for name in names], dtype=np.intp)
+        return codes[inverse].reshape(np.shape(materials))
+
+    def _code(self, name):
+        try:
+            return self.codes[name]
+        except KeyError:
+            raise ValueError(f'unknown material: {name}') from None
+
+    def allowable(self, material, temperature):
+        ''' Return the allowable stress of a material, by name, at a
+        temperature.'''
+        table = self.tables[self._code(material)]
+        temperatures = table.temperatures
+        if not temperature <= temperatures[-1]:
+            raise ValueError(f'{temperature} is above the highest temperature'
+                             f' for {material} ({temperatures[-1]})')
+        if temperature <= temperatures[0]:
+            return table.allowables[0]
+        i = bisect.bisect_left(temperatures, temperature)
+        t0, t1 = temperatures[i - 1], temperatures[i]
+        a0, a1 = table.allowables[i - 1], table.allowables[i]
+        return a0 + (a1 - a0) * (temperature - t0) / (t1 - t0)
+
+    def _build_index(self):
+        # Each segment has its starting temperature and allowable, its slope,
+        # and the temperature where the next segment starts
+        lowers, values, slopes, uppers = [], [], [], []
+        lows, highs, scales, starts, buckets = [], [], [], [], []
+        for table in self.tables:
+            knots = table.temperatures
+            low, high = knots[0], knots[-1]
+            first = len(slopes)
+            for t0, t1, a0, a1 in zip(knots, knots[1:], table.allowables,
+                                      table.allowables[1:]):
+                lowers.append(t0)
+                values.append(a0)
+                slopes.append((a1 - a0) / (t1 - t0))
+                uppers.append(t1)
+            # The highest temperature gets a flat segment, which is never
+            # passed
+            lowers.append(high)
+            values.append(table.allowables[-1])
+            slopes.append(0.0)
+            uppers.append(math.inf)
+            if len(knots) > 1:
+                closest = min(t1 - t0 for t0, t1 in zip(knots, knots[1:]))
+                count = min(math.ceil((high - low) / closest),
+                            BUCKETS_PER_KNOT * len(knots))
+                scale = count / (high - low)
+            else:
+                count, scale = 1, 0.0
+            lows.append(low)
+            highs.append(high)
+            scales.append(scale)
+            starts.append(len(buckets))
+            # The segment starting below each bucket's lower edge, and an
+            # extra bucket for the highest temperature
+            for bucket in range(count + 1):
+                edge = low + (high - low) * bucket / count
+                segment = max(bisect.bisect_left(knots, edge) - 1, 0)
+                buckets.append(first + segment)
+        self._index = {'lowers': np.array(lowers),
+                       'values': np.array(values),
+                       'slopes': np.array(slopes),
+                       'uppers': np.array(uppers),
+                       'lows': np.array(lows),
+                       'highs': np.array(highs),
+                       'scales': np.array(scales),
+                       'starts': np.array(starts, dtype=np.intp),
+                       'buckets': np.array(buckets, dtype=np.intp)}
+
+    def allowable_batch(self, materials, temperatures):
+        ''' Return an array of the allowable stresses for many (material,
+        temperature) pairs, with numpy.
+
+        materials are names or integer codes (see code), and the arguments are
+        broadcast against each other. The allowable stress is nan above the
+        highest temperature of a material, or for a nan temperature.'''
+        _require_numpy()
+        if self._index is None:
+            self._build_index()
+        index = self._index
+        codes = np.asarray(materials)
+        if codes.dtype.kind in 'USO':
+            codes = self.code(codes)
+        elif codes.dtype.kind not in 'iu':
+            raise TypeError('materials must be names or integer codes')
+        if codes.size and (codes.min() < 0 or codes.max() >= len(self)):
+            raise ValueError('unknown material code')
+        codes, temperatures = np.broadcast_arrays(
+            codes, np.asarray(temperatures, dtype=np.float64))
+        lows = index['lows'].take(codes)
+        highs = index['highs'].take(codes)
+        # Below the lowest temperature, use the first value. The designs
+        # above the highest (or nan) are set to nan at the end.
+        clipped = np.fmin(np.fmax(temperatures, lows), highs)
+        bucket = ((clipped - lows) * index['scales'].take(codes)).astype(
+            np.intp)
+        bucket += index['starts'].take(codes)
+        segment = index['buckets'].take(bucket)
+        # Step past any temperatures inside the buckets
+        while True:
+            step = index['uppers'].take(segment) <= clipped
+            if not step.any():
+                break
+            segment += step
+        result = (index['values'].take(segment)
+                  + index['slopes'].take(segment)
+                  * (clipped - index['lowers'].take(segment)))
+        with np.errstate(invalid='ignore'):
+            above = ~(temperatures <= highs)
+        if np.any(above):
+            result = np.where(above, np.nan, result)
+        return result
+
+    def vessel(self, material, temperature, pExt, pInt, OD, ID):
+        ''' Return a Vessel with the allowable stress of the material at the
+        temperature.'''
+        return Vessel(pExt, pInt, OD, ID,
+                      self.allowable(material, temperature), units=self.units)
+
+    def batch(self, materials, temperatures, pExt, pInt, OD, ID, **kwargs):
+        ''' Return a VesselBatch with the allowable stress of each material at
+        its temperature. The other keyword arguments are passed to
+        VesselBatch.'''
+        allowable_stress = self.allowable_batch(materials, temperatures)
+        return VesselBatch(pExt, pInt, OD, ID, allowable_stress,
+                           units=self.units, **kwargs)
+
+
+def _table(name, pairs):
+    pairs = sorted((float(t), float(a)) for t, a in pairs)
+    if not pairs:
+        raise ValueError(f'no temperatures for {name}')
+    temperatures = tuple(t for t, _ in pairs)
+    allowables = tuple(a for _, a in pairs)
+    if any(t0 == t1 for t0, t1 in zip(temperatures, temperatures[1:])):
+        raise ValueError(f'repeated temperature for {name}')
+    if min(allowables) <= 0:
+        raise ValueError(f'allowable stresses must be positive for {name}')
+    return MaterialTable(name, temperatures, allowables)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Monte Carlo reliability: the probability that a design fails (SF < 1), given
+the scatter in its dimensions, material strength and pressures.
+
+The samples are drawn in chunks, which are evaluated with VesselBatch and
+reduced to running statistics, so the memory used does not depend on the
+number of samples. Each chunk has its own random stream, derived from the
+seed and the chunk number, and the chunks are reduced in order, so the results
+are the same for any number of worker processes.
+"""
+import collections
+import concurrent.futures
+import math
+import os
+import statistics
+from collections import namedtuple
+from .PressureVessels import VesselBatch, VesselSpec, np, _require_numpy
+
+# The safety factor histogram, used for the quantiles: log-spaced bins from
+# 10**HISTOGRAM_DECADES[0] to 10**HISTOGRAM_DECADES[1], with values outside of
+# that range counted in an underflow and an overflow bin
+HISTOGRAM_DECADES = (-3, 3)
+BINS_PER_DECADE = 1000
+
+
+class Normal(namedtuple('Normal', ('mean', 'std'))):
+    ''' A normally distributed value.'''
+    __slots__ = ()
+
+    def sample(self, rng, size):
+        return rng.normal(self.mean, self.std, size)
+
+
+class Uniform(namedtuple('Uniform', ('low', 'high'))):
+    ''' A value distributed uniformly between low and high, such as a
+    dimension within its tolerance band.'''
+    __slots__ = ()
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+
+class Lognormal(namedtuple('Lognormal', ('mean', 'std'))):
+    ''' A positive value with a lognormal distribution, such as a material
+    strength. mean and std are of the value itself, not its logarithm.'''
+    __slots__ = ()
+
+    def sample(self, rng, size):
+        sigma2 = math.log1p((self.std / self.mean)**2)
+        return rng.lognormal(math.log(self.mean) - sigma2 / 2,
+                             math.sqrt(sigma2), size)
+
+
+def _sample(distribution, rng, size):
+    # Fixed values are plain numbers, and are broadcast by VesselBatch
+    if isinstance(distribution, (int, float)):
+        return float(distribution)
+    return distribution.sample(rng, size)
+
+
+class ReliabilityResult():
+    ''' The running statistics of a Monte Carlo simulation.
+
+    samples is the number of valid samples: samples with nan parameters are
+    counted in invalid instead. A failure is a sample with SF < threshold,
+    and a sample whose wall disappears (OD <= ID) fails with SF = 0. A
+    sample with no net pressure has an infinite safety factor, and the mean
+    and std are of the finite safety factors.
+    '''
+
+    def __init__(self, threshold, seed):
+        self.threshold = threshold
+        self.seed = seed
+        self.samples = 0
+        self.invalid = 0
+        self.failures = 0
+        self._finite = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        nbins = (HISTOGRAM_DECADES[1] - HISTOGRAM_DECADES[0]) * BINS_PER_DECADE
+        # With an underflow bin first and an overflow bin last
+        self.histogram = np.zeros(nbins + 2, dtype=np.int64)
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({self.samples} samples, '
+                f'P(SF < {self.threshold}) = {self.failure_probability:.4g})')
+
+    def _reduce(self, partial):
+        ''' Add the statistics of one chunk, combining the means and
+        variances with Chan's parallel algorithm.'''
+        (count, invalid, failures, finite, mean, m2, minimum, maximum,
+         histogram) = partial
+        self.invalid += invalid
+        if not count:
+            return
+        self.samples += count
+        self.failures += failures
+        if finite:
+            total = self._finite + finite
+            delta = mean - self.mean
+            self.mean += delta * finite / total
+            self._m2 += m2 + delta**2 * self._finite * finite / total
+            self._finite = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+        self.histogram += histogram
+
+    @property
+    def variance(self):
+        ''' The sample variance of the finite safety factors.'''
+        if self._finite < 2:
+            return math.nan
+        return self._m2 / (self._finite - 1)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def failure_probability(self):
+        if not self.samples:
+            return math.nan
+        return self.failures / self.samples
+
+    def failure_interval(self, confidence=0.95):
+        ''' Return the (low, high) Wilson score interval of the failure
+        probability, which is also useful when no failures were sampled.'''
+        n = self.samples
+        if not n:
+            return (math.nan, math.nan)
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        p = self.failures / n
+        center = (p + z**2 / (2*n)) / (1 + z**2 / n)
+        half = (z / (1 + z**2 / n)) * math.sqrt(p*(1 - p)/n + z**2 / (4*n**2))
+        low = 0.0 if self.failures == 0 else max(0.0, center - half)
+        high = 1.0 if self.failures == n else min(1.0, center + half)
+        return (low, high)
+
+    def quantile(self, q):
+        ''' Return the q quantile of the safety factor, from the histogram.
+        Within the histogram range, the error is less than the bin width
+        (about 0.23%).'''
+        if not self.samples:
+            return math.nan
+        if not 0 <= q <= 1:
+            raise ValueError('q must be between 0 and 1')
+        cumulative = np.cumsum(self.histogram)
+        rank = q * self.samples
+        index = int(np.searchsorted(cumulative, rank, side='left'))
+        index = min(index, len(self.histogram) - 1)
+        if index == 0:
+            return self.minimum
+        if index == len(self.histogram) - 1:
+            return self.maximum
+        # Interpolate within the bin, on the log scale
+        below = cumulative[index - 1]
+        fraction = (rank - below) / self.histogram[index]
+        log_value = (HISTOGRAM_DECADES[0]
+                     + (index - 1 + fraction) / BINS_PER_DECADE)
+        return min(max(10**log_value, self.minimum), self.maximum)
+
+
+def _evaluate_chunk(distributions, seed, index, size, threshold):
+    ''' Sample and evaluate one chunk, and return its statistics.'''
+    rng = np.random.default_rng(np.random.SeedSequence(seed,
+                                                       spawn_key=(index,)))
+    values = [_sample(distribution, rng, size)
+              for distribution in distributions]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        SF = np.broadcast_to(VesselBatch(*values).SF, (size,))
+        OD, ID = np.broadcast_arrays(values[2], values[3])
+        # A sample without a wall fails
+        SF = np.where(np.broadcast_to(OD <= ID, (size,)), 0.0, SF)
+    SF = SF[~np.isnan(SF)]
+    count = len(SF)
+    if not count:
+        return (0, size, 0, 0, 0.0, 0.0, math.inf, -math.inf, 0)
+    finite = SF[np.isfinite(SF)]
+    mean = float(np.mean(finite)) if finite.size else 0.0
+    m2 = float(np.sum((finite - mean)**2))
+    # Histogram bins, from the logarithm of the safety factor
+    nbins = (HISTOGRAM_DECADES[1] - HISTOGRAM_DECADES[0]) * BINS_PER_DECADE
+    with np.errstate(divide='ignore'):
+        position = (np.log10(SF) - HISTOGRAM_DECADES[0]) * BINS_PER_DECADE
+    bins = np.clip(np.floor(position), -1, nbins).astype(np.int64) + 1
+    histogram = np.bincount(bins, minlength=nbins + 2)
+    return (count, size - count, int(np.count_nonzero(SF < threshold)),
+            finite.size, mean, m2, float(SF.min()), float(SF.max()),
+            histogram)
+
+
+def simulate(pExt, pInt, OD, ID, allowable_stress, *, samples=1000000,
+             chunksize=250000, seed=None, workers=1, threshold=1.0):
+    ''' Estimate the distribution of the safety factor, and the probability
+    of failure (SF < threshold), by Monte Carlo sampling.
+
+    Each parameter is a number, for a fixed value, or a distribution such as
+    Normal, Uniform or Lognormal. The samples are evaluated chunksize at a
+    time, by the given number of worker processes (None for one per CPU; 1
+    runs in this process).
+    The results are reproducible for a given seed, and the seed used is kept
+    in the result. Return a ReliabilityResult.'''
+    _require_numpy()
+    distributions = (pExt, pInt, OD, ID, allowable_stress)
+    for name, distribution in zip(VesselSpec._fields, distributions):
+        if not (isinstance(distribution, (int, float))
+                or hasattr(distribution, 'sample')):
+            raise ValueError(f'{name} must be a number or a distribution')
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    result = ReliabilityResult(threshold, seed)
+    chunks = [(index, min(chunksize, samples - start))
+              for index, start in enumerate(range(0, samples, chunksize))]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for index, size in chunks:
+            result._reduce(_evaluate_chunk(distributions, seed, index, size,
+                                           threshold))
+        return result
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        # Keep a few chunks per worker in flight, and reduce them in order
+        pending = collections.deque()
+        for index, size in chunks:
+            pending.append(executor.submit(_evaluate_chunk, distributions,
+                                           seed, index, size, threshold))
+            if len(pending) >= 4 * workers:
+                result._reduce(pending.popleft().result())
+        while pending:
+            result._reduce(pending.popleft().result())
+    return result
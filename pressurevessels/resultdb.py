@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+A persistent result database, shared between processes, for evaluations and
+sizing results.
+
+The database is a SQLite file (with the standard library sqlite3 module) in
+WAL mode, so any number of processes can read it while one writes. Each
+entry is keyed on its inputs, normalized to a number of significant digits,
+on the unit system and on the library version, so results from an older
+version are never used. Sizing a design which was sized before, by any
+process, is one indexed read instead of a solver run.
+
+Batches are looked up with one query, by joining a temporary table of their
+keys against the index, and stored with one transaction.
+"""
+import math
+import sqlite3
+import threading
+from collections import namedtuple
+from . import __version__, conversions, sizing
+from .PressureVessels import VesselResult, VesselSpec, evaluate, np, \
+    _require_numpy
+
+# The layout of the database file, which is checked when it is opened
+SCHEMA = 1
+
+# The key and value columns of each table
+_TABLES = {
+    'evaluations': (VesselSpec._fields, VesselResult._fields),
+    'sizings': (('diameter', 'pExt', 'pInt', 'fixed', 'allowable_stress',
+                 'target_SF', 'xtol'),
+                ('value', 'SF')),
+}
+
+_Statements = namedtuple('_Statements',
+                         ('select', 'insert', 'fill', 'join', 'empty'))
+
+
+def _statements(table):
+    ''' Return the SQL statements for a table, with the version and units
+    as the first parameters.'''
+    keys, values = _TABLES[table]
+    scope = f'{table}.version = ? AND {table}.units = ?'
+    marks = ', '.join('?' * (2 + len(keys) + len(values)))
+    return _Statements(
+        select=(f'SELECT {", ".join(values)} FROM {table} WHERE {scope} AND '
+                + ' AND '.join(f'{name} = ?' for name in keys)),
+        insert=f'INSERT OR REPLACE INTO {table} VALUES ({marks})',
+        fill=(f'INSERT INTO {table}_lookup VALUES '
+              f'({", ".join("?" * (1 + len(keys)))})'),
+        join=(f'SELECT k.row, '
+              + ', '.join(f'{table}.{name}' for name in values)
+              + f' FROM {table}_lookup AS k JOIN {table} ON {scope} AND '
+              + ' AND '.join(f'{table}.{name} = k.{name}' for name in keys)),
+        empty=f'DELETE FROM {table}_lookup')
+
+
+_SQL = {table: _statements(table) for table in _TABLES}
+
+DatabaseInfo = namedtuple('DatabaseInfo',
+                          ('hits', 'misses', 'evaluations', 'sizings',
+                           'stale'))
+DatabaseInfo.__doc__ = ''' The statistics of a ResultDatabase.
+
+hits and misses count the lookups by this connection, evaluations and sizings
+count the entries for the current library version, and stale counts the
+entries from other versions, which are removed by invalidate.'''
+
+
+def _bits(digits):
+    ''' The number of significant bits for a number of significant
+    digits.'''
+    return math.ceil(digits * math.log2(10))
+
+
+def _normalize(value, bits):
+    ''' Round a value to a number of significant bits, to make a key, or
+    return None for nan, which cannot be a key.
+
+    The rounding is exact, so _normalize_columns gives the same keys.'''
+    value = float(value)
+    if math.isnan(value):
+        return None
+    if math.isinf(value):
+        return value
+    mantissa, exponent = math.frexp(value)
+    # Adding zero turns -0.0 into 0.0
+    return math.ldexp(round(math.ldexp(mantissa, bits)), exponent - bits) + 0.0
+
+
+def _normalize_columns(columns, bits):
+    ''' Round columns of values with numpy, as _normalize, and return the
+    keys of the rows (None for a row with nan).'''
+    mantissa, exponent = np.frexp(np.column_stack(columns))
+    with np.errstate(invalid='ignore'):
+        values = np.ldexp(np.rint(np.ldexp(mantissa, bits)),
+                          exponent - bits) + 0.0
+    valid = ~np.isnan(values).any(axis=1)
+    keys = list(map(tuple, values.tolist()))
+    if not valid.all():
+        for row in np.flatnonzero(~valid).tolist():
+            keys[row] = None
+    return keys
+
+
+def _float(value):
+    # SQLite stores nan as NULL
+    return math.nan if value is None else value
+
+
+def _xtol(diameter):
+    ''' The default tolerance of the sizing functions for a diameter.'''
+    return sizing.OD_XTOL if diameter == 'OD' else sizing.ID_XTOL
+
+
+class ResultDatabase():
+    ''' A persistent store of VesselResults and sizing results, in a SQLite
+    file.
+
+    It can be used as the cache of a Vessel, of the sizing functions or of an
+    assembly, in place of an EvaluationCache, and then the sizing results are
+    looked up before running the solver. units is the unit system of the
+    designs, and inputs which agree to about digits significant digits share
+    an entry. timeout is the number of seconds to wait for another process
+    which is writing. Use as a context manager, or call close() when
+    finished.
+    '''
+
+    def __init__(self, path, *, units='US', digits=12, timeout=30.0,
+                 version=__version__):
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        self.path = path
+        self.units = units
+        self.digits = digits
+        self._bits = _bits(digits)
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout,
+                                           check_same_thread=False)
+        try:
+            self._create()
+        except BaseException:
+            self._connection.close()
+            raise
+
+    def _create(self):
+        connection = self._connection
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        schema = connection.execute('PRAGMA user_version').fetchone()[0]
+        if schema not in (0, SCHEMA):
+            raise ValueError(f'{self.path} is a result database of a newer '
+                             f'layout ({schema})')
+        with connection:
+            for table, (keys, values) in _TABLES.items():
+                columns = ', '.join(('version', 'units') + keys + values)
+                primary = ', '.join(('version', 'units') + keys)
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ({columns}, '
+                    f'PRIMARY KEY ({primary})) WITHOUT ROWID')
+                # The keys of a batch, joined against the table to look it up
+                connection.execute(
+                    f'CREATE TEMP TABLE IF NOT EXISTS {table}_lookup '
+                    f'(row INTEGER PRIMARY KEY, {", ".join(keys)})')
+            connection.execute(f'PRAGMA user_version = {SCHEMA}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({self.path!r}, units={self.units!r}, '
+                f'version={self.version!r})')
+
+    def close(self):
+        self._connection.close()
+
+    def _lookup(self, table, keys):
+        ''' Return the stored values for each key, or None if there are none
+        (or the key is None).'''
+        sql = _SQL[table]
+        found = [None] * len(keys)
+        rows = [(row,) + key for row, key in enumerate(keys)
+                if key is not None]
+        if not rows:
+            return found
+        scope = (self.version, self.units)
+        with self._lock:
+            connection = self._connection
+            if len(rows) == 1:
+                row = rows[0]
+                found[row[0]] = connection.execute(sql.select,
+                                                   scope + row[1:]).fetchone()
+                return found
+            with connection:
+                connection.executemany(sql.fill, rows)
+                for result in connection.execute(sql.join, scope):
+                    found[result[0]] = result[1:]
+                connection.execute(sql.empty)
+        return found
+
+    def _insert(self, table, entries):
+        ''' Store (key, values) pairs, in one transaction.'''
+        scope = (self.version, self.units)
+        rows = [scope + key + tuple(value)
+                for key, value in entries if key is not None]
+        if not rows:
+            return
+        with self._lock, self._connection as connection:
+            connection.executemany(_SQL[table].insert, rows)
+
+    def _count(self, found):
+        hits = sum(value is not None for value in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(found) - hits
+
+    def _key(self, values):
+        key = tuple(_normalize(value, self._bits) for value in values)
+        return None if None in key else key
+
+    def lookup(self, specs):
+        ''' Return the stored VesselResult of each design, or None if it has
+        not been evaluated.'''
+        found = self._lookup('evaluations', [self._key(spec)
+                                             for spec in specs])
+        self._count(found)
+        return [None if values is None
+                else VesselResult(bool(values[0]), *map(_float, values[1:]))
+                for values in found]
+
+    def insert(self, specs, results):
+        ''' Store the VesselResults of designs.'''
+        self._insert('evaluations', [(self._key(spec), result)
+                                     for spec, result in zip(specs, results)])
+
+    def evaluate_many(self, specs):
+        ''' Return the VesselResult of each design, evaluating and storing
+        the ones which are not in the database.'''
+        specs = list(specs)
+        results = self.lookup(specs)
+        missing = [row for row, result in enumerate(results) if result is None]
+        for row in missing:
+            results[row] = evaluate(specs[row])
+        self.insert([specs[row] for row in missing],
+                    [results[row] for row in missing])
+        return results
+
+    def evaluate(self, spec):
+        ''' Return the VesselResult for a design, evaluating it if needed.
+
+        spec is a VesselSpec, or any sequence of the five parameters.'''
+        return self.evaluate_many([spec])[0]
+
+    def safety_factor(self, pExt, pInt, OD, ID, allowable_stress):
+        ''' Return the safety factor of a design, using the database.'''
+        return self.evaluate(VesselSpec(pExt, pInt, OD, ID,
+                                        allowable_stress)).SF
+
+    def size(self, diameter, pExt, pInt, fixed, allowable_stress, *,
+             target_SF=1.0, wall_ratio=None, xtol=None):
+        ''' Size one diameter (OD or ID) of a design, with the other diameter
+        fixed, as sizing.size_OD or sizing.size_ID, and return a
+        sizing.SizingResult.
+
+        A stored result reports no iterations or evaluations. Otherwise, the
+        design is sized (using wall_ratio as a first guess) and stored.'''
+        if diameter not in ('OD', 'ID'):
+            raise ValueError(f'diameter must be OD or ID, not {diameter}')
+        xtol = _xtol(diameter) if xtol is None else xtol
+        key = self._key((pExt, pInt, fixed, allowable_stress, target_SF,
+                         xtol))
+        key = None if key is None else (diameter,) + key
+        found = self._lookup('sizings', [key])
+        self._count(found)
+        if found[0] is not None:
+            return sizing.SizingResult(*map(_float, found[0]), 0, 0)
+        function = sizing.size_OD if diameter == 'OD' else sizing.size_ID
+        result = function(pExt, pInt, fixed, allowable_stress,
+                          target_SF=target_SF, wall_ratio=wall_ratio,
+                          xtol=xtol)
+        self._insert('sizings', [(key, result[:2])])
+        return result
+
+    def size_batch(self, diameter, pExt, pInt, fixed, allowable_stress, *,
+                   target_SF=1.0):
+        ''' Size one diameter of many designs, as sizing.size_OD_batch or
+        sizing.size_ID_batch, and return a sizing.BatchSizingResult.
+
+        The stored results are looked up together, and only the other designs
+        are sized (iterations counts their solver iterations) and stored. The
+        designs which cannot reach target_SF are not stored.'''
+        _require_numpy()
+        if diameter not in ('OD', 'ID'):
+            raise ValueError(f'diameter must be OD or ID, not {diameter}')
+        function = (sizing.size_OD_batch if diameter == 'OD'
+                    else sizing.size_ID_batch)
+        xtol = _xtol(diameter)
+        columns = sizing._batch_columns(pExt, pInt, fixed, allowable_stress)
+        keys = [None if key is None else (diameter,) + key
+                for key in _normalize_columns(
+                    columns + [np.full(len(columns[0]), target_SF),
+                               np.full(len(columns[0]), xtol)], self._bits)]
+        found = self._lookup('sizings', keys)
+        self._count(found)
+
+        value = np.full(len(keys), np.nan)
+        SF = np.full(len(keys), np.nan)
+        hits = [row for row, values in enumerate(found) if values is not None]
+        if hits:
+            value[hits], SF[hits] = np.array([found[row] for row in hits],
+                                             dtype=float).T
+        converged = ~np.isnan(value)
+        missing = np.flatnonzero(~converged)
+        iterations = 0
+        if missing.size:
+            result = function(*(column[missing] for column in columns),
+                              target_SF=target_SF, xtol=xtol)
+            value[missing] = result.value
+            SF[missing] = result.SF
+            converged[missing] = result.converged
+            iterations = result.iterations
+            self._insert('sizings', [
+                (keys[row], pair) for row, pair, ok in zip(
+                    missing.tolist(),
+                    zip(result.value.tolist(), result.SF.tolist()),
+                    result.converged.tolist()) if ok])
+        return sizing.BatchSizingResult(value, SF, converged, iterations)
+
+    @property
+    def hit_rate(self):
+        ''' The fraction of lookups that were found in the database.'''
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def info(self):
+        ''' Return the database statistics, as a DatabaseInfo.'''
+        counts = []
+        with self._lock:
+            for table in _TABLES:
+                counts.append(self._connection.execute(
+                    f'SELECT count(*) FROM {table} WHERE version = ?',
+                    (self.version,)).fetchone()[0])
+            stale = sum(self._connection.execute(
+                f'SELECT count(*) FROM {table} WHERE version != ?',
+                (self.version,)).fetchone()[0] for table in _TABLES)
+            return DatabaseInfo(self.hits, self.misses, *counts, stale)
+
+    def invalidate(self, *, everything=False):
+        ''' Remove the entries from other library versions, or every entry,
+        and return the number removed.'''
+        removed = 0
+        with self._lock, self._connection as connection:
+            for table in _TABLES:
+                if everything:
+                    cursor = connection.execute(f'DELETE FROM {table}')
+                else:
+                    cursor = connection.execute(
+                        f'DELETE FROM {table} WHERE version != ?',
+                        (self.version,))
+                removed += cursor.rowcount
+        return removed
+
+    def vacuum(self):
+        ''' Rebuild the database file, to return the space of removed entries
+        to the file system.'''
+        with self._lock:
+            self._connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self._connection.execute('VACUUM')
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Analytic first derivatives of the stresses and safety factor with respect to
+the five design parameters.
+
+With u = ID**2 / (OD**2 - ID**2), the von Mises stresses from the Lame
+equations are sqrt(3)*(1 + u)*|pInt - pExt| on the inner surface and
+sqrt(3)*u*|pInt - pExt| on the outer surface. So the maximum stress is always
+on the inner surface, and every derivative has a closed form. The only
+switches are the sign of the pressure difference (internal or external case)
+and whether the maximum or the average stress criterion sets the safety
+factor. These are reported with the derivatives.
+"""
+import math
+from collections import namedtuple
+from .PressureVessels import (VesselBatch, VesselSpec, evaluate, np,
+                              _max_averagestresses, _require_numpy)
+
+SQRT3 = math.sqrt(3)
+
+Gradient = namedtuple('Gradient', VesselSpec._fields)
+Gradient.__doc__ = ''' The derivatives of one value with respect to each of
+the design parameters.'''
+
+Sensitivity = namedtuple('Sensitivity',
+                         ('maxstress', 'averagestress', 'SF', 'd_maxstress',
+                          'd_averagestress', 'd_SF', 'external', 'inner',
+                          'average_governs'))
+Sensitivity.__doc__ = ''' The stresses and safety factor of a design, with
+their Gradients.
+
+external is True for a net external pressure, inner is True when the maximum
+stress is on the inner surface, and average_governs is True when the safety
+factor is set by the average stress criterion instead of the maximum stress.
+For vectorized sensitivities, each field is an array (and each Gradient is a
+Gradient of arrays).'''
+
+
+def _gradients(pExt, pInt, OD, ID, allowable_stress, maxstress,
+               averagestress, external, where, sign):
+    ''' Return the gradients of maxstress, averagestress and SF, and whether
+    the average criterion governs. where and sign are for scalars or arrays.'''
+    OD2 = OD**2
+    ID2 = ID**2
+    area = OD2 - ID2
+    u = ID2 / area
+    du = (0.0, 0.0, -2 * OD * ID2 / area**2, 2 * ID * OD2 / area**2, 0.0)
+    difference = pInt - pExt
+    magnitude = abs(difference)
+    direction = sign(difference)
+    dmagnitude = (-direction, direction, 0.0, 0.0, 0.0)
+
+    d_maxstress = Gradient(*(SQRT3 * (dm * (1 + u) + magnitude * dU)
+                             for dm, dU in zip(dmagnitude, du)))
+    d_averagestress = Gradient(*(SQRT3 * (dm * (0.5 + u) + magnitude * dU)
+                                 for dm, dU in zip(dmagnitude, du)))
+
+    limit_external, limit_internal = _max_averagestresses(allowable_stress)
+    limit = where(external, limit_external, limit_internal)
+    # As in _safetyfactors, the maximum criterion is used for a tie
+    average_governs = limit / averagestress < allowable_stress / maxstress
+    # SF = allowable_stress / maxstress, or limit / averagestress, and the
+    # limit is proportional to the allowable stress
+    d_SF_max = [-allowable_stress / maxstress**2 * d for d in d_maxstress[:4]]
+    d_SF_max.append(1 / maxstress)
+    d_SF_average = [-limit / averagestress**2 * d
+                    for d in d_averagestress[:4]]
+    d_SF_average.append(limit / allowable_stress / averagestress)
+    d_SF = Gradient(*(where(average_governs, a, m)
+                      for a, m in zip(d_SF_average, d_SF_max)))
+    return d_maxstress, d_averagestress, d_SF, average_governs
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def sensitivity(spec):
+    ''' Return the stresses and safety factor of a design, given as a
+    VesselSpec (or any sequence of the five parameters), with their analytic
+    derivatives, as a Sensitivity.'''
+    pExt, pInt, OD, ID, allowable_stress = spec
+    result = evaluate(spec)
+    d_maxstress, d_averagestress, d_SF, average_governs = _gradients(
+        pExt, pInt, OD, ID, allowable_stress, result.maxstress,
+        result.averagestress, result.external,
+        lambda condition, a, b: a if condition else b, _sign)
+    # The outer surface stress is 2*average - max
+    inner = result.maxstress >= 2 * result.averagestress - result.maxstress
+    return Sensitivity(result.maxstress, result.averagestress, result.SF,
+                       d_maxstress, d_averagestress, d_SF, result.external,
+                       inner, average_governs)
+
+
+def sensitivity_batch(pExt, pInt, OD, ID, allowable_stress):
+    ''' Return the stresses and safety factors of many designs, given as
+    columns of values (as for VesselBatch), with their analytic derivatives,
+    as a Sensitivity of arrays.'''
+    _require_numpy()
+    batch = VesselBatch(pExt, pInt, OD, ID, allowable_stress)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gradients = _gradients(batch.pExt, batch.pInt, batch.OD, batch.ID,
+                               batch.allowable_stress, batch.maxstress,
+                               batch.averagestress, batch.external, np.where,
+                               np.sign)
+    shape = batch.SF.shape
+    d_maxstress, d_averagestress, d_SF = (
+        Gradient(*(np.array(np.broadcast_to(d, shape)) for d in gradient))
+        for gradient in gradients[:3])
+    inner = batch.maxstress >= 2 * batch.averagestress - batch.maxstress
+    return Sensitivity(batch.maxstress, batch.averagestress, batch.SF,
+                       d_maxstress, d_averagestress, d_SF, batch.external,
+                       inner, gradients[3])
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+A local evaluation service, used by "python -m pressurevessels serve".
+
+Clients connect over TCP (on localhost) or a Unix socket, and send one JSON
+request per line. Each response is one line of JSON, with the id of its
+request. Responses on one connection may arrive out of order, so a client can
+send many requests without waiting. Numbers which are not finite, such as the
+safety factor of a design with no net pressure, are sent as null.
+
+    {"id": 1, "op": "evaluate", "design": {"pExt": 15, "pInt": 0, ...}}
+    {"id": 2, "op": "size", "size": "OD", "target_SF": 1.5, "design": {...}}
+    {"id": 3, "op": "metrics"}
+
+Requests which arrive within a short window of each other are evaluated
+together, as one batch (see batchio.evaluate_rows) in a worker thread, so the
+cost per request is much lower than building a Vessel for each one.
+"""
+import asyncio
+import collections
+import functools
+import json
+import math
+import time
+from .PressureVessels import Vessel, VesselSpec
+from . import batchio, conversions, sizing
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Seconds to wait for more requests before evaluating a batch
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 1000
+# Number of recent requests kept for the latency percentiles
+LATENCY_SAMPLES = 10000
+
+OPERATIONS = ('evaluate', 'size', 'metrics')
+
+
+class RequestError(ValueError):
+    ''' A request which cannot be evaluated.'''
+
+
+class Metrics():
+    ''' Counters of the requests and batches, with the latencies of recent
+    requests.'''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.max_batch = max(self.max_batch, size)
+
+    def record_request(self, latency):
+        self.requests += 1
+        self.latencies.append(latency)
+
+    def snapshot(self):
+        ''' Return the metrics as a dictionary, with the latencies in
+        milliseconds.'''
+        latencies = sorted(self.latencies)
+        percentiles = {}
+        for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99),
+                               ('max', 1.0)):
+            if latencies:
+                index = min(len(latencies) - 1,
+                            math.ceil(fraction * len(latencies)) - 1)
+                percentiles[name] = latencies[index] * 1000
+            else:
+                percentiles[name] = None
+        elapsed = time.monotonic() - self.started
+        return {'requests': self.requests,
+                'errors': self.errors,
+                'batches': self.batches,
+                'mean_batch': (self.requests / self.batches
+                               if self.batches else None),
+                'max_batch': self.max_batch,
+                'requests_per_second': self.requests / elapsed if elapsed else None,
+                'latency_ms': percentiles}
+
+
+class EvaluationService():
+    ''' Evaluate and size designs for clients, coalescing concurrent requests
+    into batches.
+
+    Requests are collected for up to window seconds after the first one, or
+    until max_batch are waiting, and then evaluated together. With batching
+    False, each request is evaluated as it arrives, with its own Vessel. units
+    is the unit system of the designs and results.
+    '''
+
+    def __init__(self, *, units='US', window=DEFAULT_WINDOW,
+                 max_batch=DEFAULT_MAX_BATCH, batching=True):
+        if units not in conversions.SYSTEMS:
+            raise ValueError(f'unknown unit system: {units}')
+        if max_batch < 1:
+            raise ValueError('max_batch must be at least 1')
+        self.units = units
+        self.window = window
+        self.max_batch = max_batch
+        self.batching = batching
+        self.metrics = Metrics()
+        # Waiting requests for each kind of batch: (size, target_SF) keys,
+        # with lists of (design, future, arrival time) values
+        self._pending = {}
+        self._timers = {}
+        self._tasks = set()
+
+    def submit(self, request):
+        ''' Queue one request (a dictionary), and return a future of its
+        result. Raise RequestError if the request is not valid.'''
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            op = request.get('op', 'evaluate')
+            if op == 'metrics':
+                future.set_result(self.metrics.snapshot())
+                return future
+            if op not in OPERATIONS:
+                raise RequestError(f'unknown op: {op}')
+            size = request.get('size') if op == 'size' else None
+            if op == 'size' and size not in ('OD', 'ID'):
+                raise RequestError("size must be 'OD' or 'ID'")
+            target_SF = _number(request.get('target_SF', 1.0), 'target_SF')
+            design = _design(request.get('design'), size)
+        except RequestError:
+            self.metrics.errors += 1
+            raise
+
+        if not self.batching:
+            future.set_result(_evaluate_vessel(design, size, target_SF,
+                                               self.units))
+            self.metrics.record_batch(1)
+            self.metrics.record_request(time.perf_counter() - started)
+            return future
+
+        key = (size, target_SF)
+        pending = self._pending.setdefault(key, [])
+        pending.append((design, future, started))
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.window, self._flush, key)
+        return future
+
+    async def evaluate(self, request):
+        ''' Evaluate one request, and return its result.'''
+        return await self.submit(request)
+
+    def _flush(self, key):
+        ''' Start evaluating the waiting requests of one kind, as one batch.'''
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(key, [])
+        if not pending:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._evaluate_batch(key, pending))
+        # Keep a reference until the task is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate_batch(self, key, pending):
+        ''' Evaluate one batch in a worker thread, so that the event loop
+        keeps answering other requests, and set the futures of its requests.
+
+        If the batch fails, its rows are evaluated one at a time, so that
+        only the requests which cannot be evaluated get the error.'''
+        size, target_SF = key
+        evaluate = functools.partial(batchio.evaluate_rows, size=size,
+                                     target_SF=target_SF, units=self.units)
+        loop = asyncio.get_running_loop()
+        rows = [dict(design) for design, _, _ in pending]
+        try:
+            await loop.run_in_executor(None, evaluate, rows)
+            outcomes = [(row, None) for row in rows]
+        except Exception:
+            outcomes = await loop.run_in_executor(
+                None, _evaluate_each, evaluate,
+                [design for design, _, _ in pending])
+        self.metrics.record_batch(len(pending))
+        finished = time.perf_counter()
+        for (row, error), (_, future, started) in zip(outcomes, pending):
+            if error is not None:
+                self.metrics.errors += 1
+                if not future.done():
+                    future.set_exception(error)
+                continue
+            if not future.done():
+                future.set_result(row)
+            self.metrics.record_request(finished - started)
+
+    async def handle_connection(self, reader, writer):
+        ''' Answer the requests from one client, until it disconnects.
+
+        Each response is written as soon as its result is ready, so the
+        requests from one client can be batched together.'''
+        waiting = set()
+
+        def respond(response):
+            if not writer.is_closing():
+                writer.write(json.dumps(batchio._json_values(response)).encode()
+                             + b'\n')
+
+        def done(future, request_id):
+            waiting.discard(future)
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                respond({'id': request_id, 'result': future.result()})
+            else:
+                respond({'id': request_id, 'error': str(error)})
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError('a request must be a JSON object')
+                except ValueError as error:
+                    self.metrics.errors += 1
+                    respond({'id': None, 'error': str(error)})
+                    continue
+                try:
+                    future = self.submit(request)
+                except RequestError as error:
+                    respond({'id': request.get('id'), 'error': str(error)})
+                    continue
+                waiting.add(future)
+                future.add_done_callback(
+                    functools.partial(done, request_id=request.get('id')))
+                await writer.drain()
+            if waiting:
+                await asyncio.wait(waiting)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        ''' Start listening on a TCP port, or on a Unix socket if path is
+        given, and return the asyncio server.'''
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_connection,
+                                                   path=path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def _number(value, name):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise RequestError(f'{name} must be a number') from None
+    return value
+
+
+def _design(design, size):
+    if not isinstance(design, dict):
+        raise RequestError('design must be a JSON object')
+    names = [name for name in VesselSpec._fields if name != size]
+    missing = [name for name in names if name not in design]
+    if missing:
+        raise RequestError(f'missing field: {missing[0]}')
+    return {name: _number(design[name], name) for name in names}
+
+
+def _evaluate_each(evaluate, designs):
+    ''' Evaluate the designs one at a time, and return a (row, error) pair
+    for each one.'''
+    outcomes = []
+    for design in designs:
+        row = dict(design)
+        try:
+            evaluate([row])
+        except Exception as error:
+            outcomes.append((None, error))
+        else:
+            outcomes.append((row, None))
+    return outcomes
+
+
+def _evaluate_vessel(design, size, target_SF, units):
+    ''' Evaluate one design with its own Vessel, sizing it first if size is
+    'OD' or 'ID'.'''
+    row = dict(design)
+    if size is not None:
+        size_function = sizing.size_OD if size == 'OD' else sizing.size_ID
+        fixed = 'ID' if size == 'OD' else 'OD'
+        try:
+            row[size] = size_function(row['pExt'], row['pInt'], row[fixed],
+                                      row['allowable_stress'],
+                                      target_SF=target_SF).value
+            row['converged'] = True
+        except (ValueError, ZeroDivisionError):
+            row[size] = math.nan
+            row['converged'] = False
+    vessel = Vessel(**{name: row[name] for name in VesselSpec._fields},
+                    units=units)
+    try:
+        row.update((field, getattr(vessel, field))
+                   for field in batchio.RESULT_FIELDS)
+    except (ValueError, ZeroDivisionError):
+        # Designs with no net pressure have no stress, so no safety factor
+        row.update(dict.fromkeys(batchio.RESULT_FIELDS, math.nan))
+    return row
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None,
+                ready=None):
+    ''' Run the service until cancelled. ready is called with the server once
+    it is listening.'''
+    server = await service.start(host, port, path)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Sizing routines, which find the diameter that gives a target safety factor.
+
+The safety factor is evaluated with a pure function of the five design
+parameters, so sizing never modifies a Vessel. For a given pair of pressures
+and allowable stress, the safety factor depends only on the wall ratio OD/ID,
+so a previous answer is used as a warm start by keeping its wall ratio.
+"""
+import math
+from collections import namedtuple
+from .cache import EvaluationCache
+from .PressureVessels import (Vessel, VesselBatch, np, _stresses,
+                              _safetyfactors)
+
+# Relative tolerance used by the root finder, a few units of float precision
+_RTOL = 4 * 2.220446049250313e-16
+# First bracketing step on the wall thickness, for a guess from Barlow's
+# formula and for a warm start from a previous answer
+_COLD_STEP = 1.2
+_WARM_STEP = 1.001
+# Largest wall thickness tried when sizing OD, relative to the ID
+_MAX_WALL_GROWTH = 1000
+# Thinnest wall tried, relative to the fixed diameter, so that OD and ID
+# always differ by many units of float precision
+_MIN_WALL = 1e-9
+# Default tolerances on the sized diameter
+OD_XTOL = 0.00001
+ID_XTOL = 0.0001
+
+
+SizingResult = namedtuple('SizingResult',
+                          ('value', 'SF', 'iterations', 'evaluations'))
+SizingResult.__doc__ = ''' The result of sizing one diameter.
+
+value is the sized diameter, SF is the safety factor at that diameter,
+iterations counts the root finder steps, and evaluations counts every
+safety factor evaluation, including those used to find the bracket.'''
+
+
+BatchSizingResult = namedtuple('BatchSizingResult',
+                               ('value', 'SF', 'converged', 'iterations'))
+BatchSizingResult.__doc__ = ''' The result of sizing one diameter for many designs.
+
+value and SF are arrays of the sized diameters and their safety factors,
+converged is a boolean mask of the designs that were sized within the
+tolerance, and iterations is the number of lockstep solver iterations.
+Designs which cannot reach the target safety factor, or which have no net
+pressure to size the wall for, have a value of nan and are not converged.'''
+
+
+WallResult = namedtuple('WallResult', ('OD', 'ID', 'SF', 'area', 'mass'))
+WallResult.__doc__ = ''' The result of sizing both diameters for the lightest wall.
+
+area is the wall cross-section, and mass is the mass per unit length (the
+area times the density).'''
+
+
+BatchWallResult = namedtuple('BatchWallResult',
+                             ('OD', 'ID', 'SF', 'area', 'mass', 'feasible'))
+BatchWallResult.__doc__ = ''' The result of sizing both diameters for many designs.
+
+The fields are arrays, as for WallResult, and feasible is a boolean mask of
+the designs which reach the target safety factor within the bounds. The
+other designs have values of nan.'''
+
+
+def safety_factor(pExt, pInt, OD, ID, allowable_stress):
+    ''' Return the safety factor of a design, without creating a Vessel.
+
+    This is the same calculation as evaluate, without the other results.'''
+    maxstress, averagestress = _stresses(pExt, pInt, OD, ID)
+    return _safetyfactors(pExt > pInt, maxstress, averagestress,
+                          allowable_stress)[2]
+
+
+def _solver_safety_factor(cache):
+    ''' Return the safety factor function for a solver: the cache's, unless
+    it shares results between nearby designs, which could make the solver
+    accept a design from the safety factor of another.'''
+    if cache is None or (isinstance(cache, EvaluationCache)
+                         and cache.tolerance is not None):
+        return safety_factor
+    return cache.safety_factor
+
+
+def _is_database(cache):
+    ''' Return True if cache is a resultdb.ResultDatabase, which stores whole
+    sizing results.'''
+    if cache is None or isinstance(cache, EvaluationCache):
+        return False
+    from .resultdb import ResultDatabase
+    return isinstance(cache, ResultDatabase)
+
+
+def _brentq(f, xa, xb, fa, fb, xtol, maxiter=100):
+    ''' Find a root of f bracketed by xa and xb with Brent's method.
+
+    fa and fb are the (already known) values of f at xa and xb, with opposite
+    signs. Return the final bracket endpoint where f >= 0, its value of f,
+    and the number of iterations and new evaluations of f.'''
+    xpre, xcur = xa, xb
+    fpre, fcur = fa, fb
+    xblk = fblk = spre = scur = 0.0
+    evaluations = 0
+    for iteration in range(1, maxiter + 1):
+        if fpre * fcur < 0:
+            # The new point changed sign, keep the old one as the contrapoint
+            xblk, fblk = xpre, fpre
+            spre = scur = xcur - xpre
+        if abs(fblk) < abs(fcur):
+            # Keep the best estimate in xcur
+            xpre, xcur, xblk = xcur, xblk, xcur
+            fpre, fcur, fblk = fcur, fblk, fcur
+
+        delta = (xtol + _RTOL * abs(xcur)) / 2
+        sbis = (xblk - xcur) / 2
+        if fcur == 0 or abs(sbis) < delta:
+            break
+
+        if abs(spre) > delta and abs(fcur) < abs(fpre):
+            if xpre == xblk:
+                # Secant step
+                stry = -fcur * (xcur - xpre) / (fcur - fpre)
+            else:
+                # Inverse quadratic interpolation
+                dpre = (fpre - fcur) / (xpre - xcur)
+                dblk = (fblk - fcur) / (xblk - xcur)
+                stry = -fcur * (fblk*dblk - fpre*dpre) / (dblk * dpre * (fblk - fpre))
+            if 2 * abs(stry) < min(abs(spre), 3 * abs(sbis) - delta):
+                # Accept the interpolated step
+                spre, scur = scur, stry
+            else:
+                # Interpolation is not converging fast enough, bisect instead
+                spre, scur = sbis, sbis
+        else:
+            spre, scur = sbis, sbis
+
+        xpre, fpre = xcur, fcur
+        if abs(scur) > delta:
+            xcur += scur
+        else:
+            xcur += delta if sbis > 0 else -delta
+        fcur = f(xcur)
+        evaluations += 1
+
+    if fcur >= 0:
+        return xcur, fcur, iteration, evaluations
+    return xblk, fblk, iteration, evaluations
+
+
+def _size_wall(f, t0, t_min, t_max, xtol, step):
+    ''' Find the wall thickness where f changes sign, given a first guess t0.
+
+    f is a function of wall thickness that increases with the thickness.
+    The bracket is found by growing or shrinking the wall from the first
+    guess, starting with a factor of step and squaring it each time, so that
+    a good guess (e.g. a warm start) with a small step gives a tight bracket.
+    The wall is not shrunk below t_min: if f is still positive there, t_min
+    is the result. Return the results of _brentq, with the bracket
+    evaluations included.'''
+    t = min(max(t0, t_min), t_max)
+    ft = f(t)
+    evaluations = 1
+    if ft >= 0:
+        # Shrink the wall until the safety factor is too small
+        hi, fhi = t, ft
+        while True:
+            if hi <= t_min:
+                return hi, fhi, 0, evaluations
+            lo = max(hi / step, t_min)
+            flo = f(lo)
+            evaluations += 1
+            if flo < 0:
+                break
+            hi, fhi = lo, flo
+            step *= step
+    else:
+        # Grow the wall until the safety factor is large enough
+        lo, flo = t, ft
+        while lo < t_max:
+            hi = min(lo * step, t_max)
+            fhi = f(hi)
+            evaluations += 1
+            if fhi >= 0:
+                break
+            lo, flo = hi, fhi
+            step *= step
+        else:
+            raise ValueError('no wall thickness reaches the target safety '
+                             'factor')
+
+    t, ft, iterations, n = _brentq(f, lo, hi, flo, fhi, xtol)
+    return t, ft, iterations, evaluations + n
+
+
+def size_OD(pExt, pInt, ID, allowable_stress, *, target_SF=1.0,
+            wall_ratio=None, xtol=OD_XTOL, cache=None):
+    ''' Return the smallest OD with safety factor >= target_SF, for a fixed ID.
+
+    wall_ratio is an optional first guess for OD/ID, such as the ratio from a
+    previous answer. Otherwise, the first guess is from Barlow's formula.
+    If an EvaluationCache is given, the safety factors are evaluated with it,
+    and a resultdb.ResultDatabase is searched for the whole result first.
+    The result is a SizingResult. Raise ValueError if there is no net
+    pressure, or no wall thickness reaches the target safety factor.'''
+    if pExt == pInt:
+        raise ValueError('there is no net pressure to size the wall for')
+    if _is_database(cache):
+        return cache.size('OD', pExt, pInt, ID, allowable_stress,
+                          target_SF=target_SF, wall_ratio=wall_ratio,
+                          xtol=xtol)
+    sf = _solver_safety_factor(cache)
+
+    def f(thickness):
+        OD = ID + 2*thickness
+        return sf(pExt, pInt, OD, ID, allowable_stress) - target_SF
+
+    if wall_ratio is None:
+        thickness = Vessel._barlow_thickness(abs(pExt - pInt), ID,
+                                             allowable_stress)
+        step = _COLD_STEP
+    else:
+        thickness = (wall_ratio - 1) * ID / 2
+        step = _WARM_STEP
+    # The wall thickness is not limited for a fixed ID, but the safety factor
+    # approaches a limit for a thick wall, so stop after a large wall ratio
+    t_max = max(ID, thickness) * _MAX_WALL_GROWTH
+    t, ft, iterations, evaluations = _size_wall(f, thickness, ID * _MIN_WALL,
+                                                t_max, xtol / 2, step)
+    return SizingResult(ID + 2*t, ft + target_SF, iterations, evaluations)
+
+
+def size_ID(pExt, pInt, OD, allowable_stress, *, target_SF=1.0,
+            wall_ratio=None, xtol=ID_XTOL, cache=None):
+    ''' Return the largest ID with safety factor >= target_SF, for a fixed OD.
+
+    wall_ratio is an optional first guess for OD/ID, such as the ratio from a
+    previous answer. Otherwise, the first guess is from Barlow's formula.
+    If an EvaluationCache is given, the safety factors are evaluated with it,
+    and a resultdb.ResultDatabase is searched for the whole result first.
+    The result is a SizingResult. Raise ValueError if there is no net
+    pressure, or no wall thickness reaches the target safety factor.'''
+    if pExt == pInt:
+        raise ValueError('there is no net pressure to size the wall for')
+    if _is_database(cache):
+        return cache.size('ID', pExt, pInt, OD, allowable_stress,
+                          target_SF=target_SF, wall_ratio=wall_ratio,
+                          xtol=xtol)
+    sf = _solver_safety_factor(cache)
+
+    def f(thickness):
+        ID = max(0, OD - 2*thickness)
+        return sf(pExt, pInt, OD, ID, allowable_stress) - target_SF
+
+    if wall_ratio is None:
+        thickness = Vessel._barlow_thickness(abs(pExt - pInt), OD,
+                                             allowable_stress)
+        step = _COLD_STEP
+    else:
+        thickness = (OD - OD / wall_ratio) / 2
+        step = _WARM_STEP
+    # The thickest wall is a solid rod
+    t, ft, iterations, evaluations = _size_wall(f, thickness, OD * _MIN_WALL,
+                                                OD / 2, xtol / 2, step)
+    return SizingResult(max(0, OD - 2*t), ft + target_SF, iterations,
+                        evaluations)
+
+
+def _size_wall_batch(f, t0, t_min, t_max, xtol, maxiter):
+    ''' Find the wall thickness where f changes sign, for many designs.
+
+    f(t, rows) evaluates the function for the designs selected by the index
+    array rows, and increases with the wall thickness t. The bracket for each
+    design is found by doubling or halving the first guess t0 (but not below
+    t_min), then all of the brackets are narrowed together with the Illinois
+    variant of the false position method, which converges superlinearly
+    without needing a different step for each design. Designs where f is not
+    finite at the first guess cannot be sized.'''
+    n = t0.size
+    everything = np.arange(n)
+    t = np.minimum(np.maximum(t0, t_min), t_max)
+    ft = f(t, everything)
+    valid = np.isfinite(ft)
+
+    lo = np.where(ft < 0, t, 0.0)
+    flo = np.where(ft < 0, ft, -np.inf)
+    hi = np.where(valid & (ft >= 0), t, np.inf)
+    fhi = np.where(valid & (ft >= 0), ft, np.inf)
+
+    # Shrink the walls which are already thick enough, until they are not
+    # (or the wall is thinner than the tolerance or t_min, when the lower end
+    # of the bracket is left at zero thickness)
+    rows = np.flatnonzero(valid & (ft >= 0))
+    while rows.size:
+        t = np.maximum(hi[rows] / 2, t_min[rows])
+        ft = f(t, rows)
+        thick = ft >= 0
+        hi[rows[thick]], fhi[rows[thick]] = t[thick], ft[thick]
+        lo[rows[~thick]], flo[rows[~thick]] = t[~thick], ft[~thick]
+        rows = rows[thick & (t >= xtol) & (t > t_min[rows])]
+
+    # Grow the walls which are too thin, until they are thick enough or
+    # reach the maximum thickness
+    rows = np.flatnonzero(valid & ~np.isfinite(hi))
+    while rows.size:
+        t = np.minimum(lo[rows] * 2, t_max[rows])
+        ft = f(t, rows)
+        thick = ft >= 0
+        hi[rows[thick]], fhi[rows[thick]] = t[thick], ft[thick]
+        lo[rows[~thick]], flo[rows[~thick]] = t[~thick], ft[~thick]
+        rows = rows[~thick & (t < t_max[rows])]
+    reachable = np.isfinite(hi)
+
+    # Narrow the brackets with the Illinois method
+    side = np.zeros(n, dtype=np.int8)
+    iterations = 0
+    rows = np.flatnonzero(reachable & (hi - lo >= xtol))
+    while rows.size and iterations < maxiter:
+        iterations += 1
+        a, b, fa, fb = lo[rows], hi[rows], flo[rows], fhi[rows]
+        t = (a*fb - b*fa) / (fb - fa)
+        # Bisect if the interpolated point is not strictly inside the bracket
+        outside = ~((t > a) & (t < b))
+        t[outside] = ((a + b) / 2)[outside]
+        ft = f(t, rows)
+        thick = ft >= 0
+        # Halve the function value at an endpoint which is kept twice in a
+        # row, so that both ends of the bracket move
+        left, right = rows[thick], rows[~thick]
+        flo[left[side[left] == 1]] /= 2
+        fhi[right[side[right] == -1]] /= 2
+        hi[left], fhi[left], side[left] = t[thick], ft[thick], 1
+        lo[right], flo[right], side[right] = t[~thick], ft[~thick], -1
+        rows = rows[hi[rows] - lo[rows] >= xtol]
+
+    converged = reachable & (hi - lo < xtol)
+    return np.where(reachable, hi, np.nan), converged, iterations
+
+
+def _batch_columns(*columns):
+    ''' Broadcast the input columns to 1D float arrays of the same length.'''
+    return [np.array(column) for column in np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(value, dtype=np.float64))
+          for value in columns))]
+
+
+def size_OD_batch(pExt, pInt, ID, allowable_stress, *, target_SF=1.0,
+                  xtol=OD_XTOL, maxiter=100):
+    ''' Return the smallest OD with safety factor >= target_SF for each design.
+
+    The inputs are columns of values (or scalars, which are broadcast), and
+    the result is a BatchSizingResult. Each design is bracketed starting from
+    Barlow's formula, and all of the designs are solved together.'''
+    from .PressureVessels import _require_numpy
+    _require_numpy()
+    pExt, pInt, ID, allowable_stress = _batch_columns(pExt, pInt, ID,
+                                                      allowable_stress)
+
+    def f(thickness, rows):
+        return VesselBatch(pExt[rows], pInt[rows], ID[rows] + 2*thickness,
+                           ID[rows], allowable_stress[rows]).SF - target_SF
+
+    # Designs with no net pressure cannot be sized, so they start at nan
+    thickness = np.where(pExt == pInt, np.nan,
+                         Vessel._barlow_thickness(np.abs(pExt - pInt), ID,
+                                                  allowable_stress))
+    # The wall thickness is not limited for a fixed ID, but the safety factor
+    # approaches a limit for a thick wall, so stop after a large wall ratio
+    t_max = np.maximum(ID, thickness) * _MAX_WALL_GROWTH
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t, converged, iterations = _size_wall_batch(f, thickness,
+                                                    ID * _MIN_WALL, t_max,
+                                                    xtol / 2, maxiter)
+        OD = ID + 2*t
+        SF = np.where(np.isnan(t), np.nan,
+                      VesselBatch(pExt, pInt, np.where(np.isnan(OD), 1, OD), ID,
+                                  allowable_stress).SF)
+    return BatchSizingResult(OD, SF, converged, iterations)
+
+
+def size_ID_batch(pExt, pInt, OD, allowable_stress, *, target_SF=1.0,
+                  xtol=ID_XTOL, maxiter=100):
+    ''' Return the largest ID with safety factor >= target_SF for each design.
+
+    The inputs are columns of values (or scalars, which are broadcast), and
+    the result is a BatchSizingResult. Each design is bracketed starting from
+    Barlow's formula, and all of the designs are solved together.'''
+    from .PressureVessels import _require_numpy
+    _require_numpy()
+    pExt, pInt, OD, allowable_stress = _batch_columns(pExt, pInt, OD,
+                                                      allowable_stress)
+
+    def f(thickness, rows):
+        return VesselBatch(pExt[rows], pInt[rows], OD[rows],
+                           np.maximum(0, OD[rows] - 2*thickness),
+                           allowable_stress[rows]).SF - target_SF
+
+    # Designs with no net pressure cannot be sized, so they start at nan
+    thickness = np.where(pExt == pInt, np.nan,
+                         Vessel._barlow_thickness(np.abs(pExt - pInt), OD,
+                                                  allowable_stress))
+    # The thickest wall is a solid rod
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t, converged, iterations = _size_wall_batch(f, thickness,
+                                                    OD * _MIN_WALL, OD / 2,
+                                                    xtol / 2, maxiter)
+        ID = np.maximum(0, OD - 2*t)
+        SF = np.where(np.isnan(t), np.nan,
+                      VesselBatch(pExt, pInt, OD, np.where(np.isnan(ID), 0, ID),
+                                  allowable_stress).SF)
+    return BatchSizingResult(ID, SF, converged, iterations)
+
+
+def _wall_diameters(ratio, OD_bounds, ID_bounds, min_wall, maximum, minimum):
+    ''' Return the (OD, ID) of the smallest wall area with OD/ID >= ratio.
+
+    For a given ID, the smallest OD is max(ratio*ID, ID + 2*min_wall, OD_min),
+    so the area decreases with ID while the OD_min bound governs, and then
+    increases. The best ID is where the OD_min bound stops governing, within
+    the ID bounds. maximum and minimum are max and min for scalars or
+    arrays.'''
+    OD_min, OD_max = OD_bounds
+    ID_min, ID_max = ID_bounds
+    ID = minimum(OD_min / ratio, OD_min - 2*min_wall)
+    ID = minimum(maximum(ID, ID_min), ID_max)
+    OD = maximum(maximum(ratio * ID, ID + 2*min_wall), OD_min)
+    return OD, ID
+
+
+def minimize_wall(pExt, pInt, allowable_stress, *, target_SF=1.0,
+                  OD_bounds=(0.0, math.inf), ID_bounds=(0.0, math.inf),
+                  min_wall=0.0, density=1.0, xtol=1e-9, cache=None):
+    ''' Return the OD and ID with the smallest wall area, and safety factor
+    >= target_SF.
+
+    OD_bounds and ID_bounds are (minimum, maximum) for each diameter, and
+    min_wall is the minimum wall thickness. The safety factor depends only on
+    the wall ratio, so the required ratio is found first (to a relative
+    tolerance of xtol), and the diameters follow from the bounds. The same
+    diameters give the smallest mass for any density. Raise a ValueError if
+    no design within the bounds reaches target_SF. The result is a
+    WallResult.'''
+    if OD_bounds[0] <= 0 and ID_bounds[0] <= 0:
+        raise ValueError('a minimum OD or ID is needed')
+    if OD_bounds[0] > OD_bounds[1] or ID_bounds[0] > ID_bounds[1]:
+        raise ValueError('the lower bounds must not exceed the upper bounds')
+    sf = _solver_safety_factor(cache)
+    ratio = size_OD(pExt, pInt, 1.0, allowable_stress, target_SF=target_SF,
+                    xtol=xtol, cache=cache).value
+    OD, ID = _wall_diameters(ratio, OD_bounds, ID_bounds, min_wall, max, min)
+    if ID <= 0:
+        raise ValueError('the minimum wall does not fit in the minimum OD')
+    # Scaling the ratio by the ID may round the safety factor down slightly
+    SF = sf(pExt, pInt, OD, ID, allowable_stress)
+    while SF < target_SF:
+        OD = math.nextafter(OD, math.inf)
+        SF = sf(pExt, pInt, OD, ID, allowable_stress)
+    if OD > OD_bounds[1]:
+        raise ValueError('no design within the bounds reaches the target '
+                         'safety factor')
+    area = math.pi / 4 * (OD**2 - ID**2)
+    return WallResult(OD, ID, SF, area, density * area)
+
+
+def minimize_wall_batch(pExt, pInt, allowable_stress, *, target_SF=1.0,
+                        OD_bounds=(0.0, math.inf), ID_bounds=(0.0, math.inf),
+                        min_wall=0.0, density=1.0, xtol=1e-9, maxiter=100):
+    ''' Return the OD and ID with the smallest wall area for each design.
+
+    As minimize_wall, but the pressures, allowable stress, bounds, min_wall
+    and density are columns of values (or scalars, which are broadcast), and
+    the result is a BatchWallResult.'''
+    from .PressureVessels import _require_numpy
+    _require_numpy()
+    (pExt, pInt, allowable_stress, OD_min, OD_max, ID_min, ID_max, min_wall,
+     density) = _batch_columns(pExt, pInt, allowable_stress, *OD_bounds,
+                               *ID_bounds, min_wall, density)
+    if np.any((OD_min <= 0) & (ID_min <= 0)):
+        raise ValueError('a minimum OD or ID is needed')
+    ratio = size_OD_batch(pExt, pInt, 1.0, allowable_stress,
+                          target_SF=target_SF, xtol=xtol,
+                          maxiter=maxiter).value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        OD, ID = _wall_diameters(ratio, (OD_min, OD_max), (ID_min, ID_max),
+                                 min_wall, np.maximum, np.minimum)
+        valid = (ID > 0) & (OD_min <= OD_max) & (ID_min <= ID_max)
+        ID = np.where(valid, ID, 1.0)
+        SF = VesselBatch(pExt, pInt, OD, ID, allowable_stress).SF
+        # Scaling the ratio by the ID may round the safety factor down slightly
+        for _ in range(8):
+            low = SF < target_SF
+            if not low.any():
+                break
+            OD = np.where(low, np.nextafter(OD, np.inf), OD)
+            SF = VesselBatch(pExt, pInt, OD, ID, allowable_stress).SF
+        feasible = valid & (OD <= OD_max) & (SF >= target_SF)
+        OD, ID, SF = (np.where(feasible, value, np.nan)
+                      for value in (OD, ID, SF))
+    area = np.pi / 4 * (OD**2 - ID**2)
+    return BatchWallResult(OD, ID, SF, area, density * area, feasible)
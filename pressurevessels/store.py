@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+A compact on-disk columnar format for evaluated designs.
+
+A store is a directory with one raw, fixed-dtype file per field and a small
+JSON header recording the units, the format version and the number of rows.
+Rows are appended in chunks with a ResultWriter, and a ResultStore opens the
+columns as memory maps, so they are only read from disk as they are used.
+"""
+import json
+import os
+from .PressureVessels import np, _require_numpy
+
+FORMAT = 'pressurevessels-columns'
+VERSION = 1
+HEADER = 'header.json'
+
+# Field names and their (little-endian) dtypes
+FIELDS = (('pExt', '<f8'),
+          ('pInt', '<f8'),
+          ('OD', '<f8'),
+          ('ID', '<f8'),
+          ('allowable_stress', '<f8'),
+          ('maxstress', '<f8'),
+          ('averagestress', '<f8'),
+          ('SF', '<f8'),
+          ('maxInternal', '<f8'),
+          ('maxExternal', '<f8'),
+          ('external', '|b1'))
+
+
+def _columns(data):
+    ''' Get the columns from a VesselBatch, or a mapping of field names.'''
+    if isinstance(data, dict):
+        return [data[name] for name, dtype in FIELDS]
+    return [getattr(data, name) for name, dtype in FIELDS]
+
+
+class ResultWriter():
+    ''' Write evaluated designs to a new store, one chunk at a time.
+
+    Use as a context manager, or call close() when finished. The header is
+    updated after every chunk, so a store is readable up to its last complete
+    chunk even if writing is interrupted.
+    '''
+
+    def __init__(self, path, units='US'):
+        _require_numpy()
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.units = units
+        self.rows = 0
+        self.fields = tuple(name for name, dtype in FIELDS)
+        self._files = {name: open(os.path.join(path, name + '.bin'), 'wb')
+                       for name, dtype in FIELDS}
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_header(self):
+        header = {'format': FORMAT,
+                  'version': VERSION,
+                  'units': self.units,
+                  'rows': self.rows,
+                  'fields': dict(FIELDS)}
+        temporary = os.path.join(self.path, HEADER + '.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(header, f, indent=2)
+        os.replace(temporary, os.path.join(self.path, HEADER))
+
+    def append(self, data):
+        ''' Append a chunk of designs, from a VesselBatch or a mapping of
+        field names to columns.'''
+        columns = [np.asarray(column, dtype=dtype) for column, (name, dtype)
+                   in zip(_columns(data), FIELDS)]
+        rows = len(columns[0])
+        if any(len(column) != rows for column in columns):
+            raise ValueError('all columns must have the same length')
+        for column, (name, dtype) in zip(columns, FIELDS):
+            f = self._files[name]
+            f.write(column.tobytes())
+            f.flush()
+        self.rows += rows
+        self._write_header()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._write_header()
+
+
+class ResultStore():
+    ''' Read a store of evaluated designs.
+
+    Each column is opened as a read-only memory map when it is first used,
+    e.g. store['SF'], so only the parts of a column that are used are read.
+    '''
+
+    def __init__(self, path):
+        _require_numpy()
+        self.path = path
+        with open(os.path.join(path, HEADER)) as f:
+            header = json.load(f)
+        if header.get('format') != FORMAT:
+            raise ValueError(f'{path} is not a result store')
+        if header['version'] > VERSION:
+            raise ValueError(f'unsupported store version {header["version"]}')
+        self.header = header
+        self.units = header['units']
+        self.rows = header['rows']
+        self.fields = tuple(header['fields'])
+        self._columns = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r}, {self.rows} rows)'
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            if name not in self.header['fields']:
+                raise KeyError(name)
+            dtype = np.dtype(self.header['fields'][name])
+            if self.rows == 0:
+                column = np.zeros(0, dtype=dtype)
+            else:
+                column = np.memmap(os.path.join(self.path, name + '.bin'),
+                                   dtype=dtype, mode='r', shape=(self.rows,))
+            self._columns[name] = column
+        return self._columns[name]
+
+    def iter_chunks(self, fields=None, chunksize=1000000):
+        ''' Yield (start, columns) for consecutive chunks of rows, where
+        columns is a dictionary of the requested fields (default: all).'''
+        fields = fields or self.fields
+        for start in range(0, self.rows, chunksize):
+            stop = min(start + chunksize, self.rows)
+            yield start, {name: self[name][start:stop] for name in fields}
+
+    def select(self, condition, fields, chunksize=1000000):
+        ''' Return the indices of the rows where condition is true.
+
+        condition is called with a dictionary of the given fields for each
+        chunk of rows, and returns a boolean array, for example
+        store.select(lambda c: c['SF'] < 1.2, ['SF']).'''
+        indices = [np.flatnonzero(condition(columns)) + start
+                   for start, columns in self.iter_chunks(fields, chunksize)]
+        return np.concatenate(indices or [np.zeros(0, dtype=np.int64)])
+
+    def take(self, indices, fields=None):
+        ''' Return a dictionary of the fields (default: all) for the given
+        row indices, as in-memory arrays.'''
+        fields = fields or self.fields
+        return {name: np.asarray(self[name][indices]) for name in fields}
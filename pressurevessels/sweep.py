@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+
+Full-factorial design sweeps over grids of the five design parameters.
+
+The cartesian product of the grids is never built. Instead, it is split into
+chunks of consecutive (flat) design indices, which are evaluated in worker
+processes and reduced as they arrive: the count and (optionally) indices of
+the feasible designs, the thinnest feasible wall for each pair of pressures,
+and a histogram of the safety factors. The chunks are reduced in order, and
+the reductions are exact, so the results do not depend on the worker count.
+"""
+import collections
+import concurrent.futures
+import os
+import time
+from .PressureVessels import VesselBatch, VesselSpec, np, _require_numpy
+from .store import FIELDS
+
+# Default histogram bins for the safety factor. Values outside of the bins
+# are counted in the first or last bin.
+DEFAULT_BINS = (0.0, 5.0, 50)
+
+
+def grid_values(text):
+    ''' Parse a grid from text: "start:stop:num" for evenly spaced values
+    (including both ends), or a comma separated list of values.'''
+    if ':' in text:
+        start, stop, num = text.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(value) for value in text.split(',')])
+
+
+class SweepResult():
+    ''' The reduced results of a design sweep.
+
+    Designs are identified by their flat index into the grid, in the order
+    (pExt, pInt, OD, ID, allowable_stress), with the last varying fastest.
+    Designs with OD <= ID are not valid, and are skipped.
+    '''
+
+    def __init__(self, grid, target_SF, bin_edges, keep_feasible):
+        self.grid = grid
+        self.shape = tuple(len(values) for values in grid)
+        self.target_SF = target_SF
+        self.total = int(np.prod(self.shape))
+        self.valid = 0
+        self.feasible = 0
+        self.bin_edges = bin_edges
+        self.histogram = np.zeros(len(bin_edges) - 1, dtype=np.int64)
+        npairs = self.shape[0] * self.shape[1]
+        self.min_wall = np.full(npairs, np.inf)
+        self.min_wall_index = np.full(npairs, -1, dtype=np.int64)
+        self._feasible_indices = [] if keep_feasible else None
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({self.total} designs, '
+                f'{self.feasible} feasible)')
+
+    def _reduce(self, partial):
+        ''' Add the results from one chunk.'''
+        (valid, feasible, feasible_indices, histogram,
+         pairs, walls, indices, columns) = partial
+        self.valid += valid
+        self.feasible += feasible
+        self.histogram += histogram
+        if self._feasible_indices is not None:
+            self._feasible_indices.append(feasible_indices)
+        # Keep the thinner wall, or the lower index for equal walls
+        best = self.min_wall[pairs]
+        better = (walls < best) | ((walls == best) &
+                                   (indices < self.min_wall_index[pairs]))
+        self.min_wall[pairs[better]] = walls[better]
+        self.min_wall_index[pairs[better]] = indices[better]
+
+    @property
+    def feasible_indices(self):
+        ''' The flat indices of the feasible designs, in order.'''
+        if self._feasible_indices is None:
+            raise ValueError('the sweep was run with keep_feasible=False')
+        return np.concatenate(self._feasible_indices or
+                              [np.zeros(0, dtype=np.int64)])
+
+    def design(self, index):
+        ''' Return the design at a flat index, as a VesselSpec.'''
+        subscripts = np.unravel_index(index, self.shape)
+        return VesselSpec(*(float(values[i])
+                            for values, i in zip(self.grid, subscripts)))
+
+    def min_wall_designs(self):
+        ''' Return a list of (pExt, pInt, design) for each pair of pressures,
+        where design is the VesselSpec with the thinnest feasible wall, or None
+        if none of the designs are feasible.'''
+        designs = []
+        for pair, index in enumerate(self.min_wall_index):
+            i, j = divmod(pair, self.shape[1])
+            design = self.design(index) if index >= 0 else None
+            designs.append((float(self.grid[0][i]), float(self.grid[1][j]),
+                            design))
+        return designs
+
+
+def _evaluate_chunk(grid, start, stop, target_SF, bin_edges, keep_feasible,
+                    keep_columns):
+    ''' Evaluate the designs with flat indices start to stop, and return the
+    partial results for SweepResult._reduce, and (if keep_columns is True) the
+    columns of the valid designs for a store.ResultWriter.'''
+    shape = tuple(len(values) for values in grid)
+    indices = np.arange(start, stop, dtype=np.int64)
+    subscripts = np.unravel_index(indices, shape)
+    pExt, pInt, OD, ID, allowable_stress = (values[i] for values, i
+                                            in zip(grid, subscripts))
+    valid = OD > ID
+    indices = indices[valid]
+    pairs = (subscripts[0] * shape[1] + subscripts[1])[valid]
+    OD, ID = OD[valid], ID[valid]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        batch = VesselBatch(pExt[valid], pInt[valid], OD, ID,
+                            allowable_stress[valid])
+    SF = batch.SF
+
+    histogram = np.histogram(np.clip(SF, bin_edges[0], bin_edges[-1]),
+                             bins=bin_edges)[0]
+
+    feasible = SF >= target_SF
+    walls = (OD[feasible] - ID[feasible]) / 2
+    feasible_pairs = pairs[feasible]
+    feasible_indices = indices[feasible]
+    # The thinnest wall (then lowest index) for each pair in this chunk
+    order = np.lexsort((feasible_indices, walls, feasible_pairs))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = feasible_pairs[order][1:] != feasible_pairs[order][:-1]
+    best = order[first]
+
+    return (int(valid.sum()),
+            int(feasible.sum()),
+            feasible_indices if keep_feasible else None,
+            histogram,
+            feasible_pairs[best],
+            walls[best],
+            feasible_indices[best],
+            {name: getattr(batch, name) for name, dtype in FIELDS}
+            if keep_columns else None)
+
+
+def _chunks(total, chunksize):
+    for start in range(0, total, chunksize):
+        yield start, min(start + chunksize, total)
+
+
+def sweep(pExt, pInt, OD, ID, allowable_stress, *, target_SF=1.0,
+          workers=None, chunksize=100000, bins=DEFAULT_BINS,
+          keep_feasible=False, store=None):
+    ''' Evaluate every combination of the given parameter values.
+
+    Each parameter is a sequence of values (or a single value). The designs
+    are evaluated chunksize at a time, by the given number of worker
+    processes (default: one per CPU; 1 runs in this process). bins is
+    (start, stop, number) for the safety factor histogram. If keep_feasible
+    is True, the indices of all of the feasible designs are kept. If a
+    store.ResultWriter is given, every valid design is written to it, in
+    order. Return a SweepResult.'''
+    _require_numpy()
+    grid = tuple(np.atleast_1d(np.asarray(values, dtype=np.float64))
+                 for values in (pExt, pInt, OD, ID, allowable_stress))
+    bin_edges = np.linspace(bins[0], bins[1], bins[2] + 1)
+    result = SweepResult(grid, target_SF, bin_edges, keep_feasible)
+    options = (target_SF, bin_edges, keep_feasible, store is not None)
+    chunks = _chunks(result.total, chunksize)
+
+    def reduce(partial):
+        result._reduce(partial)
+        if store is not None:
+            store.append(partial[-1])
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for start, stop in chunks:
+            reduce(_evaluate_chunk(grid, start, stop, *options))
+        return result
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        # Keep a few chunks per worker in flight, and reduce them in order
+        pending = collections.deque()
+        for start, stop in chunks:
+            pending.append(executor.submit(_evaluate_chunk, grid, start, stop,
+                                           *options))
+            if len(pending) >= 4 * workers:
+                reduce(pending.popleft().result())
+        while pending:
+            reduce(pending.popleft().result())
+    return result
+
+
+def scaling_report(pExt, pInt, OD, ID, allowable_stress, *, max_workers=None,
+                   **kwargs):
+    ''' Time the same sweep with 1 to max_workers worker processes.
+
+    Return a list of (workers, seconds, designs per second, speedup), and
+    raise a RuntimeError if the result with more workers differs from the
+    result with one.'''
+    max_workers = max_workers or os.cpu_count() or 1
+    report = []
+    reference = None
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        result = sweep(pExt, pInt, OD, ID, allowable_stress, workers=workers,
+                       **kwargs)
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = result
+            base = seconds
+        else:
+            if not (result.feasible == reference.feasible
+                    and np.array_equal(result.histogram, reference.histogram)
+                    and np.array_equal(result.min_wall_index,
+                                       reference.min_wall_index)):
+                raise RuntimeError(f'the sweep with {workers} workers does '
+                                   'not match the sweep with 1 worker')
+        report.append((workers, seconds, result.total / seconds,
+                       base / seconds))
+    return report
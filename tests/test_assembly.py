@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import random
+import unittest
+from unittest import mock
+from pressurevessels import assembly
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels.assembly import Segment, VesselAssembly
+
+
+class Test_VesselAssembly(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(6)
+        self.segments = []
+        for i in range(200):
+            ID = self.rng.uniform(0.5, 10)
+            self.segments.append((ID * self.rng.uniform(1.02, 2.5), ID,
+                                  self.rng.uniform(20000, 90000), f's{i}'))
+        self.assembly = VesselAssembly(200, 3000, self.segments)
+
+    def check(self, assembly):
+        ''' Compare the assembly to a Vessel for every segment.'''
+        vessels = [Vessel(assembly.pExt, assembly.pInt, *segment[:3])
+                   for segment in assembly]
+        SFs = [vessel.SF for vessel in vessels]
+        self.assertAlmostEqual(assembly.SF, min(SFs), delta=1e-12 * min(SFs))
+        self.assertEqual(SFs[assembly.governing], min(SFs))
+        self.assertAlmostEqual(assembly.maxExternal,
+                               min(vessel.maxExternal for vessel in vessels),
+                               delta=1e-9)
+        self.assertAlmostEqual(assembly.maxInternal,
+                               min(vessel.maxInternal for vessel in vessels),
+                               delta=1e-9)
+        self.assertEqual(assembly.result().SF, min(SFs))
+
+    def test_matches_vessels(self):
+        self.check(self.assembly)
+        self.assertEqual(self.assembly[0], Segment(*self.segments[0]))
+
+    def test_incremental(self):
+        evaluations = self.assembly.evaluations
+        for _ in range(300):
+            index = self.rng.randrange(len(self.assembly))
+            self.assembly.modify_segment(
+                index, allowable_stress=self.rng.uniform(20000, 90000))
+        self.assertEqual(self.assembly.evaluations, evaluations + 300)
+        self.check(self.assembly)
+        # Changing the pressures recalculates nothing
+        for pExt, pInt in ((100, 5000), (4000, 0), (0, 0.5)):
+            self.assembly.modify_pressures(pExt=pExt, pInt=pInt)
+            self.check(self.assembly)
+        self.assertEqual(self.assembly.evaluations, evaluations + 300)
+
+    def test_governing_segment_changes(self):
+        governing = self.assembly.governing
+        segment = self.assembly[governing]
+        # Thicken the governing segment, and another one governs
+        self.assembly.modify_segment(governing, OD=segment.ID * 5)
+        self.assertNotEqual(self.assembly.governing, governing)
+        self.check(self.assembly)
+        self.assembly.append((1.01, 1.0, 1000))
+        self.assertEqual(self.assembly.governing, len(self.assembly) - 1)
+        self.check(self.assembly)
+
+    def test_size(self):
+        for diameter in ('OD', 'ID'):
+            with self.subTest(diameter=diameter):
+                result = self.assembly.size(diameter, target_SF=1.5)
+                self.assertTrue(all(result.converged))
+                self.assertGreaterEqual(self.assembly.SF, 1.5 - 1e-9)
+                self.assertLess(self.assembly.SF, 1.5 + 1e-3)
+                self.check(self.assembly)
+
+    def test_size_without_numpy(self):
+        with mock.patch.object(assembly, 'np', None):
+            model = VesselAssembly(200, 3000, self.segments[:20])
+            result = model.size('OD', target_SF=2)
+        self.assertTrue(all(result.converged))
+        self.assertGreaterEqual(model.SF, 2 - 1e-9)
+        self.check(model)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            VesselAssembly(0, 100, [])
+        with self.assertRaises(ValueError):
+            VesselAssembly(0, 100, [(1, 2, 1000)])
+        with self.assertRaises(ValueError):
+            self.assembly.modify_segment(0, ID=100)
+        with self.assertRaises(ValueError):
+            self.assembly.size('wall')
+
+if __name__ == '__main__':
+    unittest.main()
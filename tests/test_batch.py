@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import array
+import random
+import unittest
+from pressurevessels.PressureVessels import Vessel, VesselBatch, evaluate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is required for batch calculations')
+class Test_VesselBatch(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.rows = []
+        for _ in range(200):
+            ID = rng.uniform(0.5, 10)
+            OD = ID * rng.uniform(1.01, 3)
+            self.rows.append((rng.uniform(0, 5000), rng.uniform(0, 5000),
+                              OD, ID, rng.uniform(20, 150) * 1000))
+        self.columns = [list(column) for column in zip(*self.rows)]
+        self.batch = VesselBatch(*self.columns)
+
+    def test_matches_vessel(self):
+        attributes = ('maxstress', 'averagestress', 'SF_internal',
+                      'SF_external', 'SF', 'maxInternal', 'maxExternal',
+                      'external')
+        for i, row in enumerate(self.rows):
+            vessel = Vessel(*row)
+            for attribute in attributes:
+                with self.subTest(row=i, attribute=attribute):
+                    self.assertEqual(getattr(self.batch, attribute)[i],
+                                     getattr(vessel, attribute))
+
+    def test_matches_evaluate(self):
+        # Exactly, for many designs: both paths must round the same way
+        rng = random.Random(12)
+        rows = []
+        for _ in range(20000):
+            ID = rng.uniform(0.5, 10)
+            rows.append((rng.uniform(0, 5000), rng.uniform(0, 5000),
+                         ID * rng.uniform(1.01, 3), ID,
+                         rng.uniform(20, 150) * 1000))
+        batch = VesselBatch(*zip(*rows))
+        columns = list(zip(batch.external.tolist(), batch.maxstress.tolist(),
+                           batch.averagestress.tolist(),
+                           batch.SF_external.tolist(),
+                           batch.SF_internal.tolist(),
+                           batch.maxExternal.tolist(),
+                           batch.maxInternal.tolist()))
+        mismatches = [i for i, row in enumerate(rows)
+                      if tuple(evaluate(row)) != columns[i]]
+        self.assertEqual(mismatches, [])
+
+    def test_array_inputs(self):
+        columns = [array.array('d', column) for column in self.columns]
+        batch = VesselBatch(*columns)
+        self.assertEqual(len(batch), len(self.rows))
+        self.assertTrue(numpy.array_equal(batch.SF, self.batch.SF))
+
+    def test_broadcast_scalars(self):
+        batch = VesselBatch(15, 0, [1.695, 2.0], 1.460, 120)
+        self.assertEqual(batch.SF[0], Vessel(15, 0, 1.695, 1.460, 120).SF)
+        self.assertEqual(batch.SF[1], Vessel(15, 0, 2.0, 1.460, 120).SF)
+
+@unittest.skipIf(numpy is None, 'numpy is required for batch calculations')
+class Test_VesselBatchPrecision(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(2)
+        self.rows = []
+        for _ in range(2000):
+            ID = rng.uniform(0.5, 10)
+            # Include thin walls and nearly equal pressures
+            OD = ID * (1 + 10**rng.uniform(-5, 0.3))
+            pInt = rng.uniform(0, 5000)
+            pExt = rng.choice((rng.uniform(0, 5000),
+                               pInt * (1 + 10**rng.uniform(-8, -2))))
+            self.rows.append((pExt, pInt, OD, ID,
+                              rng.uniform(20, 150) * 1000))
+        self.columns = [list(column) for column in zip(*self.rows)]
+        self.batch = VesselBatch(*self.columns)
+
+    def test_float32(self):
+        # Nearly equal pressures may round to equal values
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            batch = VesselBatch(*self.columns, precision='float32')
+        self.assertEqual(batch.SF.dtype, numpy.float32)
+        # Typical walls are accurate to about the float32 precision
+        typical = [i for i, row in enumerate(self.rows)
+                   if row[2] > 1.02 * row[3]
+                   and abs(row[1] - row[0]) > 0.01 * max(row[0], row[1])]
+        numpy.testing.assert_allclose(batch.SF[typical],
+                                      self.batch.SF[typical], rtol=1e-4)
+
+    def test_auto_decisions(self):
+        batch = VesselBatch(*self.columns, precision='auto')
+        self.assertEqual(batch.SF.dtype, numpy.float32)
+        self.assertTrue(numpy.array_equal(batch.SF >= 1, self.batch.SF >= 1))
+        self.assertTrue(numpy.array_equal(batch.external,
+                                          self.batch.external))
+        # The confirmed designs are recalculated in float64
+        confirmed = batch.confirmed
+        self.assertTrue(confirmed.any())
+        self.assertTrue(numpy.array_equal(
+            batch.SF[confirmed], self.batch.SF[confirmed].astype(numpy.float32)))
+
+    def test_auto_band(self):
+        batch = VesselBatch(*self.columns, precision='auto', band=numpy.inf)
+        self.assertTrue(batch.confirmed.all())
+        self.assertTrue(numpy.array_equal(batch.maxstress,
+                                          self.batch.maxstress.astype(
+                                              numpy.float32)))
+
+    def test_auto_rounding(self):
+        # An SF just below 1 in float64 must not round up to 1 in float32
+        ID = 1.0
+        OD = 1.0000001
+        allowable_stress = 1000.0
+        pInt = 1.0
+        SF = VesselBatch(0, pInt, OD, ID, allowable_stress).SF
+        pInt *= SF * (1 + 2**-30)
+        self.assertLess(VesselBatch(0, pInt, OD, ID, allowable_stress).SF, 1)
+        batch = VesselBatch(0, pInt, OD, ID, allowable_stress,
+                            precision='auto')
+        self.assertTrue(batch.confirmed)
+        self.assertLess(batch.SF, 1)
+
+    def test_auto_scalars(self):
+        batch = VesselBatch(15, 0, 1.695, 1.460, 120, precision='auto')
+        self.assertAlmostEqual(float(batch.SF),
+                               Vessel(15, 0, 1.695, 1.460, 120).SF, places=5)
+
+    def test_unknown_precision(self):
+        with self.assertRaises(ValueError):
+            VesselBatch(*self.columns, precision='float16')
+
+if __name__ == '__main__':
+    unittest.main()
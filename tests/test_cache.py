@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import unittest
+from pressurevessels.PressureVessels import Vessel, VesselSpec, evaluate
+from pressurevessels import sizing
+from pressurevessels.cache import EvaluationCache
+
+class Test_EvaluationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.defaultvalues = (15, 0, 1.695, 1.460, 120)
+        self.cache = EvaluationCache(maxsize=2)
+
+    def test_hits_and_misses(self):
+        spec = VesselSpec(*self.defaultvalues)
+        result = self.cache.evaluate(spec)
+        self.assertEqual(result, evaluate(spec))
+        self.assertIs(self.cache.evaluate(spec), result)
+        info = self.cache.info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+        self.assertEqual(self.cache.hit_rate, 0.5)
+
+    def test_lru_eviction(self):
+        first, second, third = [VesselSpec(pExt, 0, 1.695, 1.460, 120)
+                                for pExt in (15, 20, 25)]
+        self.cache.evaluate(first)
+        self.cache.evaluate(second)
+        # Use the first design again, so the second is the oldest
+        self.cache.evaluate(first)
+        self.cache.evaluate(third)
+        self.assertEqual(self.cache.evictions, 1)
+        self.cache.evaluate(first)
+        self.assertEqual(self.cache.hits, 2)
+        self.cache.evaluate(second)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_tolerance(self):
+        cache = EvaluationCache(tolerance=0.001)
+        result = cache.evaluate(self.defaultvalues)
+        self.assertIs(cache.evaluate((15.0001, 0, 1.695, 1.460, 120)), result)
+        self.assertEqual(cache.hits, 1)
+        # The tolerance is relative: small values are not lumped together,
+        # and large ones share results
+        small = cache.evaluate((0.0001, 0, 1.695, 1.460, 120))
+        self.assertIsNot(cache.evaluate((0.0004, 0, 1.695, 1.460, 120)),
+                         small)
+        large = cache.evaluate((15, 0, 1.695, 1.460, 120000))
+        self.assertIs(cache.evaluate((15, 0, 1.695, 1.460, 120001)), large)
+
+    def test_tolerance_per_parameter(self):
+        cache = EvaluationCache(tolerance={'pExt': 0.01})
+        result = cache.evaluate(self.defaultvalues)
+        self.assertIs(cache.evaluate((15.01, 0, 1.695, 1.460, 120)), result)
+        self.assertIsNot(cache.evaluate((15, 0, 1.6951, 1.460, 120)), result)
+        with self.assertRaises(ValueError):
+            EvaluationCache(tolerance={'wall': 0.01})
+        with self.assertRaises(ValueError):
+            EvaluationCache(tolerance=2)
+
+    def test_tolerance_not_used_for_sizing(self):
+        # A coarse cache would let the solver accept a design from the
+        # safety factor of a nearby one
+        cache = EvaluationCache(tolerance=0.05)
+        result = sizing.size_OD(0, 3000, 2.5, 60000, target_SF=1.5,
+                                cache=cache)
+        self.assertEqual(result, sizing.size_OD(0, 3000, 2.5, 60000,
+                                                target_SF=1.5))
+        self.assertGreaterEqual(sizing.safety_factor(0, 3000, result.value,
+                                                     2.5, 60000), 1.5)
+
+    def test_shared_with_vessel(self):
+        cache = EvaluationCache()
+        vessel = Vessel(*self.defaultvalues, cache=cache)
+        other = Vessel(*self.defaultvalues, cache=cache)
+        self.assertEqual(vessel.SF, other.SF)
+        self.assertEqual(cache.info()[:2], (1, 1))
+        # The sizing routines share the same cache
+        vessel.minimize_OD()
+        other.minimize_OD()
+        self.assertEqual(vessel.OD, other.OD)
+        self.assertGreater(cache.hits, 2)
+
+if __name__ == '__main__':
+    unittest.main()
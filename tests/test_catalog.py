@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import io
+import random
+import unittest
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels.catalog import CatalogEntry, TubeCatalog
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test_TubeCatalog(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(5)
+        entries = []
+        for size in range(1, 21):
+            OD = size * 0.5 + 0.25
+            for wall in (0.035, 0.065, 0.12, 0.25, 0.5):
+                if 2 * wall < OD:
+                    for allow in (30000, 60000):
+                        entries.append(CatalogEntry(
+                            f'{size}', OD, OD - 2 * wall, allow,
+                            rng.choice((0.1, 0.29))))
+        self.catalog = TubeCatalog(entries)
+        self.cases = [(rng.uniform(0, 30000), rng.uniform(0, 30000),
+                       rng.uniform(1, 3)) for _ in range(200)]
+
+    def scan(self, pExt, pInt, target_SF):
+        ''' The lightest passing entry, by building a Vessel for each one.'''
+        passing = [entry for entry in self.catalog
+                   if Vessel(pExt, pInt, entry.OD, entry.ID,
+                             entry.allowable_stress).SF >= target_SF]
+        return min(passing, key=lambda entry: entry.mass, default=None)
+
+    def test_lightest(self):
+        found = 0
+        for pExt, pInt, target_SF in self.cases:
+            expected = self.scan(pExt, pInt, target_SF)
+            entry = self.catalog.lightest(pExt, pInt, target_SF)
+            if expected is None:
+                self.assertIsNone(entry)
+            else:
+                self.assertEqual(entry.mass, expected.mass)
+            found += entry is not None
+        # Some designs pass and some do not
+        self.assertTrue(0 < found < len(self.cases))
+
+    def test_equal_pressures(self):
+        entry = self.catalog.lightest(1000, 1000)
+        self.assertEqual(entry.mass, min(e.mass for e in self.catalog))
+
+    @unittest.skipIf(numpy is None, 'numpy is required for bulk queries')
+    def test_lightest_batch(self):
+        pExt, pInt, target_SF = zip(*self.cases)
+        indices = self.catalog.lightest_batch(pExt, pInt, target_SF)
+        for index, case in zip(indices, self.cases):
+            expected = self.catalog.lightest_index(*case)
+            self.assertEqual(index, -1 if expected is None else expected)
+
+    def test_from_csv(self):
+        text = ('size,OD,wall,allowable_stress\n'
+                '1,1.0,0.065,60000\n'
+                '1,1.0,0.12,60000\n'
+                '2,2.0,,60000\n')
+        with self.assertRaises(ValueError):
+            TubeCatalog.from_csv(io.StringIO(text))
+        catalog = TubeCatalog.from_csv(io.StringIO(text.replace(',,', ',0.065,')))
+        self.assertEqual(len(catalog), 3)
+        self.assertAlmostEqual(catalog[0].ID, 0.87)
+        self.assertEqual(catalog.lightest(0, 5000).wall, 0.065)
+        self.assertEqual(catalog.lightest(0, 10000).wall, 0.12)
+        self.assertIsNone(catalog.lightest(0, 100000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import io
+import json
+import unittest
+from unittest import mock
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels import batchio, cli
+
+CSV_DESIGNS = '''name,pExt,pInt,OD,ID,allowable_stress
+a,15,0,1.695,1.460,120
+b,0,2000,3,2.5,60000
+c,500,0,2,1.5,30000
+'''
+
+class Test_Batch(unittest.TestCase):
+
+    def run_batch(self, text, **kwargs):
+        output = io.StringIO()
+        count = batchio.run_batch(io.StringIO(text), output, **kwargs)
+        return count, output.getvalue()
+
+    def check_rows(self, rows):
+        for row in rows:
+            with self.subTest(name=row['name']):
+                vessel = Vessel(row['pExt'], row['pInt'], row['OD'],
+                                row['ID'], row['allowable_stress'])
+                self.assertAlmostEqual(row['SF'], vessel.SF, 12)
+                self.assertAlmostEqual(row['maxInternal'], vessel.maxInternal,
+                                       9)
+
+    def test_csv_to_jsonl(self):
+        count, text = self.run_batch(CSV_DESIGNS, output_format='jsonl',
+                                     chunksize=2)
+        rows = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(count, 3)
+        self.assertEqual([row['name'] for row in rows], ['a', 'b', 'c'])
+        self.check_rows(rows)
+
+    def test_csv_output(self):
+        count, text = self.run_batch(CSV_DESIGNS, chunksize=2)
+        lines = text.splitlines()
+        # One header, no matter how many chunks
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('name,pExt'))
+        self.assertIn('SF', lines[0].split(','))
+
+    def test_size_OD(self):
+        jsonl = '{"pExt": 15, "pInt": 0, "ID": 1.46, "allowable_stress": 120}\n'
+        count, text = self.run_batch(jsonl, input_format='jsonl', size='OD')
+        row = json.loads(text)
+        self.assertTrue(row['converged'])
+        self.assertGreaterEqual(row['SF'], 1.0)
+        self.assertAlmostEqual(row['OD'], Vessel(15, 0, 1.695, 1.46, 120)
+                               .minimize_OD().value, 4)
+
+    def test_without_numpy(self):
+        with mock.patch.object(batchio, 'np', None):
+            count, text = self.run_batch(CSV_DESIGNS, output_format='jsonl',
+                                         size='ID')
+        rows = [json.loads(line) for line in text.splitlines()]
+        self.assertTrue(all(row['converged'] for row in rows))
+        self.check_rows(rows)
+
+    def test_no_net_pressure(self):
+        # No net pressure, no wall, and a normal design: the rows are the
+        # same with or without numpy, and nan is written as null
+        text = ('pExt,pInt,OD,ID,allowable_stress\n10,10,2,1,100\n'
+                '0,10,1,1,100\n15,0,1.695,1.46,120\n')
+        outputs = []
+        for numpy_module in (batchio.np, None):
+            with mock.patch.object(batchio, 'np', numpy_module):
+                count, output = self.run_batch(text, output_format='jsonl')
+            outputs.append(output)
+        self.assertEqual(count, 3)
+        if batchio.np is not None:
+            self.assertEqual(outputs[0], outputs[1])
+        rows = [json.loads(line) for line in outputs[1].splitlines()]
+        self.assertFalse(rows[0]['external'])
+        self.assertIsNone(rows[0]['SF'])
+        self.assertIsNone(rows[1]['maxstress'])
+        self.assertEqual(rows[2]['SF'], Vessel(15, 0, 1.695, 1.46, 120).SF)
+
+    def test_columns_needs_directory(self):
+        # The arguments are checked before the input is opened
+        with mock.patch.object(cli, '_open') as opener, \
+                mock.patch('sys.stderr', new_callable=io.StringIO), \
+                self.assertRaises(SystemExit):
+            cli.main(['batch', 'designs.csv', '--output-format', 'columns'])
+        opener.assert_not_called()
+
+    def test_missing_field(self):
+        with self.assertRaises(ValueError):
+            self.run_batch('pExt,pInt\n1,2\n')
+
+    def test_cli_file(self):
+        with mock.patch('sys.stdin', io.StringIO(CSV_DESIGNS)), \
+                mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            self.assertEqual(cli.main(['batch', '--output-format', 'jsonl']),
+                             0)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 3)
+
+if __name__ == '__main__':
+    unittest.main()
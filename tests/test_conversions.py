@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import array
+import unittest
+from pressurevessels import conversions
+from pressurevessels.PressureVessels import Vessel
+
+try:
+    import numpy
+    from pressurevessels.PressureVessels import VesselBatch
+except ImportError:
+    numpy = None
+
+class Test_Conversions(unittest.TestCase):
+
+    def test_factors(self):
+        self.assertEqual(conversions.factor('length', 'in', 'mm'), 25.4)
+        self.assertAlmostEqual(conversions.factor('pressure', 'US', 'SI'),
+                               0.006895, 6)
+        self.assertAlmostEqual(conversions.factor('pressure', 'MPa', 'psi') *
+                               conversions.factor('pressure', 'psi', 'MPa'),
+                               1.0, 15)
+        with self.assertRaises(ValueError):
+            conversions.factor('length', 'in', 'psi')
+
+    def test_convert_columns(self):
+        column = array.array('d', [1.0, 2.0])
+        converted = conversions.convert(column, 'length', 'in', 'mm')
+        self.assertEqual(converted, array.array('d', [25.4, 50.8]))
+        self.assertEqual(conversions.convert([1, 2], 'length', 'ft', 'in'),
+                         [12, 24])
+
+    def test_vessel_units(self):
+        vessel = Vessel(15, 0, 1.695, 1.460, 120)
+        SF = vessel.SF
+        vessel.change_units('SI')
+        self.assertEqual(vessel.units, 'SI')
+        self.assertAlmostEqual(vessel.SF, SF, 12)
+        self.assertAlmostEqual(vessel.maxstress,
+                               Vessel(15, 0, 1.695, 1.460, 120).maxstress *
+                               conversions.factor('pressure', 'psi', 'MPa'),
+                               12)
+        vessel.change_units('US')
+        self.assertAlmostEqual(vessel.OD, 1.695, 12)
+        with self.assertRaises(ValueError):
+            vessel.change_units('metric')
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch calculations')
+    def test_batch_units(self):
+        batch = VesselBatch([15, 20], 0, 1.695, 1.460, 120)
+        batch.change_units('SI')
+        expected = VesselBatch(
+            conversions.convert(numpy.array([15, 20]), 'pressure', 'US', 'SI'),
+            0, 1.695 * 25.4, 1.460 * 25.4,
+            conversions.convert(120, 'pressure', 'US', 'SI'), units='SI')
+        for name in ('pExt', 'OD', 'maxstress', 'maxInternal', 'SF'):
+            with self.subTest(field=name):
+                self.assertTrue(numpy.allclose(getattr(batch, name),
+                                               getattr(expected, name),
+                                               rtol=1e-12))
+
+if __name__ == '__main__':
+    unittest.main()
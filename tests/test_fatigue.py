@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+from pressurevessels import cli
+from pressurevessels.PressureVessels import Vessel
+
+try:
+    import numpy
+    from pressurevessels import fatigue
+except ImportError:
+    numpy = None
+
+
+def rainflow(values):
+    ''' Count the cycles of a whole history, with the three-point method
+    (ASTM E1049), one reversal at a time.'''
+    reversals = []
+    for value in values:
+        if reversals and value == reversals[-1]:
+            continue
+        if (len(reversals) >= 2
+                and (value - reversals[-1]) * (reversals[-1] - reversals[-2])
+                > 0):
+            reversals[-1] = value
+        else:
+            reversals.append(value)
+    cycles = Counter()
+    stack = []
+    for point in reversals:
+        stack.append(point)
+        while len(stack) >= 3:
+            X = abs(stack[-1] - stack[-2])
+            Y = abs(stack[-2] - stack[-3])
+            if X < Y:
+                break
+            if len(stack) == 3:
+                cycles[Y] += 0.5
+                del stack[0]
+            else:
+                cycles[Y] += 1
+                del stack[-3:-1]
+    for a, b in zip(stack, stack[1:]):
+        cycles[abs(b - a)] += 0.5
+    return cycles
+
+
+@unittest.skipIf(numpy is None, 'numpy is required for fatigue counting')
+class Test_FatigueCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.sn_curve = fatigue.SNCurve(3, 1e12)
+        rng = numpy.random.default_rng(7)
+        n = 20000
+        self.pInt = (1500 + 1000 * numpy.sin(numpy.arange(n) / 300)
+                     + rng.normal(0, 50, n))
+        self.pExt = 14.7 + rng.normal(0, 5, n)
+
+    def count(self, counter, pExt, pInt, chunksize):
+        for start in range(0, len(pInt), chunksize):
+            counter.update(pExt[start:start + chunksize],
+                           pInt[start:start + chunksize])
+        return counter.result()
+
+    def test_astm_example(self):
+        # The example of ASTM E1049, as the hoop stress for internal pressure
+        stresses = [-2, 1, -3, 5, -1, 3, -4, 4, -2]
+        OD, ID = 3.0, 2.0
+        k = (OD**2 + ID**2) / (OD**2 - ID**2)
+        pInt = numpy.interp(numpy.linspace(0, 8, 81), range(9), stresses) / k
+        for chunksize in (1, 2, 7, 81):
+            with self.subTest(chunksize=chunksize):
+                counter = fatigue.FatigueCounter(
+                    OD, ID, self.sn_curve, stress='hoop',
+                    bins=[0.5, 3.5, 4.5, 6.5, 8.5, 9.5])
+                result = self.count(counter, numpy.zeros_like(pInt), pInt,
+                                    chunksize)
+                self.assertEqual(result.histogram.tolist(),
+                                 [0.5, 1.5, 0.5, 1.0, 0.5])
+                self.assertEqual(result.cycles, 4)
+                self.assertEqual(result.reversals, 9)
+                self.assertAlmostEqual(result.max_range, 9, 12)
+
+    def test_matches_reference(self):
+        counter = fatigue.FatigueCounter(3, 2.5, self.sn_curve)
+        stresses = counter.stresses(self.pExt, self.pInt)
+        cycles = rainflow(stresses.tolist())
+        ranges = numpy.array(list(cycles))
+        counts = numpy.array(list(cycles.values()))
+        expected = self.sn_curve.damage(ranges, counts)
+        for chunksize in (1000, 4999, 20000):
+            with self.subTest(chunksize=chunksize):
+                counter = fatigue.FatigueCounter(3, 2.5, self.sn_curve)
+                result = self.count(counter, self.pExt, self.pInt, chunksize)
+                self.assertEqual(result.samples, len(self.pInt))
+                self.assertEqual(result.cycles, sum(cycles.values()))
+                self.assertEqual(result.max_range, max(cycles))
+                self.assertAlmostEqual(result.damage, expected,
+                                       delta=1e-12 * expected)
+
+    def test_last_point_closes_cycle(self):
+        # The last reversal closes the full cycle 1-4 before the residue is
+        # counted as half cycles
+        histories = [[0, 4, 3, 3, 1, 3, 5, 1, 4, 0]]
+        rng = random.Random(5)
+        histories += [[rng.randint(0, 6) for _ in range(rng.randint(2, 15))]
+                      for _ in range(300)]
+        for history in histories:
+            with self.subTest(history=history):
+                counter = fatigue.FatigueCounter(3, 2.5, self.sn_curve,
+                                                 stress='hoop')
+                pExt = numpy.zeros(len(history))
+                pInt = numpy.array(history, dtype=numpy.float64)
+                stresses = counter.stresses(pExt, pInt)
+                cycles = rainflow(stresses.tolist())
+                counts = numpy.array(list(cycles.values()))
+                expected = (self.sn_curve.damage(numpy.array(list(cycles)),
+                                                 counts)
+                            if cycles else 0.0)
+                result = self.count(counter, pExt, pInt, 3)
+                self.assertEqual(result.cycles, counts.sum())
+                self.assertAlmostEqual(result.damage, expected,
+                                       delta=1e-12 * expected)
+
+    def test_result_keeps_state(self):
+        counter = fatigue.FatigueCounter(3, 2.5, self.sn_curve)
+        counter.update(self.pExt[:10000], self.pInt[:10000])
+        counter.result()
+        counter.update(self.pExt[10000:], self.pInt[10000:])
+        whole = fatigue.FatigueCounter(3, 2.5, self.sn_curve)
+        whole.update(self.pExt, self.pInt)
+        self.assertEqual(counter.result(), whole.result())
+
+    def test_stresses(self):
+        counter = fatigue.FatigueCounter(3, 2.5, self.sn_curve)
+        stresses = counter.stresses([0, 2000], [2000, 0])
+        self.assertAlmostEqual(stresses[0], Vessel(0, 2000, 3, 2.5, 1).maxstress,
+                               9)
+        # External pressure compresses the wall
+        self.assertAlmostEqual(stresses[1],
+                               -Vessel(2000, 0, 3, 2.5, 1).maxstress, 9)
+
+    def test_sn_curve(self):
+        curve = fatigue.SNCurve.from_points(100, 1e6, 200, 1.25e5,
+                                            endurance=50)
+        self.assertAlmostEqual(curve.m, 3)
+        self.assertAlmostEqual(curve.cycles([100])[0], 1e6)
+        self.assertEqual(curve.cycles([50])[0], math.inf)
+        self.assertAlmostEqual(curve.damage([100, 200, 10], [1, 2, 1000]),
+                               1e-6 + 2 / 1.25e5)
+        with self.assertRaises(ValueError):
+            fatigue.SNCurve(0, 1e12)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            fatigue.FatigueCounter(3, 2.5, self.sn_curve, stress='axial')
+        with self.assertRaises(ValueError):
+            fatigue.FatigueCounter(2, 2.5, self.sn_curve)
+        with self.assertRaises(ValueError):
+            list(fatigue.read_history(io.StringIO('p,q\n1,2\n')))
+        with self.assertRaises(ValueError):
+            list(fatigue.read_history(io.BytesIO(b'\0' * 12), 'binary'))
+
+
+@unittest.skipIf(numpy is None, 'numpy is required for fatigue counting')
+class Test_History(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(8)
+        self.samples = [(rng.uniform(0, 50), rng.uniform(0, 3000))
+                        for _ in range(5000)]
+        self.csv = 'time,pExt,pInt\n' + ''.join(
+            f'{i},{pExt!r},{pInt!r}\n'
+            for i, (pExt, pInt) in enumerate(self.samples))
+        self.binary = numpy.array(self.samples, dtype='<f8').tobytes()
+        self.sn_curve = fatigue.SNCurve(3, 1e12)
+
+    def counters(self):
+        return [fatigue.FatigueCounter(3, 2.5, self.sn_curve),
+                fatigue.FatigueCounter(2, 1.5, self.sn_curve)]
+
+    def test_formats(self):
+        from_csv = fatigue.evaluate_history(io.StringIO(self.csv),
+                                            self.counters(), chunksize=999)
+        from_binary = fatigue.evaluate_history(io.BytesIO(self.binary),
+                                               self.counters(), fmt='binary',
+                                               chunksize=1234)
+        self.assertEqual(from_csv.samples, 5000)
+        self.assertGreater(from_csv.samples_per_second, 0)
+        self.assertEqual(from_csv.results, from_binary.results)
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'history.bin')
+            with open(path, 'wb') as file:
+                file.write(self.binary)
+            report = fatigue.evaluate_history(path, self.counters())
+            self.assertEqual(report.samples, 5000)
+            with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                self.assertEqual(cli.main(
+                    ['fatigue', path, '--geometry', '3,2.5', '--geometry',
+                     '2,1.5', '--sn', '3,1e12', '--bins', '0:10000:10']), 0)
+        summary = json.loads(stdout.getvalue())
+        self.assertEqual(summary['samples'], 5000)
+        self.assertEqual([g['damage'] for g in summary['geometries']],
+                         [result.damage for result in report.results])
+        self.assertEqual(len(summary['geometries'][0]['histogram']['counts']),
+                         10)
+
+if __name__ == '__main__':
+    unittest.main()
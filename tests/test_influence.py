@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import random
+import unittest
+from pressurevessels import instrumentation
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels.influence import InfluenceCoefficients
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test_InfluenceCoefficients(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.geometries = []
+        for _ in range(20):
+            ID = rng.uniform(0.5, 10)
+            self.geometries.append((ID * rng.uniform(1.01, 3), ID))
+        self.cases = [(rng.uniform(0, 5000), rng.uniform(0, 5000),
+                       rng.uniform(20, 150) * 1000) for _ in range(30)]
+
+    def test_evaluate(self):
+        for OD, ID in self.geometries:
+            coefficients = InfluenceCoefficients(OD, ID)
+            for pExt, pInt, allow in self.cases:
+                result = coefficients.evaluate(pExt, pInt, allow)
+                expected = Vessel(pExt, pInt, OD, ID, allow).result
+                self.assertEqual(result.external, expected.external)
+                for field in result._fields[1:]:
+                    self.assertAlmostEqual(
+                        getattr(result, field) / getattr(expected, field),
+                        1, places=9, msg=field)
+                self.assertAlmostEqual(result.SF / expected.SF, 1, places=9)
+
+    def test_shared_stages(self):
+        # The safety factors and pressures are those of the Vessel stages
+        coefficients = InfluenceCoefficients(*self.geometries[0])
+        with instrumentation.measure() as measurement:
+            coefficients.evaluate(*self.cases[0])
+        instrumentation.reset()
+        self.assertEqual(measurement.stats['safetyfactors']['calls'], 1)
+        self.assertEqual(measurement.stats['maxpressures']['calls'], 1)
+
+    def test_superposition(self):
+        coefficients = InfluenceCoefficients(2.0, 1.5)
+        inner, outer = coefficients.principal_stresses(300, 1000)
+        inner_i, outer_i = coefficients.principal_stresses(0, 1000)
+        inner_e, outer_e = coefficients.principal_stresses(300, 0)
+        for combined, i, e in zip(inner + outer, inner_i + outer_i,
+                                  inner_e + outer_e):
+            self.assertAlmostEqual(combined, i + e)
+
+    @unittest.skipIf(numpy is None, 'numpy is required for rating')
+    def test_rate(self):
+        OD, ID = zip(*self.geometries)
+        pExt, pInt, allow = zip(*self.cases)
+        rating = InfluenceCoefficients(OD, ID).rate(pExt, pInt, allow)
+        self.assertEqual(rating.SF.shape, (len(OD), len(pExt)))
+        for g, (od, id_) in enumerate(self.geometries):
+            for c, (pe, pi, al) in enumerate(self.cases):
+                expected = Vessel(pe, pi, od, id_, al)
+                self.assertEqual(rating.external[g, c], expected.external)
+                self.assertAlmostEqual(rating.SF[g, c] / expected.SF, 1,
+                                       places=9)
+                self.assertAlmostEqual(
+                    rating.maxInternal[g, c] / expected.maxInternal, 1,
+                    places=9)
+
+    @unittest.skipIf(numpy is None, 'numpy is required for rating')
+    def test_rate_single_geometry(self):
+        pExt, pInt, allow = zip(*self.cases)
+        rating = InfluenceCoefficients(2.0, 1.5).rate(pExt, pInt, allow)
+        self.assertEqual(rating.SF.shape, (len(pExt),))
+        self.assertAlmostEqual(rating.SF[0],
+                               Vessel(pExt[0], pInt[0], 2.0, 1.5, allow[0]).SF)
+
+    @unittest.skipIf(numpy is None, 'numpy is required for rating')
+    def test_rate_shapes(self):
+        # A 2-D grid of geometries against a 2-D grid of load cases
+        OD, ID = (numpy.reshape(column[:12], (3, 4))
+                  for column in zip(*self.geometries))
+        pExt = numpy.array([[0.0], [500.0]])
+        pInt = numpy.array([1000.0, 2000.0, 3000.0])
+        rating = InfluenceCoefficients(OD, ID).rate(pExt, pInt, 60000)
+        self.assertEqual(rating.SF.shape, (3, 4, 2, 3))
+        self.assertAlmostEqual(rating.SF[2, 1, 1, 0]
+                               / Vessel(500, 1000, OD[2, 1], ID[2, 1],
+                                        60000).SF, 1, places=9)
+        # A geometry given as 0-d arrays
+        rating = InfluenceCoefficients(numpy.array(2.0),
+                                       numpy.array(1.5)).rate(pExt, pInt,
+                                                              60000)
+        self.assertEqual(rating.SF.shape, (2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
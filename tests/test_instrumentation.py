@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import importlib
+import pkgutil
+import sys
+import types
+import unittest
+import pressurevessels
+from pressurevessels import PressureVessels, instrumentation, sizing
+from pressurevessels.PressureVessels import Vessel
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test_Instrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.defaultvalues = (15, 0, 1.695, 1.460, 120)
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrumentation.enabled())
+        Vessel(*self.defaultvalues).SF
+        self.assertEqual(instrumentation.snapshot(), {})
+
+    def test_measure(self):
+        vessel = Vessel(*self.defaultvalues)
+        with instrumentation.measure() as measurement:
+            vessel.SF
+            result = vessel.minimize_OD()
+        stats = measurement.stats
+        self.assertEqual(stats['evaluate']['calls'], 1)
+        self.assertEqual(stats['maxpressures']['calls'], 1)
+        self.assertEqual(stats['size_OD']['calls'], 1)
+        self.assertEqual(stats['size_OD']['iterations'], result.iterations)
+        self.assertEqual(stats['size_OD']['evaluations'], result.evaluations)
+        # Every safety factor evaluation calculates the stresses
+        self.assertEqual(stats['stresses']['calls'], 1 + result.evaluations)
+        self.assertGreater(stats['size_OD']['seconds'], 0)
+        # The original functions are restored afterwards
+        self.assertFalse(instrumentation.enabled())
+        self.assertFalse(hasattr(PressureVessels.evaluate,
+                                 '__wrapped_stage__'))
+
+    def test_nested_measure(self):
+        instrumentation.enable()
+        Vessel(*self.defaultvalues).SF
+        with instrumentation.measure() as measurement:
+            Vessel(*self.defaultvalues).SF
+            Vessel(*self.defaultvalues).SF
+        self.assertEqual(measurement.stats['evaluate']['calls'], 2)
+        self.assertEqual(instrumentation.snapshot()['evaluate']['calls'], 3)
+        self.assertTrue(instrumentation.enabled())
+        self.assertIn('evaluate: 3 calls',
+                      instrumentation.format_stats(instrumentation.snapshot()))
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch sizing')
+    def test_batch_sizing(self):
+        with instrumentation.measure() as measurement:
+            result = sizing.size_OD_batch([15, 0], [0, 2000], [1.46, 2.5],
+                                          [120, 60000])
+        stats = measurement.stats['size_OD_batch']
+        self.assertEqual(stats['iterations'], result.iterations)
+        self.assertNotIn('evaluations', stats)
+        self.assertIn('size_OD_batch: 1 calls',
+                      instrumentation.format_stats(measurement.stats))
+
+    def test_every_binding(self):
+        # Import every module of the package which can be imported here
+        for module in pkgutil.iter_modules(pressurevessels.__path__):
+            if module.name in ('__main__', 'gui'):
+                continue
+            try:
+                importlib.import_module(f'pressurevessels.{module.name}')
+            except ImportError:
+                pass
+        originals = {id(function): function for function in (
+            PressureVessels.evaluate, PressureVessels._stresses,
+            PressureVessels._safetyfactors, PressureVessels._maxpressures)}
+
+        def bindings():
+            for name, module in list(sys.modules.items()):
+                if name.startswith('pressurevessels.'):
+                    for attribute, value in vars(module).items():
+                        if isinstance(value, types.FunctionType):
+                            yield f'{name}.{attribute}', value
+
+        found = [name for name, value in bindings()
+                 if originals.get(id(value)) is value]
+        self.assertIn('pressurevessels.catalog.evaluate', found)
+        instrumentation.enable()
+        self.assertEqual([name for name, value in bindings()
+                          if originals.get(id(value)) is value], [])
+        # A module imported while enabled is restored too
+        module = types.ModuleType('pressurevessels._imported_later')
+        module.evaluate = PressureVessels.evaluate
+        sys.modules[module.__name__] = module
+        try:
+            instrumentation.disable()
+            self.assertIs(module.evaluate, originals[id(module.evaluate)])
+        finally:
+            del sys.modules[module.__name__]
+        self.assertEqual(sorted(name for name, value in bindings()
+                                if originals.get(id(value)) is value),
+                         sorted(found))
+
+if __name__ == '__main__':
+    unittest.main()
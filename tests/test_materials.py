@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import io
+import json
+import math
+import random
+import unittest
+from unittest import mock
+from pressurevessels import batchio
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels.materials import MaterialDatabase
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MATERIALS_CSV = '''material,temperature,allowable_stress
+6061-T6,100,35000
+6061-T6,200,33000
+6061-T6,300,27000
+304,100,20000
+304,400,18000
+304,800,15500
+'''
+
+
+class Test_MaterialDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.database = MaterialDatabase.from_csv(io.StringIO(MATERIALS_CSV))
+        rng = random.Random(3)
+        tables = {}
+        for material in range(50):
+            temperatures = sorted(rng.sample(range(-20, 1200, 10),
+                                             rng.randint(1, 20)))
+            # Some very uneven steps
+            if material % 5 == 0 and len(temperatures) > 2:
+                temperatures.insert(1, temperatures[0] + 1e-3)
+            allowables = [rng.uniform(10000, 90000)]
+            for _ in temperatures[1:]:
+                allowables.append(allowables[-1] * rng.uniform(0.8, 1.0))
+            tables[f'M{material}'] = list(zip(temperatures, allowables))
+        self.tables = tables
+        self.random = MaterialDatabase(tables)
+
+    def test_interpolation(self):
+        self.assertEqual(self.database.allowable('6061-T6', 200), 33000)
+        self.assertEqual(self.database.allowable('6061-T6', 250), 30000)
+        self.assertEqual(self.database.allowable('304', 600), 16750)
+        # Below the table, the first value is used
+        self.assertEqual(self.database.allowable('304', 70), 20000)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.database.allowable('6061-T6', 301)
+        with self.assertRaises(ValueError):
+            self.database.allowable('6061-T6', math.nan)
+        with self.assertRaises(ValueError):
+            self.database.allowable('steel', 100)
+        with self.assertRaises(ValueError):
+            MaterialDatabase({'a': [(100, 1000), (100, 900)]})
+        with self.assertRaises(ValueError):
+            MaterialDatabase.from_csv(io.StringIO('material,temperature\n'
+                                                  'a,100\n'))
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch lookups')
+    def test_batch_matches_scalar(self):
+        rng = random.Random(4)
+        names = list(self.tables)
+        pairs = []
+        for _ in range(5000):
+            name = rng.choice(names)
+            pairs.append((name, rng.choice(
+                (rng.uniform(-100, 1300), rng.choice(self.tables[name])[0],
+                 math.nan))))
+        materials, temperatures = zip(*pairs)
+        allowables = self.random.allowable_batch(materials, temperatures)
+        codes = self.random.code(materials)
+        self.assertTrue(numpy.array_equal(
+            self.random.allowable_batch(codes, temperatures), allowables,
+            equal_nan=True))
+        for (name, temperature), allowable in zip(pairs, allowables):
+            with self.subTest(material=name, temperature=temperature):
+                try:
+                    expected = self.random.allowable(name, temperature)
+                except ValueError:
+                    self.assertTrue(math.isnan(allowable))
+                else:
+                    self.assertAlmostEqual(allowable, expected,
+                                           delta=1e-12 * expected)
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch lookups')
+    def test_batch_errors(self):
+        with self.assertRaises(ValueError):
+            self.database.allowable_batch([2], [100])
+        with self.assertRaises(ValueError):
+            self.database.allowable_batch(['steel'], [100])
+        with self.assertRaises(TypeError):
+            self.database.allowable_batch([0.5], [100])
+
+    def test_vessel(self):
+        vessel = self.database.vessel('6061-T6', 250, 0, 2000, 3, 2.5)
+        self.assertEqual(vessel.SF, Vessel(0, 2000, 3, 2.5, 30000).SF)
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch lookups')
+    def test_batch(self):
+        batch = self.database.batch(['6061-T6', '304', '304'], [250, 600, 900],
+                                    0, 2000, 3, 2.5)
+        self.assertEqual(batch.SF[0], Vessel(0, 2000, 3, 2.5, 30000).SF)
+        self.assertEqual(batch.SF[1], Vessel(0, 2000, 3, 2.5, 16750).SF)
+        self.assertTrue(math.isnan(batch.SF[2]))
+
+    def test_rows(self):
+        text = ('{"pExt": 0, "pInt": 2000, "OD": 3, "ID": 2.5, '
+                '"material": "304", "temperature": 600}\n'
+                '{"pExt": 0, "pInt": 2000, "OD": 3, "ID": 2.5, '
+                '"allowable_stress": 30000}\n')
+        for np in (numpy, None):
+            with self.subTest(numpy=np is not None), \
+                    mock.patch.object(batchio, 'np', np):
+                output = io.StringIO()
+                batchio.run_batch(io.StringIO(text), output,
+                                  input_format='jsonl',
+                                  materials=self.database)
+                rows = [json.loads(line)
+                        for line in output.getvalue().splitlines()]
+                self.assertEqual(rows[0]['allowable_stress'], 16750)
+                self.assertEqual(rows[1]['allowable_stress'], 30000)
+                self.assertEqual(rows[0]['SF'],
+                                 Vessel(0, 2000, 3, 2.5, 16750).SF)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import math
+import unittest
+from pressurevessels.PressureVessels import (Vessel, _principalstressEXT,
+                                             _principalstressINT)
+
+try:
+    import numpy
+    from pressurevessels.profiles import linearize, stress_profile
+except ImportError:
+    numpy = None
+
+DESIGNS = [(500, 3000, 2.04, 2.0), (0, 3000, 2.4, 2.0), (3000, 0, 4.0, 2.0),
+           (15, 0, 1.695, 1.46), (100, 8000, 6.0, 2.0)]
+
+
+def exact(pExt, pInt, OD, ID):
+    ''' The closed-form wall integrals of the Lame stresses.'''
+    a, b = ID / 2, OD / 2
+    t = b - a
+    A = (pInt*a**2 - pExt*b**2) / (b**2 - a**2)
+    B = (pInt - pExt) * a**2 * b**2 / (b**2 - a**2)
+    bending = 6*B / t**2 * ((a + b)*t / (2*a*b) - math.log(b / a))
+    return A + B/(a*b), A - B/(a*b), bending, math.sqrt(3)*abs(B)/(a*b)
+
+
+@unittest.skipIf(numpy is None, 'numpy is required for stress profiles')
+class Test_Profiles(unittest.TestCase):
+
+    def test_surfaces(self):
+        for pExt, pInt, OD, ID in DESIGNS:
+            profile = stress_profile(pExt, pInt, OD, ID, stations=7)
+            self.assertEqual(profile.r.shape, (7,))
+            self.assertAlmostEqual(profile.r[0], ID / 2)
+            self.assertAlmostEqual(profile.r[-1], OD / 2)
+            for index, stresses in ((0, _principalstressINT(OD, ID, pInt,
+                                                            pExt)),
+                                    (-1, _principalstressEXT(OD, ID, pInt,
+                                                             pExt))):
+                hoop, axial, radial = stresses
+                scale = abs(hoop) + abs(radial)
+                self.assertAlmostEqual(profile.hoop[index], hoop,
+                                       delta=1e-12 * scale)
+                self.assertAlmostEqual(profile.axial[index], axial,
+                                       delta=1e-12 * scale)
+                self.assertAlmostEqual(profile.radial[index], radial,
+                                       delta=1e-12 * scale)
+            v = Vessel(pExt, pInt, OD, ID, 1)
+            self.assertAlmostEqual(profile.vonmises[0] / v.maxstress, 1)
+            self.assertTrue(numpy.all(numpy.diff(profile.vonmises) < 0))
+
+    def test_linearize(self):
+        for pExt, pInt, OD, ID in DESIGNS:
+            result = linearize(pExt, pInt, OD, ID)
+            hoop, radial, bending, mean = exact(pExt, pInt, OD, ID)
+            self.assertAlmostEqual(result.membrane_hoop / hoop, 1, places=10)
+            self.assertAlmostEqual(result.membrane_radial / radial, 1,
+                                   places=10)
+            self.assertAlmostEqual(result.bending_hoop / bending, 1,
+                                   places=9)
+            self.assertAlmostEqual(result.mean / mean, 1, places=10)
+            self.assertEqual(result.bending_axial, 0)
+            # Equilibrium: the hoop force balances the pressures
+            self.assertAlmostEqual(result.membrane_hoop * (OD - ID) / 2,
+                                   (pInt*ID - pExt*OD) / 2, places=6)
+
+    def test_thick_wall(self):
+        # For a thick wall, the two-point mean overestimates the average
+        v = Vessel(0, 8000, 6.0, 2.0, 1)
+        result = v.linearize()
+        self.assertLess(result.mean, 0.8 * v.averagestress)
+        self.assertGreater(result.inner, result.outer)
+
+    def test_batch(self):
+        columns = [numpy.array(column) for column in zip(*DESIGNS)]
+        profile = stress_profile(*columns, stations=5)
+        result = linearize(*columns, points=12)
+        self.assertEqual(profile.hoop.shape, (len(DESIGNS), 5))
+        self.assertEqual(result.membrane.shape, (len(DESIGNS),))
+        for i, design in enumerate(DESIGNS):
+            single = linearize(*design, points=12)
+            for field in result._fields:
+                self.assertAlmostEqual(getattr(result, field)[i],
+                                       getattr(single, field))
+            numpy.testing.assert_allclose(profile.vonmises[i],
+                                          stress_profile(*design, 5).vonmises)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            stress_profile(0, 1, 2, 1, stations=1)
+        with self.assertRaises(ValueError):
+            linearize(0, 1, 2, 1, points=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import math
+import statistics
+import unittest
+from pressurevessels.PressureVessels import Vessel
+
+try:
+    import numpy
+    from pressurevessels.reliability import Normal, Uniform, simulate
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'numpy is required for reliability')
+class Test_Reliability(unittest.TestCase):
+
+    def test_fixed(self):
+        result = simulate(0, 3000, 2.2, 2.0, 60000, samples=1000,
+                          chunksize=300, seed=1)
+        SF = Vessel(0, 3000, 2.2, 2.0, 60000).SF
+        self.assertEqual(result.samples, 1000)
+        self.assertAlmostEqual(result.mean, SF)
+        self.assertAlmostEqual(result.variance, 0)
+        self.assertAlmostEqual(result.quantile(0.5) / SF, 1, places=2)
+        self.assertEqual(result.failures, 0)
+        low, high = result.failure_interval()
+        self.assertEqual(low, 0)
+        self.assertTrue(0 < high < 0.01)
+
+    def test_strength_scatter(self):
+        # The safety factor is proportional to the allowable stress, so its
+        # distribution is known
+        scale = Vessel(0, 3000, 2.2, 2.0, 1).SF
+        allowable = Normal(1 / scale, 0.1 / scale)
+        result = simulate(0, 3000, 2.2, 2.0, allowable, samples=200000,
+                          chunksize=30000, seed=2)
+        self.assertAlmostEqual(result.mean, 1, places=2)
+        self.assertAlmostEqual(result.std, 0.1, places=2)
+        low, high = result.failure_interval(0.999)
+        self.assertTrue(low < 0.5 < high)
+        self.assertAlmostEqual(result.quantile(0.1),
+                               statistics.NormalDist(1, 0.1).inv_cdf(0.1),
+                               places=2)
+
+    def test_reproducible(self):
+        args = (Normal(100, 10), Normal(3000, 300), Uniform(2.1, 2.3),
+                Uniform(1.9, 2.1), Normal(60000, 5000))
+        one = simulate(*args, samples=50000, chunksize=10000, seed=3)
+        again = simulate(*args, samples=50000, chunksize=10000, seed=3,
+                         workers=2)
+        other = simulate(*args, samples=50000, chunksize=10000, seed=4)
+        self.assertEqual(one.mean, again.mean)
+        self.assertEqual(one.variance, again.variance)
+        self.assertEqual(one.failures, again.failures)
+        self.assertTrue(numpy.array_equal(one.histogram, again.histogram))
+        self.assertNotEqual(one.mean, other.mean)
+
+    def test_no_wall(self):
+        # An eighth of the samples have OD <= ID, and they fail (the others
+        # are safe at this pressure)
+        result = simulate(0, 1, Uniform(1.9, 2.1), Uniform(1.8, 2.0),
+                          60000, samples=10000, seed=5)
+        self.assertEqual((result.samples, result.invalid), (10000, 0))
+        self.assertTrue(1000 < result.failures < 1500)
+        self.assertEqual(result.minimum, 0.0)
+
+    def test_no_net_pressure(self):
+        # Samples with no net pressure are safe (with an infinite or, from
+        # rounding, a huge safety factor)
+        result = simulate(Uniform(0, 2000), 1000, 2.2, 2.0, 60000,
+                          samples=10000, seed=6)
+        equal = simulate(1000, 1000, 2.2, 2.0, 60000, samples=1000, seed=6)
+        self.assertEqual((equal.samples, equal.invalid, equal.failures),
+                         (1000, 0, 0))
+        self.assertEqual(equal.failure_probability, 0.0)
+        self.assertGreater(equal.minimum, 1e9)
+        exact = simulate(10, 10, 2.0, 1.0, 100, samples=100, seed=6)
+        self.assertEqual((exact.samples, exact.failures), (100, 0))
+        self.assertEqual(exact.maximum, math.inf)
+        self.assertEqual(result.invalid, 0)
+        self.assertTrue(math.isfinite(result.mean))
+
+    def test_invalid(self):
+        # Only samples with nan parameters are invalid
+        class Gaps(Uniform):
+            def sample(self, rng, size):
+                values = super().sample(rng, size)
+                values[::4] = math.nan
+                return values
+
+        result = simulate(0, 3000, 2.2, 2.0, Gaps(50000, 70000),
+                          samples=1000, seed=7)
+        self.assertEqual((result.samples, result.invalid), (750, 250))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            simulate(0, 3000, '2.2', 2.0, 60000)
+        result = simulate(0, 3000, 2.2, 2.0, 60000, samples=10, seed=1)
+        with self.assertRaises(ValueError):
+            result.quantile(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import io
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from pressurevessels import cli, instrumentation, sizing
+from pressurevessels.PressureVessels import Vessel, VesselSpec, evaluate
+from pressurevessels.resultdb import ResultDatabase
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test_ResultDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'results.db')
+        self.database = ResultDatabase(self.path)
+        rng = random.Random(9)
+        self.specs = []
+        for _ in range(200):
+            ID = rng.uniform(0.5, 5)
+            self.specs.append(VesselSpec(rng.uniform(0, 100),
+                                         rng.uniform(200, 5000),
+                                         ID * rng.uniform(1.05, 2), ID,
+                                         rng.uniform(20000, 90000)))
+
+    def tearDown(self):
+        self.database.close()
+        self.directory.cleanup()
+
+    def test_evaluate(self):
+        results = self.database.evaluate_many(self.specs)
+        self.assertEqual(results, [evaluate(spec) for spec in self.specs])
+        self.assertEqual((self.database.hits, self.database.misses), (0, 200))
+        # Another connection, as from another process, finds the results
+        with ResultDatabase(self.path) as other:
+            self.assertEqual(other.evaluate_many(self.specs), results)
+            self.assertEqual(other.evaluate(self.specs[0]), results[0])
+            self.assertEqual(other.info()[:3], (201, 0, 200))
+            self.assertEqual(other.hit_rate, 1.0)
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone(),
+                         ('wal',))
+        connection.close()
+
+    def test_keys(self):
+        spec = self.specs[0]
+        self.database.evaluate(spec)
+        # Inputs are normalized to about 12 significant digits
+        close = spec._replace(OD=spec.OD * (1 + 1e-14))
+        self.assertEqual(self.database.lookup([close, spec._replace(
+            OD=spec.OD * (1 + 1e-9))])[1], None)
+        self.assertEqual(self.database.lookup([close])[0], evaluate(spec))
+        # Designs with nan are evaluated, but not stored
+        self.database.evaluate(spec._replace(pExt=math.nan))
+        self.assertEqual(self.database.info().evaluations, 1)
+        # The unit system and the version are part of the key
+        with ResultDatabase(self.path, units='SI') as other:
+            self.assertEqual(other.lookup([spec]), [None])
+        with ResultDatabase(self.path, version='0.0') as other:
+            self.assertEqual(other.lookup([spec]), [None])
+            self.assertEqual(other.info().stale, 1)
+
+    def test_size(self):
+        spec = self.specs[0]
+        first = self.database.size('OD', spec.pExt, spec.pInt, spec.ID,
+                                   spec.allowable_stress, target_SF=1.5)
+        self.assertEqual(first, sizing.size_OD(spec.pExt, spec.pInt, spec.ID,
+                                               spec.allowable_stress,
+                                               target_SF=1.5))
+        second = self.database.size('OD', spec.pExt, spec.pInt, spec.ID,
+                                    spec.allowable_stress, target_SF=1.5)
+        self.assertEqual(second[:2], first[:2])
+        self.assertEqual(second.iterations, 0)
+        # The sizing functions and Vessel use the database as a cache
+        vessel = Vessel(*spec, cache=self.database)
+        vessel.minimize_ID()
+        self.assertEqual(sizing.size_ID(*spec[:3], spec.allowable_stress,
+                                        cache=self.database).iterations, 0)
+        self.assertEqual(self.database.info().sizings, 2)
+        with self.assertRaises(ValueError):
+            self.database.size('wall', 0, 1000, 2, 30000)
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch sizing')
+    def test_size_batch(self):
+        pExt, pInt, OD, ID, allowable_stress = (numpy.array(column) for column
+                                                in zip(*self.specs))
+        # A design which cannot be sized is not stored
+        pInt[0] = allowable_stress[0] * 10
+        expected = sizing.size_OD_batch(pExt, pInt, ID, allowable_stress)
+        half = self.database.size_batch('OD', pExt[::2], pInt[::2], ID[::2],
+                                        allowable_stress[::2])
+        self.assertTrue(numpy.array_equal(half.value, expected.value[::2],
+                                          equal_nan=True))
+        result = self.database.size_batch('OD', pExt, pInt, ID,
+                                          allowable_stress)
+        self.assertTrue(numpy.array_equal(result.value, expected.value,
+                                          equal_nan=True))
+        self.assertEqual(result.converged.tolist(),
+                         expected.converged.tolist())
+        self.assertEqual((self.database.hits, self.database.misses),
+                         (99, 201))
+        # A scalar lookup finds a result of the batch
+        self.assertEqual(sizing.size_OD(*self.specs[1][:2], self.specs[1].ID,
+                                        self.specs[1].allowable_stress,
+                                        cache=self.database).value,
+                         expected.value[1])
+
+    def test_instrumented(self):
+        spec = self.specs[0]
+        expected = self.database.size('ID', *spec[:3], spec.allowable_stress)
+        instrumentation.enable()
+        try:
+            # The default tolerance is the same with wrapped sizing functions
+            self.assertEqual(sizing.size_ID(*spec[:3], spec.allowable_stress,
+                                            cache=self.database).iterations,
+                             0)
+            if numpy is not None:
+                result = self.database.size_batch('ID', *spec[:3],
+                                                  spec.allowable_stress)
+                self.assertEqual(result.value[0], expected.value)
+        finally:
+            instrumentation.disable()
+            instrumentation.reset()
+        self.assertEqual(self.database.hits, 2 if numpy is not None else 1)
+
+    def test_invalidate(self):
+        self.database.evaluate_many(self.specs)
+        with ResultDatabase(self.path, version='0.0') as old:
+            old.evaluate_many(self.specs[:50])
+            old.size('ID', 0, 1000, 3, 30000)
+        self.assertEqual(self.database.info().stale, 51)
+        self.assertEqual(self.database.invalidate(), 51)
+        self.database.vacuum()
+        self.assertEqual(self.database.info()[2:], (200, 0, 0))
+        self.assertEqual(self.database.invalidate(everything=True), 200)
+        self.assertEqual(self.database.lookup(self.specs[:1]), [None])
+
+    def test_cli(self):
+        text = ('pExt,pInt,ID,allowable_stress\n'
+                + ''.join(f'{spec.pExt},{spec.pInt},{spec.ID},'
+                          f'{spec.allowable_stress}\n'
+                          for spec in self.specs[:20]))
+        outputs = []
+        for _ in range(2):
+            with mock.patch('sys.stdin', io.StringIO(text)), \
+                    mock.patch('sys.stdout', new_callable=io.StringIO) as out, \
+                    mock.patch('sys.stderr', new_callable=io.StringIO) as err:
+                cli.main(['batch', '--size', 'OD', '--db', self.path, '-v'])
+            outputs.append(out.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn('20 hits, 0 misses', err.getvalue())
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            cli.main(['db', self.path, '--clear', '--vacuum'])
+        summary = json.loads(out.getvalue())
+        self.assertEqual((summary['sizings'], summary['removed']), (0, 20))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import random
+import unittest
+from pressurevessels.PressureVessels import Vessel, VesselSpec, evaluate
+from pressurevessels.sensitivity import sensitivity, sensitivity_batch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def designs(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        ID = rng.uniform(0.5, 10)
+        rows.append(VesselSpec(rng.uniform(0, 5000), rng.uniform(0, 5000),
+                               ID * rng.uniform(1.01, 3), ID,
+                               rng.uniform(20, 150) * 1000))
+    return rows
+
+
+class Test_Sensitivity(unittest.TestCase):
+
+    def test_finite_differences(self):
+        for spec in designs(300):
+            result = sensitivity(spec)
+            for i, name in enumerate(VesselSpec._fields):
+                step = spec[i] * 1e-6
+                up = evaluate(spec._replace(**{name: spec[i] + step}))
+                down = evaluate(spec._replace(**{name: spec[i] - step}))
+                if up.external != down.external:
+                    continue
+                for value, gradient in (('maxstress', result.d_maxstress),
+                                        ('averagestress',
+                                         result.d_averagestress),
+                                        ('SF', result.d_SF)):
+                    difference = (getattr(up, value)
+                                  - getattr(down, value)) / (2 * step)
+                    self.assertAlmostEqual(
+                        difference, getattr(gradient, name),
+                        delta=1e-5 * abs(getattr(gradient, name)) + 1e-9,
+                        msg=f'{value}/{name}')
+
+    def test_values_and_flags(self):
+        for spec in designs(50):
+            result = sensitivity(spec)
+            expected = evaluate(spec)
+            self.assertEqual(result.SF, expected.SF)
+            self.assertEqual(result.maxstress, expected.maxstress)
+            self.assertEqual(result.external, expected.external)
+            self.assertTrue(result.inner)
+            limit = 0.80 if expected.external else 0.666666
+            self.assertEqual(result.average_governs,
+                             expected.SF < spec.allowable_stress
+                             / expected.maxstress)
+            self.assertAlmostEqual(
+                result.SF, limit * spec.allowable_stress
+                / expected.averagestress if result.average_governs else
+                spec.allowable_stress / expected.maxstress)
+
+    def test_vessel(self):
+        v = Vessel(15, 0, 1.695, 1.46, 120)
+        self.assertEqual(v.sensitivity(), sensitivity(v.spec))
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch calculations')
+    def test_batch(self):
+        rows = designs(200)
+        result = sensitivity_batch(*zip(*rows))
+        for i, spec in enumerate(rows):
+            expected = sensitivity(spec)
+            self.assertEqual(result.external[i], expected.external)
+            self.assertEqual(result.inner[i], expected.inner)
+            self.assertEqual(result.average_governs[i],
+                             expected.average_governs)
+            for field in ('d_maxstress', 'd_averagestress', 'd_SF'):
+                for batch_value, value in zip(getattr(result, field),
+                                              getattr(expected, field)):
+                    self.assertAlmostEqual(batch_value[i], value,
+                                           delta=1e-12 * abs(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import asyncio
+import json
+import math
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from pressurevessels import batchio
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels.service import EvaluationService, RequestError
+from pressurevessels.sizing import size_OD
+
+DESIGNS = [dict(pExt=15, pInt=pInt, OD=1.695, ID=1.46, allowable_stress=120)
+           for pInt in range(10)]
+
+
+class Test_EvaluationService(unittest.IsolatedAsyncioTestCase):
+
+    async def test_batches(self):
+        service = EvaluationService(window=0.01)
+        results = await asyncio.gather(*(
+            service.evaluate({'op': 'evaluate', 'design': design})
+            for design in DESIGNS))
+        for design, result in zip(DESIGNS, results):
+            vessel = Vessel(**design)
+            self.assertEqual(result['SF'], vessel.SF)
+            self.assertEqual(result['maxstress'], vessel.maxstress)
+        metrics = service.metrics.snapshot()
+        self.assertEqual(metrics['requests'], len(DESIGNS))
+        self.assertEqual(metrics['batches'], 1)
+        self.assertEqual(metrics['max_batch'], len(DESIGNS))
+
+    async def test_max_batch(self):
+        service = EvaluationService(window=10, max_batch=4)
+        await asyncio.wait_for(asyncio.gather(*(
+            service.evaluate({'design': design}) for design in DESIGNS[:8])),
+            timeout=1)
+        self.assertEqual(service.metrics.batches, 2)
+
+    async def test_size(self):
+        request = {'op': 'size', 'size': 'OD', 'target_SF': 1.5,
+                   'design': dict(pExt=0, pInt=3000, ID=2,
+                                  allowable_stress=60000)}
+        expected = size_OD(0, 3000, 2, 60000, target_SF=1.5).value
+        for batching in (True, False):
+            service = EvaluationService(batching=batching)
+            result = await service.evaluate(dict(request))
+            self.assertTrue(result['converged'])
+            self.assertAlmostEqual(result['OD'], expected, places=4)
+            self.assertGreaterEqual(result['SF'], 1.5)
+
+    async def test_unbatched(self):
+        service = EvaluationService(batching=False)
+        result = await service.evaluate({'design': dict(DESIGNS[0], pExt=0, pInt=0)})
+        self.assertTrue(math.isnan(result['SF']))
+        self.assertEqual(service.metrics.batches, 1)
+
+    async def test_worker_thread(self):
+        threads = []
+        evaluate_rows = batchio.evaluate_rows
+
+        def record(rows, **kwargs):
+            threads.append(threading.get_ident())
+            return evaluate_rows(rows, **kwargs)
+
+        service = EvaluationService()
+        with mock.patch.object(batchio, 'evaluate_rows', record):
+            result = await service.evaluate({'design': DESIGNS[0]})
+        self.assertEqual(result['SF'], Vessel(**DESIGNS[0]).SF)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_failed_batch(self):
+        evaluate_rows = batchio.evaluate_rows
+
+        def fail(rows, **kwargs):
+            if any(row['pInt'] == 3 for row in rows):
+                raise ValueError('cannot evaluate')
+            return evaluate_rows(rows, **kwargs)
+
+        service = EvaluationService(window=0.01)
+        with mock.patch.object(batchio, 'evaluate_rows', fail):
+            results = await asyncio.gather(*(
+                service.evaluate({'design': design}) for design in DESIGNS),
+                return_exceptions=True)
+        for design, result in zip(DESIGNS, results):
+            if design['pInt'] == 3:
+                self.assertIsInstance(result, ValueError)
+            else:
+                self.assertEqual(result['SF'], Vessel(**design).SF)
+        self.assertEqual(service.metrics.errors, 1)
+        self.assertEqual(service.metrics.requests, len(DESIGNS) - 1)
+
+    async def test_invalid(self):
+        service = EvaluationService()
+        for request in ({'op': 'delete'}, {'design': {'pExt': 1}},
+                        {'op': 'size', 'size': 'wall', 'design': {}},
+                        {'design': dict(DESIGNS[0], OD='wide')}):
+            with self.assertRaises(RequestError):
+                service.submit(request)
+        self.assertEqual(service.metrics.errors, 4)
+
+    async def exchange(self, connect, lines):
+        reader, writer = await connect()
+        writer.write(b''.join(line.encode() + b'\n' for line in lines))
+        writer.write_eof()
+        responses = [json.loads(line) async for line in reader]
+        writer.close()
+        await writer.wait_closed()
+        return {response['id']: response for response in responses}
+
+    async def test_tcp(self):
+        service = EvaluationService()
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        lines = [json.dumps({'id': number, 'design': design})
+                 for number, design in enumerate(DESIGNS)]
+        lines.append(json.dumps({'id': 'nan', 'design': dict(DESIGNS[0], pExt=0,
+                                                             pInt=0)}))
+        lines.append('not json')
+        lines.append(json.dumps({'id': 'm', 'op': 'metrics'}))
+        async with server:
+            responses = await self.exchange(
+                lambda: asyncio.open_connection('127.0.0.1', port), lines)
+        for number, design in enumerate(DESIGNS):
+            self.assertEqual(responses[number]['result']['SF'],
+                             Vessel(**design).SF)
+        self.assertIn('error', responses[None])
+        # No net pressure has no safety factor, sent as null
+        self.assertIsNone(responses['nan']['result']['SF'])
+        self.assertEqual(responses['m']['result']['errors'], 1)
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server'),
+                         'Unix sockets are not available')
+    async def test_unix(self):
+        service = EvaluationService()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'service.sock')
+            server = await service.start(path=path)
+            async with server:
+                responses = await self.exchange(
+                    lambda: asyncio.open_unix_connection(path),
+                    [json.dumps({'id': 1, 'design': DESIGNS[0]})])
+        self.assertEqual(responses[1]['result']['SF'],
+                         Vessel(**DESIGNS[0]).SF)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from pressurevessels.PressureVessels import Vessel
+from pressurevessels import sizing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test_Sizing(unittest.TestCase):
+
+    def setUp(self):
+        self.defaultvalues = (15, 0, 1.695, 1.460, 120)
+        self.test_vessel = Vessel(*self.defaultvalues)
+
+    def test_safety_factor(self):
+        self.assertEqual(sizing.safety_factor(*self.defaultvalues),
+                         self.test_vessel.SF)
+
+    def test_minimize_OD(self):
+        result = self.test_vessel.minimize_OD()
+        self.assertEqual(self.test_vessel.OD, result.value)
+        self.assertEqual(self.test_vessel.SF, result.SF)
+        self.assertGreaterEqual(result.SF, 1.0)
+        # A slightly thinner wall must not be safe
+        self.assertLess(sizing.safety_factor(15, 0, result.value - 0.00001,
+                                             1.460, 120), 1.0)
+
+    def test_minimize_ID(self):
+        result = self.test_vessel.minimize_ID()
+        self.assertEqual(self.test_vessel.ID, result.value)
+        self.assertGreaterEqual(result.SF, 1.0)
+        self.assertLess(sizing.safety_factor(15, 0, 1.695,
+                                             result.value + 0.0001, 120), 1.0)
+
+    def test_pure(self):
+        sizing.size_OD(15, 0, 1.460, 120)
+        self.assertEqual(self.test_vessel.OD, 1.695)
+
+    def test_warm_start(self):
+        cold = self.test_vessel.minimize_OD()
+        # Same wall ratio at a different scale
+        self.test_vessel.modify_parameters(ID=2*1.460)
+        warm = self.test_vessel.minimize_OD()
+        self.assertLessEqual(warm.evaluations, cold.evaluations)
+        self.assertAlmostEqual(warm.value, 2*cold.value, 4)
+
+    def test_unreachable(self):
+        # The safety factor is limited even for a very thick wall
+        with self.assertRaises(ValueError):
+            sizing.size_ID(15, 0, 1.695, 10)
+
+    def test_no_net_pressure(self):
+        for size, diameter in ((sizing.size_OD, 1), (sizing.size_ID, 2)):
+            with self.subTest(size=size.__name__):
+                with self.assertRaisesRegex(ValueError, 'no net pressure'):
+                    size(10, 10, diameter, 100)
+
+    def test_thinnest_wall(self):
+        # A tiny pressure, with a stale warm start, shrinks the wall until
+        # it would vanish: the wall stops at a small fraction of the diameter
+        for wall_ratio in (None, 1.5):
+            with self.subTest(wall_ratio=wall_ratio):
+                OD = sizing.size_OD(0, 1e-12, 2, 60000,
+                                    wall_ratio=wall_ratio)
+                ID = sizing.size_ID(0, 1e-12, 2, 60000,
+                                    wall_ratio=wall_ratio)
+                self.assertGreater(OD.value, 2)
+                self.assertLess(ID.value, 2)
+                self.assertAlmostEqual(OD.value, 2, 5)
+                self.assertAlmostEqual(ID.value, 2, 5)
+                self.assertGreaterEqual(min(OD.SF, ID.SF), 1.0)
+
+
+@unittest.skipIf(numpy is None, 'numpy is required for batch calculations')
+class Test_BatchSizing(unittest.TestCase):
+
+    def setUp(self):
+        self.pExt = [15, 0, 3000, 500]
+        self.pInt = [0, 2000, 100, 500.5]
+        self.diameter = [1.460, 2.5, 4.0, 1.0]
+        self.allowable_stress = [120, 60000, 90000, 30000]
+
+    def test_size_OD_batch(self):
+        result = sizing.size_OD_batch(self.pExt, self.pInt, self.diameter,
+                                      self.allowable_stress)
+        self.assertTrue(result.converged.all())
+        self.assertTrue((result.SF >= 1.0).all())
+        for i, row in enumerate(zip(self.pExt, self.pInt, self.diameter,
+                                    self.allowable_stress)):
+            with self.subTest(row=i):
+                self.assertAlmostEqual(result.value[i],
+                                       sizing.size_OD(*row).value, 4)
+
+    def test_size_ID_batch(self):
+        result = sizing.size_ID_batch(self.pExt, self.pInt, self.diameter,
+                                      self.allowable_stress)
+        self.assertTrue(result.converged.all())
+        self.assertTrue((result.SF >= 1.0).all())
+        for i, row in enumerate(zip(self.pExt, self.pInt, self.diameter,
+                                    self.allowable_stress)):
+            with self.subTest(row=i):
+                self.assertAlmostEqual(result.value[i],
+                                       sizing.size_ID(*row).value, 3)
+
+    def test_unreachable(self):
+        result = sizing.size_ID_batch([15, 15], 0, 1.695, [10, 120])
+        self.assertEqual(list(result.converged), [False, True])
+        self.assertTrue(numpy.isnan(result.value[0]))
+
+    def test_no_net_pressure(self):
+        # This used to loop forever, so run it in a process with a timeout
+        code = ('from pressurevessels import sizing\n'
+                'for size in (sizing.size_OD_batch, sizing.size_ID_batch):\n'
+                '    result = size([10, 0], [10, 2000], [2.0, 2.5],'
+                ' [100, 60000])\n'
+                '    print(result.converged.tolist(), result.value[0])\n'
+                'print(sizing.minimize_wall_batch(10, 10, 100,'
+                ' OD_bounds=(1, 10)).feasible.tolist())\n')
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code], cwd=root,
+                                timeout=60, capture_output=True, text=True,
+                                check=True)
+        self.assertEqual(output.stdout.split('\n'),
+                         ['[False, True] nan', '[False, True] nan', '[False]',
+                          ''])
+
+
+class Test_MinimizeWall(unittest.TestCase):
+
+    def brute_force(self, pExt, pInt, allow, OD_bounds, ID_bounds, min_wall):
+        ''' The smallest feasible wall area on a fine grid of diameters.'''
+        best = None
+        steps = 400
+        for i in range(steps + 1):
+            ID = ID_bounds[0] + (ID_bounds[1] - ID_bounds[0]) * i / steps
+            for j in range(steps + 1):
+                OD = OD_bounds[0] + (OD_bounds[1] - OD_bounds[0]) * j / steps
+                if OD - ID < 2 * min_wall or OD <= ID:
+                    continue
+                if sizing.safety_factor(pExt, pInt, OD, ID, allow) >= 1.5:
+                    area = OD**2 - ID**2
+                    if best is None or area < best:
+                        best = area
+                    break
+        return best
+
+    def test_minimize_wall(self):
+        for pExt, pInt, bounds in ((0, 3000, ((2.5, 4), (1, 3))),
+                                   (3000, 0, ((1, 4), (2, 3))),
+                                   (0, 3000, ((2.5, 4), (1, 3), 0.3))):
+            OD_bounds, ID_bounds, *min_wall = bounds
+            min_wall = min_wall[0] if min_wall else 0.0
+            result = sizing.minimize_wall(pExt, pInt, 60000, target_SF=1.5,
+                                          OD_bounds=OD_bounds,
+                                          ID_bounds=ID_bounds,
+                                          min_wall=min_wall, density=0.29)
+            self.assertGreaterEqual(result.SF, 1.5)
+            self.assertGreaterEqual(result.OD - result.ID, 2*min_wall - 1e-12)
+            self.assertTrue(OD_bounds[0] <= result.OD <= OD_bounds[1])
+            self.assertTrue(ID_bounds[0] <= result.ID <= ID_bounds[1])
+            self.assertAlmostEqual(result.mass, 0.29 * result.area)
+            best = self.brute_force(pExt, pInt, 60000, OD_bounds, ID_bounds,
+                                    min_wall)
+            self.assertLessEqual(result.OD**2 - result.ID**2, best)
+            self.assertAlmostEqual(result.OD**2 - result.ID**2, best, places=1)
+
+    def test_vessel(self):
+        v = Vessel(0, 3000, 3, 1, 60000)
+        result = v.minimize_wall(ID_bounds=(2, 3))
+        self.assertEqual((v.OD, v.ID), (result.OD, result.ID))
+        self.assertEqual(v.ID, 2)
+        self.assertAlmostEqual(v.SF, 1, places=6)
+
+    def test_infeasible(self):
+        with self.assertRaises(ValueError):
+            sizing.minimize_wall(0, 3000, 60000)
+        with self.assertRaises(ValueError):
+            sizing.minimize_wall(0, 3000, 60000, ID_bounds=(2, 3),
+                                 OD_bounds=(0, 2.1))
+        with self.assertRaises(ValueError):
+            sizing.minimize_wall(0, 100000, 60000, ID_bounds=(2, 3))
+
+    @unittest.skipIf(numpy is None, 'numpy is required for batch calculations')
+    def test_minimize_wall_batch(self):
+        pExt = [0, 3000, 0, 0]
+        pInt = [3000, 0, 3000, 100000]
+        result = sizing.minimize_wall_batch(pExt, pInt, 60000, target_SF=1.5,
+                                            OD_bounds=(2.5, 3),
+                                            min_wall=[0, 0.1, 1.3, 0])
+        self.assertEqual(list(result.feasible), [True, True, False, False])
+        for i in (0, 1):
+            expected = sizing.minimize_wall(
+                pExt[i], pInt[i], 60000, target_SF=1.5, OD_bounds=(2.5, 3),
+                min_wall=[0, 0.1][i])
+            self.assertGreaterEqual(result.SF[i], 1.5)
+            self.assertAlmostEqual(result.OD[i], expected.OD, places=6)
+            self.assertAlmostEqual(result.ID[i], expected.ID, places=6)
+        self.assertTrue(numpy.isnan(result.area[2]))
+
+if __name__ == '__main__':
+    unittest.main()
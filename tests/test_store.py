@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy
+    from pressurevessels.PressureVessels import VesselBatch
+    from pressurevessels import store, sweep
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is required for result stores')
+class Test_ResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'results')
+        self.batches = [VesselBatch([15, 20, 25], 0, 1.695, 1.460, 120),
+                        VesselBatch(0, [100, 5000], 3, 2.5, 60000)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        with store.ResultWriter(self.path, units='SI') as writer:
+            for batch in self.batches:
+                writer.append(batch)
+        results = store.ResultStore(self.path)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results.units, 'SI')
+        self.assertIsInstance(results['SF'], numpy.memmap)
+        for name in results.fields:
+            with self.subTest(field=name):
+                expected = numpy.concatenate([getattr(batch, name)
+                                              for batch in self.batches])
+                self.assertTrue(numpy.array_equal(results[name], expected))
+
+    def test_select(self):
+        with store.ResultWriter(self.path) as writer:
+            for batch in self.batches:
+                writer.append(batch)
+        results = store.ResultStore(self.path)
+        indices = results.select(lambda columns: columns['SF'] < 1.2, ['SF'],
+                                 chunksize=2)
+        SF = numpy.concatenate([batch.SF for batch in self.batches])
+        self.assertEqual(indices.tolist(), numpy.flatnonzero(SF < 1.2).tolist())
+        self.assertEqual(results.take(indices, ['SF'])['SF'].tolist(),
+                         SF[SF < 1.2].tolist())
+
+    def test_readable_while_writing(self):
+        writer = store.ResultWriter(self.path)
+        self.assertEqual(len(store.ResultStore(self.path)), 0)
+        writer.append(self.batches[0])
+        self.assertEqual(len(store.ResultStore(self.path)), 3)
+        writer.close()
+
+    def test_sweep_store(self):
+        grid = ([0, 15], 5, [1.5, 1.7], [1.46, 1.6], 120)
+        with store.ResultWriter(self.path) as writer:
+            result = sweep.sweep(*grid, workers=1, chunksize=3, store=writer)
+        results = store.ResultStore(self.path)
+        self.assertEqual(len(results), result.valid)
+        self.assertEqual(int((results['SF'][:] >= 1).sum()), result.feasible)
+
+if __name__ == '__main__':
+    unittest.main()
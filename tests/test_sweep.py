@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2020 tamalone1
+"""
+
+import copy
+import itertools
+import unittest
+from unittest import mock
+from pressurevessels.PressureVessels import Vessel
+
+try:
+    import numpy
+    from pressurevessels import sweep
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is required for sweeps')
+class Test_Sweep(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = ([0, 15, 30], [5, 20], [1.5, 1.6, 1.7, 1.8], [1.46, 1.55],
+                     [120, 150])
+        self.result = sweep.sweep(*self.grid, workers=1, chunksize=7,
+                                  keep_feasible=True)
+
+    def test_matches_vessel(self):
+        designs = list(itertools.product(*self.grid))
+        valid = [design for design in designs if design[2] > design[3]]
+        feasible = [i for i, design in enumerate(designs)
+                    if design[2] > design[3] and Vessel(*design).SF >= 1.0]
+        self.assertEqual(self.result.total, len(designs))
+        self.assertEqual(self.result.valid, len(valid))
+        self.assertEqual(self.result.feasible, len(feasible))
+        self.assertEqual(self.result.feasible_indices.tolist(), feasible)
+        self.assertEqual(self.result.histogram.sum(), len(valid))
+
+    def test_min_wall(self):
+        for pExt, pInt, design in self.result.min_wall_designs():
+            with self.subTest(pExt=pExt, pInt=pInt):
+                candidates = [d for d in itertools.product(*self.grid)
+                              if d[:2] == (pExt, pInt) and d[2] > d[3]
+                              and Vessel(*d).SF >= 1.0]
+                if not candidates:
+                    self.assertIsNone(design)
+                    continue
+                thinnest = min((d[2] - d[3]) / 2 for d in candidates)
+                self.assertEqual((design.OD - design.ID) / 2, thinnest)
+
+    def test_independent_of_workers(self):
+        result = sweep.sweep(*self.grid, workers=2, chunksize=5,
+                             keep_feasible=True)
+        self.assertEqual(result.feasible_indices.tolist(),
+                         self.result.feasible_indices.tolist())
+        self.assertEqual(result.histogram.tolist(),
+                         self.result.histogram.tolist())
+        self.assertEqual(result.min_wall_index.tolist(),
+                         self.result.min_wall_index.tolist())
+
+    def test_scaling_report_mismatch(self):
+        different = copy.copy(self.result)
+        different.feasible += 1
+        with mock.patch.object(sweep, 'sweep',
+                               side_effect=[self.result, different]):
+            with self.assertRaises(RuntimeError):
+                sweep.scaling_report(*self.grid, max_workers=2)
+
+    def test_grid_values(self):
+        self.assertEqual(sweep.grid_values('0:10:3').tolist(), [0, 5, 10])
+        self.assertEqual(sweep.grid_values('1,2.5').tolist(), [1, 2.5])
+
+if __name__ == '__main__':
+    unittest.main()
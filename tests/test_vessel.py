@@ -6,7 +6,7 @@ Copyright (c) 2020 tamalone1
 """
 
 import unittest
-from pressurevessels.PressureVessels import Vessel
+from pressurevessels.PressureVessels import Vessel, VesselSpec, evaluate
 from pressurevessels import conversions
 
 class Test_Vessel(unittest.TestCase):
@@ -41,6 +41,42 @@ class Test_Vessel(unittest.TestCase):
         # Check that the safety factor decreased
         self.assertLess(self.test_vessel.SF, sf_0)
 
+    def test_lazy_results(self):
+        vessel = Vessel(*self.defaultvalues)
+        # Nothing is calculated until a result is accessed
+        self.assertIsNone(vessel._result)
+        sf_0 = vessel.SF
+        self.assertIsNotNone(vessel._result)
+        # Changing an input discards the old results
+        vessel.pExt = 20
+        self.assertIsNone(vessel._result)
+        self.assertLess(vessel.SF, sf_0)
+        self.assertEqual(vessel.SF, Vessel(20, 0, 1.695, 1.460, 120).SF)
+
+    def test_stage_methods(self):
+        vessel = Vessel(*self.defaultvalues)
+        self.assertTrue(vessel.get_external())
+        self.assertEqual(vessel.get_stresses(),
+                         (vessel.maxstress, vessel.averagestress))
+        self.assertEqual(vessel.get_safetyfactors(),
+                         (vessel.SF_external, vessel.SF_internal))
+        self.assertEqual(vessel.get_maxpressures(),
+                         (vessel.maxExternal, vessel.maxInternal))
+        vessel.modify_parameters(pInt=100)
+        self.assertFalse(vessel.get_external())
+
+    def test_evaluate(self):
+        spec = VesselSpec(*self.defaultvalues)
+        result = evaluate(spec)
+        self.assertEqual(self.test_vessel.spec, spec)
+        self.assertEqual(self.test_vessel.result, result)
+        self.assertEqual(result.SF, self.test_vessel.SF)
+        # Specs are immutable and hashable
+        with self.assertRaises(AttributeError):
+            spec.OD = 2
+        self.assertEqual({spec: result}[VesselSpec(*self.defaultvalues)],
+                         result)
+
     def test_change_units(self):
         starting_parameters = self.test_vessel.__dict__
         vessel_parameters = [('pExt', 'pressure'),